@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""bench_check_duplicates.py - Scaling benchmark for check-duplicates.py --audit.
+
+Usage:
+    python3 benchmarks/bench_check_duplicates.py [--sizes 1000 10000 50000]
+                                                 [--exhaustive-max 1000]
+                                                 [--engine difflib|tfidf] [--jobs N]
+
+Writes synthetic command catalogs of each size to a temporary directory
+and times audit_catalog() with LSH candidate generation. Names and
+descriptions are drawn from the words used in references/. About 2% of
+commands are near-duplicates of another (a typo or plural in the name,
+a reworded description), so the audit has real findings to report.
+
+Up to --exhaustive-max commands, the exhaustive pairwise audit is also
+run to measure LSH recall (share of exhaustive findings also reported
+with LSH) and speedup; above it, exhaustive time is extrapolated
+quadratically from the largest measured size. The exhaustive baseline
+always uses the difflib engine; recall is reported for --engine difflib
+only, since TF-IDF findings are a different measure.
+
+With --jobs, the sharded cluster audit (--audit --jobs N --json) is
+timed too, in the Sharded column.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+
+NEAR_DUPLICATE_RATE = 0.02
+
+
+def load_check_duplicates() -> ModuleType:
+    """Import scripts/check-duplicates.py as a module."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    spec = importlib.util.spec_from_file_location(
+        "check_duplicates", SCRIPTS_DIR / "check-duplicates.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    """Real words from references/, topped up with pronounceable pseudo-words."""
+    words = {
+        w
+        for path in (ROOT / "references").rglob("*.md")
+        for w in re.findall(r"[a-z]{4,}", path.read_text().lower())
+    }
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    while len(words) < size:
+        syllables = rng.randint(2, 3)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(syllables)))
+    return sorted(words)
+
+
+def make_catalog(directory: Path, size: int, seed: int = 0) -> None:
+    """Write size command files with some injected near-duplicates."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 4000)
+    names: set[str] = set()
+    commands: list[tuple[str, str]] = []
+
+    while len(commands) < size:
+        if commands and rng.random() < NEAR_DUPLICATE_RATE:
+            base_name, base_desc = rng.choice(commands)
+            name = base_name + "s" if rng.random() < 0.5 else base_name[:-1] + "x"
+            words = base_desc.split()
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            description = " ".join(words)
+        else:
+            name = "-".join(rng.sample(vocabulary, rng.randint(2, 3)))
+            words = rng.sample(vocabulary, rng.randint(6, 10))
+            description = " ".join(words).capitalize()
+        if name in names:
+            continue
+        names.add(name)
+        commands.append((name, description))
+
+    for name, description in commands:
+        (directory / f"{name}.md").write_text(
+            f"---\ndescription: {description}\n---\n\n# {name}\n\nInstructions.\n"
+        )
+
+
+def run_audit(
+    cd: ModuleType,
+    directory: Path,
+    exhaustive: bool,
+    engine: str = "difflib",
+    jobs: int | None = None,
+) -> tuple[float, set[str]]:
+    """Return (seconds, reported finding lines) for one audit."""
+    stderr = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+        cd.audit_catalog(
+            directory,
+            exhaustive=exhaustive,
+            use_index=False,
+            engine=engine,
+            jobs=jobs,
+            json_output=jobs is not None,
+        )
+    elapsed = time.perf_counter() - start
+    return elapsed, set(stderr.getvalue().splitlines())
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark check-duplicates.py --audit")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument(
+        "--exhaustive-max",
+        type=int,
+        default=1000,
+        help="Largest size also audited exhaustively (default: 1000)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("difflib", "tfidf"),
+        default="difflib",
+        help="Description engine for the timed audit (default: difflib)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Also time the sharded cluster audit with this many processes",
+    )
+    args = parser.parse_args()
+
+    cd = load_check_duplicates()
+    print(f"{'Commands':>9}  {'LSH':>9}  {'Exhaustive':>12}  {'Speedup':>8}  "
+          f"{'Findings':>8}  {'Recall':>7}  {'Sharded':>9}")
+
+    pairwise_rate = None  # exhaustive seconds per pair, from the largest measured run
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            make_catalog(directory, size)
+            lsh_time, lsh_found = run_audit(cd, directory, exhaustive=False, engine=args.engine)
+            sharded = "n/a"
+            if args.jobs is not None:
+                sharded_time, _ = run_audit(
+                    cd, directory, exhaustive=False, engine=args.engine, jobs=args.jobs
+                )
+                sharded = f"{sharded_time:8.2f}s"
+
+            recall = ""
+            if size <= args.exhaustive_max:
+                full_time, full_found = run_audit(cd, directory, exhaustive=True)
+                pairwise_rate = full_time / (size * size)
+                if full_found and args.engine == "difflib":
+                    recall = f"{len(lsh_found & full_found) / len(full_found):.1%}"
+                exhaustive = f"{full_time:10.2f}s"
+            elif pairwise_rate is not None:
+                full_time = pairwise_rate * size * size
+                exhaustive = f"~{full_time:9.0f}s"
+            else:
+                full_time = 0.0
+                exhaustive = "n/a"
+
+        speedup = f"{full_time / lsh_time:7.1f}x" if full_time else "n/a"
+        print(f"{size:>9,}  {lsh_time:8.2f}s  {exhaustive:>12}  {speedup:>8}  "
+              f"{len(lsh_found):>8,}  {recall:>7}  {sharded:>9}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""bench_token_estimate.py - Compare fallback token estimators against tiktoken.
+
+Usage:
+    python3 benchmarks/bench_token_estimate.py [corpus-dir] [--calibrate]
+
+Measures speed and per-file accuracy of the calibrated character-class
+estimator in count-tokens.py against the previous word heuristic
+(words * 1.3), using tiktoken cl100k_base as ground truth. Defaults to
+the repository's references/ corpus.
+
+With --calibrate, refits the per-class coefficients by least squares
+over every pre-token in the corpus and prints a replacement
+ESTIMATE_COEFFICIENTS table plus the resulting error band. The
+references/ corpus is ASCII-only apart from box-drawing diagrams, so a
+small built-in multilingual sample is added to anchor the non-Latin
+classes.
+
+Requires tiktoken (with the cl100k_base rank file available).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import math
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+
+
+MULTILINGUAL_SAMPLE = """
+命令文件在每条消息中都会被重新处理，因此应保持简短。
+コマンドファイルはメッセージごとに再処理されるため、短く保つ必要があります。
+명령 파일은 메시지마다 다시 처리되므로 짧게 유지해야 합니다.
+Файлы команд обрабатываются заново при каждом сообщении, поэтому их следует делать короткими.
+Τα αρχεία εντολών επεξεργάζονται ξανά σε κάθε μήνυμα, γι' αυτό πρέπει να είναι σύντομα.
+تتم معالجة ملفات الأوامر مرة أخرى مع كل رسالة، لذا يجب أن تبقى قصيرة.
+Les fichiers de commande sont retraités à chaque message ; gardez-les concis et précis.
+Befehlsdateien werden bei jeder Nachricht erneut verarbeitet, daher sollten sie kurz sein.
+"""
+
+
+def load_count_tokens() -> ModuleType:
+    """Import scripts/count-tokens.py as a module."""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    spec = importlib.util.spec_from_file_location("count_tokens", SCRIPTS_DIR / "count-tokens.py")
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def word_heuristic(text: str) -> int:
+    """The original fallback: word count * 1.3."""
+    return int(len(text.split()) * 1.3)
+
+
+def calibrate(ct: ModuleType, texts: list[str], encode: Callable[[str], list[int]]) -> None:
+    """Refit per-class coefficients and print them."""
+    # Per class: n, sum(len), sum(len^2), sum(t), sum(t*len)
+    stats = {name: [0.0] * 5 for name in ct.ESTIMATE_CLASSES}
+    for text in texts:
+        for match in ct._ESTIMATE_SPLIT.finditer(text):
+            piece = match.group()
+            tokens = len(encode(piece))
+            length = len(piece)
+            s = stats[match.lastgroup]
+            s[0] += 1
+            s[1] += length
+            s[2] += length * length
+            s[3] += tokens
+            s[4] += tokens * length
+
+    print("ESTIMATE_COEFFICIENTS: dict[str, tuple[float, float]] = {")
+    for name in ct.ESTIMATE_CLASSES:
+        n, sx, sxx, st, stx = stats[name]
+        denom = n * sxx - sx * sx
+        if n == 0:
+            per_piece, per_char = 1.0, 0.0
+        elif denom == 0:
+            per_piece, per_char = st / n, 0.0
+        else:
+            per_char = (n * stx - sx * st) / denom
+            per_piece = (st - per_char * sx) / n
+            if per_piece < 0:
+                # Refit through the origin rather than credit pieces negatively
+                per_piece, per_char = 0.0, stx / sxx
+        ct.ESTIMATE_COEFFICIENTS[name] = (per_piece, per_char)
+        print(f'    "{name}": ({per_piece:.4f}, {per_char:.4f}),  # {int(n)} pieces')
+    print("}")
+
+
+def evaluate(
+    name: str, estimator: Callable[[str], int], texts: list[str], truth: list[int]
+) -> None:
+    """Print speed and accuracy for one estimator."""
+    start = time.perf_counter()
+    estimates = [estimator(t) for t in texts]
+    elapsed = time.perf_counter() - start
+
+    errors = [(e - t) / t for e, t in zip(estimates, truth, strict=True) if t]
+    mean_abs = sum(abs(e) for e in errors) / len(errors)
+    worst = max(abs(e) for e in errors)
+    total_error = (sum(estimates) - sum(truth)) / sum(truth)
+    chars = sum(len(t) for t in texts)
+
+    print(f"{name}:")
+    print(f"  Speed:            {chars / elapsed / 1e6:8.2f} MB/s ({elapsed * 1000:.1f} ms)")
+    print(f"  Corpus total:     {sum(estimates):,} ({total_error:+.1%})")
+    print(f"  Mean |error|:     {mean_abs:.1%}")
+    print(f"  Worst file error: {worst:.1%} (error band ±{math.ceil(worst * 100)}%)")
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark fallback token estimators")
+    parser.add_argument("corpus", type=Path, nargs="?", default=ROOT / "references")
+    parser.add_argument("--calibrate", action="store_true", help="Refit coefficients first")
+    args = parser.parse_args()
+
+    try:
+        import tiktoken  # type: ignore[import-untyped]
+    except ImportError:
+        print("Error: tiktoken is required for ground-truth counts", file=sys.stderr)
+        return 1
+
+    ct = load_count_tokens()
+    enc = tiktoken.get_encoding("cl100k_base")
+    texts = [p.read_text() for p in sorted(args.corpus.rglob("*.md"))]
+    if not texts:
+        print(f"Error: No markdown files under {args.corpus}", file=sys.stderr)
+        return 1
+
+    if args.calibrate:
+        calibrate(ct, [*texts, MULTILINGUAL_SAMPLE], enc.encode)
+        print()
+
+    start = time.perf_counter()
+    truth = [len(enc.encode(t)) for t in texts]
+    elapsed = time.perf_counter() - start
+    chars = sum(len(t) for t in texts)
+
+    print(f"Corpus: {args.corpus} ({len(texts)} files, {chars:,} chars)")
+    print(f"tiktoken: {sum(truth):,} tokens, {chars / elapsed / 1e6:.2f} MB/s")
+    print()
+    evaluate("Word heuristic (words * 1.3)", word_heuristic, texts, truth)
+    evaluate("Character-class estimate", ct.count_tokens_estimate, texts, truth)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""audit_shards.py - Sharded, parallel catalog audit merged into clusters.
+
+audit_catalog() walks the catalog in one process, prints every pair it
+finds and remembers printed pairs in a set, which is slow and grows
+with the number of matches on large shared catalogs. The sharded audit
+splits the rows into shards of SHARD_ROWS commands and, for each row i
+of a shard, finds the duplicate links (i, j) with j > i:
+
+- exact: identical names (unless the caller reports those itself)
+- name: normalized names within the fuzzy threshold (name_index.py)
+- description: TF-IDF cosine over the shard's rows, or the difflib
+  ratio against LSH bucket mates, every later row when exhaustive, or
+  every later row on small catalogs
+
+Every pair is owned by the shard of its smaller index, so shards never
+repeat work or links and no seen-pairs set is needed. Shards run in a
+multiprocessing pool (each worker builds the indexes once, in its
+initializer) and results come back in shard order, so the links, and
+the clusters union-find builds from them, are the same for any number
+of jobs. Only links are kept, so memory grows with the duplicates found
+rather than with the comparisons made.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from collections import defaultdict
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, TypedDict
+
+from catalog_index import band_keys, normalize_name
+from description_vectors import DescriptionVectors
+from name_index import NameIndex
+from ratio_cascade import RatioCascade
+from simhash import clusters
+
+SHARD_ROWS = 256
+
+# (i, j, kind, score) with i < j; score is the ratio or cosine, the SimHash
+# distance for body links and 1.0 for exact names
+Link = tuple[int, int, str, float]
+
+
+class ShardOptions(TypedDict):
+    """Settings shared by every shard of one audit."""
+
+    engine: str
+    name_threshold: float
+    description_threshold: float
+    exhaustive: bool
+    lsh: tuple[int, int] | None
+    exact_names: bool
+
+
+class ShardAuditor:
+    """Indexes over the whole catalog, answering one shard of rows at a time."""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        descriptions: Sequence[str],
+        desc_sigs: Sequence[Sequence[int]],
+        options: ShardOptions,
+    ) -> None:
+        self.names = list(names)
+        self.descriptions = [d.lower() for d in descriptions]
+        self.options = options
+        self.cascade = RatioCascade()
+        self.name_index = NameIndex(normalize_name(name) for name in self.names)
+
+        self.vectors: DescriptionVectors | None = None
+        self.row_keys: list[list[int]] | None = None
+        self.buckets: dict[int, list[int]] = defaultdict(list)
+        if options["engine"] == "tfidf":
+            self.vectors = DescriptionVectors(descriptions)
+        elif options["lsh"] is not None and not options["exhaustive"]:
+            self.row_keys = [band_keys(sig, *options["lsh"]) for sig in desc_sigs]
+            for i, keys in enumerate(self.row_keys):
+                for key in keys:
+                    self.buckets[key].append(i)
+
+    def _later_rows(self, i: int) -> Iterator[int]:
+        """Rows j > i whose descriptions are compared with row i by difflib."""
+        if self.row_keys is None:
+            yield from range(i + 1, len(self.names))
+            return
+        found: set[int] = set()
+        for key in self.row_keys[i]:
+            found.update(j for j in self.buckets[key] if j > i)
+        yield from sorted(found)
+
+    def links(self, start: int, stop: int) -> list[Link]:
+        """Links (i, j, kind, score) for rows start..stop and every j > i."""
+        options = self.options
+        links: list[Link] = []
+        for i in range(start, stop):
+            name = self.names[i]
+            normalized = self.name_index.normalized[i]
+            for j in self.name_index.lookup(normalized, options["name_threshold"]):
+                if j <= i:
+                    continue
+                if self.names[j] == name:
+                    if options["exact_names"]:
+                        links.append((i, j, "exact", 1.0))
+                    continue
+                ratio = self.cascade.ratio(
+                    normalized, self.name_index.normalized[j], options["name_threshold"]
+                )
+                if ratio is not None:
+                    links.append((i, j, "name", ratio))
+
+            if self.vectors is not None or not self.descriptions[i]:
+                continue
+            for j in self._later_rows(i):
+                if not self.descriptions[j]:
+                    continue
+                ratio = self.cascade.ratio(
+                    self.descriptions[i], self.descriptions[j], options["description_threshold"]
+                )
+                if ratio is not None:
+                    links.append((i, j, "description", ratio))
+
+        if self.vectors is not None:
+            links.extend(
+                (i, j, "description", cosine)
+                for i, j, cosine in self.vectors.similar_pairs(
+                    options["description_threshold"], start, stop
+                )
+            )
+        return sorted(links)
+
+
+# Per-process auditor, built once by the pool initializer
+_AUDITOR: ShardAuditor | None = None
+
+
+def _init_worker(
+    names: Sequence[str],
+    descriptions: Sequence[str],
+    desc_sigs: Sequence[Sequence[int]],
+    options: ShardOptions,
+) -> None:
+    global _AUDITOR
+    _AUDITOR = ShardAuditor(names, descriptions, desc_sigs, options)
+
+
+def _shard_links(shard: tuple[int, int]) -> tuple[list[Link], tuple[int, dict[str, int]]]:
+    """Worker: links of one shard, plus the cascade counts it added."""
+    assert _AUDITOR is not None
+    before_pairs, before = _AUDITOR.cascade.counts()
+    links = _AUDITOR.links(*shard)
+    pairs, rejected = _AUDITOR.cascade.counts()
+    delta = {tier: count - before[tier] for tier, count in rejected.items()}
+    return links, (pairs - before_pairs, delta)
+
+
+def sharded_links(
+    names: Sequence[str],
+    descriptions: Sequence[str],
+    desc_sigs: Sequence[Sequence[int]],
+    options: ShardOptions,
+    jobs: int = 1,
+    cascade: RatioCascade | None = None,
+) -> list[Link]:
+    """Find every link of the catalog, SHARD_ROWS rows per task, in shard order.
+
+    Comparison counts from every shard are added to cascade, if given.
+    """
+    n = len(names)
+    shards = [(start, min(n, start + SHARD_ROWS)) for start in range(0, n, SHARD_ROWS)]
+    links: list[Link] = []
+
+    if jobs <= 1 or len(shards) <= 1:
+        auditor = ShardAuditor(names, descriptions, desc_sigs, options)
+        for shard in shards:
+            links.extend(auditor.links(*shard))
+        if cascade is not None:
+            cascade.add(*auditor.cascade.counts())
+        return links
+
+    initargs = (names, descriptions, desc_sigs, options)
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=initargs) as pool:
+        for shard_links, (pairs, rejected) in pool.imap(_shard_links, shards):
+            links.extend(shard_links)
+            if cascade is not None:
+                cascade.add(pairs, rejected)
+    return links
+
+
+def cluster_report(
+    entries: Sequence[Mapping[str, object]], links: Sequence[Link], measure: str = "ratio"
+) -> dict[str, Any]:
+    """Group linked entries into clusters with union-find, in a stable layout.
+
+    entries need "name" and "path"; measure names the description score
+    ("ratio" or "cosine"). Members, links and clusters are sorted by
+    path, so the report only changes when the catalog does.
+    """
+    by_root: dict[int, list[Link]] = defaultdict(list)
+    groups = clusters((i, j) for i, j, _, _ in links)
+    root = {i: group[0] for group in groups for i in group}
+    for link in links:
+        by_root[root[link[0]]].append(link)
+
+    def path(i: int) -> str:
+        return str(entries[i]["path"])
+
+    report_clusters = []
+    for group in groups:
+        members = sorted(group, key=path)
+        report_links = []
+        for i, j, kind, score in by_root[group[0]]:
+            a, b = sorted((path(i), path(j)))
+            link: dict[str, Any] = {"kind": kind, "a": a, "b": b}
+            if kind == "body":
+                link["distance"] = int(score)
+            elif kind != "exact":
+                link[measure if kind == "description" else "ratio"] = round(score, 4)
+            report_links.append(link)
+        report_links.sort(key=lambda link: (link["a"], link["b"], link["kind"]))
+        report_clusters.append(
+            {
+                "size": len(members),
+                "members": [{"name": str(entries[i]["name"]), "path": path(i)} for i in members],
+                "links": report_links,
+            }
+        )
+    report_clusters.sort(key=lambda cluster: cluster["members"][0]["path"])
+
+    kinds: dict[str, int] = defaultdict(int)
+    for _, _, kind, _ in links:
+        kinds[kind] += 1
+    return {
+        "commands": len(entries),
+        "links": dict(sorted(kinds.items())),
+        "clusters": report_clusters,
+    }
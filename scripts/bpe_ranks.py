@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""bpe_ranks.py - Offline BPE rank tables for count-tokens.py.
+
+Usage:
+    python3 scripts/bpe_ranks.py convert <cl100k_base.tiktoken> <cl100k_base.bpe>
+
+tiktoken.get_encoding() downloads its rank file on first use and then
+re-parses ~100k base64 lines on every start. This module lets
+count-tokens.py build the cl100k_base encoding from a local file
+instead, never touching the network:
+
+- ``.tiktoken`` files (the upstream base64 format) are parsed directly.
+- ``.bpe`` files are a compact binary table produced by ``convert``
+  and memory-mapped at load time, so no decoding is needed.
+
+Binary layout (all integers little-endian uint32):
+    magic (8 bytes) | count | offsets[count + 1] | ranks[count] | token bytes
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any
+
+MAGIC = b"PXBPE\x00\x01\x00"
+_HEADER = struct.Struct("<8sI")
+
+# cl100k_base split pattern and special tokens, as defined by tiktoken
+CL100K_PAT_STR = (
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}"""
+    r"""| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+CL100K_SPECIAL_TOKENS = {
+    "<|endoftext|>": 100257,
+    "<|fim_prefix|>": 100258,
+    "<|fim_middle|>": 100259,
+    "<|fim_suffix|>": 100260,
+    "<|endofprompt|>": 100276,
+}
+
+
+def parse_tiktoken_file(path: Path) -> dict[bytes, int]:
+    """Parse an upstream ``.tiktoken`` file (base64 token, rank per line)."""
+    ranks: dict[bytes, int] = {}
+    for line in path.read_bytes().splitlines():
+        if not line:
+            continue
+        token, rank = line.split()
+        ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+def write_binary_table(ranks: dict[bytes, int], dest: Path) -> None:
+    """Write ranks in the memory-mappable binary layout."""
+    items = sorted(ranks.items(), key=lambda item: item[1])
+    offsets = array("I", [0])
+    rank_values = array("I")
+    blob = bytearray()
+    for token, rank in items:
+        blob += token
+        offsets.append(len(blob))
+        rank_values.append(rank)
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        rank_values.byteswap()
+
+    with dest.open("wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(items)))
+        fh.write(offsets.tobytes())
+        fh.write(rank_values.tobytes())
+        fh.write(blob)
+
+
+def read_binary_table(path: Path) -> dict[bytes, int]:
+    """Load a binary rank table via mmap."""
+    with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary BPE rank table: {path}")
+
+        start = _HEADER.size
+        offsets = array("I")
+        offsets.frombytes(mm[start : start + 4 * (count + 1)])
+        start += 4 * (count + 1)
+        rank_values = array("I")
+        rank_values.frombytes(mm[start : start + 4 * count])
+        start += 4 * count
+        blob = mm[start : start + offsets[-1]]
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        rank_values.byteswap()
+
+    tokens = map(blob.__getitem__, map(slice, offsets[:-1], offsets[1:]))
+    return dict(zip(tokens, rank_values, strict=True))
+
+
+def load_ranks(path: Path) -> dict[bytes, int]:
+    """Load ranks from a ``.bpe`` binary table or a ``.tiktoken`` file."""
+    with path.open("rb") as fh:
+        is_binary = fh.read(len(MAGIC)) == MAGIC
+    return read_binary_table(path) if is_binary else parse_tiktoken_file(path)
+
+
+def load_encoding(path: Path) -> Any:
+    """Build the cl100k_base tiktoken Encoding from a local rank file."""
+    import tiktoken  # type: ignore[import-untyped]
+
+    return tiktoken.Encoding(
+        name="cl100k_base",
+        pat_str=CL100K_PAT_STR,
+        mergeable_ranks=load_ranks(path),
+        special_tokens=CL100K_SPECIAL_TOKENS,
+    )
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Manage offline BPE rank tables")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="Convert a .tiktoken file to a binary .bpe table")
+    convert.add_argument("source", type=Path, help="Upstream .tiktoken rank file")
+    convert.add_argument("dest", type=Path, help="Output .bpe file")
+
+    args = parser.parse_args()
+
+    if not args.source.is_file():
+        print(f"Error: File not found: {args.source}", file=sys.stderr)
+        return 1
+
+    ranks = load_ranks(args.source)
+    args.dest.parent.mkdir(parents=True, exist_ok=True)
+    write_binary_table(ranks, args.dest)
+    print(f"Wrote {len(ranks):,} ranks to {args.dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,524 @@
+"""catalog_index.py - Persistent, incremental sketch index of a command catalog.
+
+check-duplicates.py used to re-glob the catalog and re-read and re-parse
+every command on each call. CatalogIndex keeps one row per command file
+(name, normalized name, description, MinHash sketches of both, body
+hash and SimHash (see simhash.py), mtime, size and content hash) plus a
+band table holding the LSH bucket keys of both sketches and one key per
+description word, in the shared cache database (see content_cache.py).
+
+refresh() stats every file and only re-reads files whose mtime or size
+changed; a file whose content hash is unchanged keeps its sketches.
+Deleted files are dropped. Candidate lookups are indexed SQL queries on
+the band table, so a query costs milliseconds regardless of catalog size.
+
+Each refresh also records when its catalog was last used and drops
+other catalogs whose directory is gone or that have not been refreshed
+for MAX_CATALOG_AGE, then the least recently used ones until at most
+MAX_INDEXED_FILES commands are indexed across catalogs, so checks run
+on temporary directories do not accumulate in the database.
+
+If the database cannot be opened the index lives in memory for the run,
+the same way ContentCache degrades to no cache.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import time
+from array import array
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from difflib import SequenceMatcher
+from functools import cache
+from pathlib import Path
+from typing import TypedDict
+
+from content_cache import CACHE_DB_NAME, content_hash, default_cache_dir
+from simhash import body_hash, body_words, from_signed, simhash, to_signed
+
+# (bands, rows) per field. A pair becomes a candidate when all rows of any
+# band agree, so with Jaccard similarity s the chance is 1 - (1 - s^r)^b.
+# One changed letter in a 7-letter name (the shortest edit that still
+# reaches a 0.85 ratio) leaves bigram similarity 0.6: names (b=24, r=4)
+# catch that with p=0.97 and descriptions (b=32, r=4) with p=0.99, while
+# unrelated items rarely share a bucket.
+NAME_LSH = (24, 4)
+DESCRIPTION_LSH = (32, 4)
+
+# Bumped when shingling or hashing changes, so stale sketches are rebuilt
+SKETCH_VERSION = 4
+
+# Other catalogs are dropped after this many seconds without a refresh
+MAX_CATALOG_AGE = 30 * 24 * 3600
+# Bound on indexed commands across catalogs (least recently used dropped first)
+MAX_INDEXED_FILES = 100000
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE), _rng.randrange(_MERSENNE))
+    for _ in range(max(b * r for b, r in (NAME_LSH, DESCRIPTION_LSH)))
+]
+_STOPWORDS = frozenset(
+    ("a", "an", "and", "as", "at", "by", "for", "from", "in", "into", "of", "on", "or",
+     "the", "to", "with")
+)
+
+
+class CatalogEntry(TypedDict):
+    """One indexed command."""
+
+    path: Path
+    name: str
+    normalized: str
+    description: str
+    name_sig: list[int]
+    desc_sig: list[int]
+    body_hash: str
+    body_simhash: int | None
+
+
+def normalize_name(name: str) -> str:
+    """Strip common prefixes and hyphens, lowercase."""
+    n = name.lower()
+    for prefix in ("platxa-", "odoo-"):
+        if n.startswith(prefix):
+            n = n[len(prefix):]
+    return n.replace("-", "")
+
+
+def name_shingles(name: str) -> set[str]:
+    """Character bigrams of the normalized name, padded at both ends."""
+    padded = f"^{normalize_name(name)}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def description_words(description: str) -> list[str]:
+    """Lowercased description words in order, without stopwords."""
+    words = re.findall(r"[a-z0-9]+", description.lower())
+    return [w for w in words if w not in _STOPWORDS]
+
+
+def description_shingles(description: str) -> set[str]:
+    """Lowercased description words, without stopwords."""
+    return set(description_words(description))
+
+
+@cache
+def _shingle_hashes(shingle: str, num_perm: int) -> tuple[int, ...]:
+    """Every permutation of one shingle's hash (shingles recur across items)."""
+    h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+    return tuple((a * h + b) % _MERSENNE for a, b in _PERMUTATIONS[:num_perm])
+
+
+def minhash(shingles: set[str], num_perm: int) -> list[int]:
+    """MinHash signature: the minimum of each hash permutation over shingles.
+
+    An empty shingle set has an empty signature and never matches.
+    """
+    vectors = [_shingle_hashes(s, num_perm) for s in shingles]
+    if len(vectors) <= 1:
+        return list(vectors[0]) if vectors else []
+    return list(map(min, *vectors))
+
+
+def band_keys(signature: Sequence[int], bands: int, rows: int) -> list[int]:
+    """Return one signed 64-bit bucket key per LSH band."""
+    if not signature:
+        return []
+    keys = []
+    for band in range(bands):
+        values = array("Q", signature[band * rows:(band + 1) * rows]).tobytes()
+        digest = hashlib.blake2b(values, digest_size=8, key=band.to_bytes(2, "little"))
+        keys.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return keys
+
+
+def term_keys(words: set[str]) -> list[int]:
+    """Return a signed 64-bit key per description word, for the term rows."""
+    return sorted(
+        int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), "little", signed=True)
+        for w in words
+    )
+
+
+def lsh_candidates(
+    signatures: Sequence[Sequence[int]], bands: int, rows: int
+) -> list[set[int]]:
+    """Return, per item, the indexes of items sharing at least one LSH bucket."""
+    buckets: dict[int, list[int]] = defaultdict(list)
+    for index, signature in enumerate(signatures):
+        for key in band_keys(signature, bands, rows):
+            buckets[key].append(index)
+
+    candidates: list[set[int]] = [set() for _ in signatures]
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for index in members:
+            candidates[index].update(members)
+    for index, found in enumerate(candidates):
+        found.discard(index)
+    return candidates
+
+
+def _pack(signature: Sequence[int]) -> bytes:
+    return array("Q", signature).tobytes()
+
+
+def _unpack(blob: bytes) -> list[int]:
+    values = array("Q")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class CatalogIndex:
+    """Sketch index for the top-level *.md commands of one catalog directory."""
+
+    def __init__(
+        self,
+        catalog_dir: Path,
+        parse: Callable[[Path], tuple[str, str]],
+        cache_dir: Path | None = None,
+        persist: bool = True,
+        max_files: int = MAX_INDEXED_FILES,
+        max_age: float = MAX_CATALOG_AGE,
+    ) -> None:
+        self.catalog = str(catalog_dir.resolve())
+        self.catalog_dir = catalog_dir
+        self.max_files = max_files
+        self.max_age = max_age
+        self._parse = parse
+        self.stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "evicted": 0}
+
+        conn = None
+        if persist:
+            directory = cache_dir if cache_dir is not None else default_cache_dir()
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(directory / CACHE_DB_NAME), timeout=10)
+                self._create_tables(conn)
+            except (OSError, sqlite3.Error):
+                conn = None
+        self._conn = conn if conn is not None else self._memory_db()
+
+    def _memory_db(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:")
+        self._create_tables(conn)
+        return conn
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection) -> None:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(catalog_files)")}
+        if columns and "body_simhash" not in columns:
+            # Written by an older version: it is only a cache, so rebuild it
+            conn.execute("DROP TABLE catalog_files")
+            conn.execute("DROP TABLE IF EXISTS catalog_bands")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_files ("
+            " catalog TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " name TEXT NOT NULL,"
+            " normalized TEXT NOT NULL,"
+            " description TEXT NOT NULL,"
+            " name_sig BLOB NOT NULL,"
+            " desc_sig BLOB NOT NULL,"
+            " body_hash TEXT NOT NULL,"
+            " body_simhash INTEGER,"
+            " PRIMARY KEY (catalog, path))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_bands ("
+            " catalog TEXT NOT NULL,"
+            " field TEXT NOT NULL,"
+            " band_key INTEGER NOT NULL,"
+            " path TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS catalog_bands_key"
+            " ON catalog_bands (catalog, field, band_key)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS catalog_bands_path ON catalog_bands (catalog, path)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS catalog_files_name ON catalog_files (catalog, name)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_use ("
+            " catalog TEXT PRIMARY KEY,"
+            " last_used REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def refresh(self) -> None:
+        """Bring the index in line with the directory, re-reading only changed files."""
+        try:
+            self._refresh()
+        except sqlite3.Error:
+            # e.g. a locked or corrupt cache database: index in memory instead
+            with contextlib.suppress(sqlite3.Error):
+                self._conn.close()
+            self._conn = self._memory_db()
+            self.stats = dict.fromkeys(self.stats, 0)
+            self._refresh()
+
+    def _refresh(self) -> None:
+        known = {
+            path: (mtime_ns, size, digest, version)
+            for path, mtime_ns, size, digest, version in self._conn.execute(
+                "SELECT path, mtime_ns, size, hash, version FROM catalog_files WHERE catalog = ?",
+                (self.catalog,),
+            )
+        }
+
+        present: set[str] = set()
+        if self.catalog_dir.is_dir():
+            with os.scandir(self.catalog) as it:
+                for entry in it:
+                    if not entry.name.endswith(".md") or not entry.is_file():
+                        continue
+                    present.add(entry.path)
+                    self._refresh_file(entry.path, entry.stat(), known.get(entry.path))
+
+        removed = [path for path in known if path not in present]
+        for path in removed:
+            self._delete(path)
+        self.stats["removed"] = len(removed)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO catalog_use VALUES (?, ?)", (self.catalog, time.time())
+        )
+        self.stats["evicted"] = self._evict()
+        self._conn.commit()
+        if self.stats["evicted"]:
+            self._reclaim()
+
+    def _evict(self) -> int:
+        """Drop other catalogs that are gone, stale, or beyond max_files; return how many."""
+        used = dict(self._conn.execute("SELECT catalog, last_used FROM catalog_use"))
+        sizes = dict(
+            self._conn.execute("SELECT catalog, COUNT(*) FROM catalog_files GROUP BY catalog")
+        )
+        # Catalogs indexed before use was recorded count as least recently used
+        catalogs = sorted(
+            used.keys() | sizes.keys(),
+            key=lambda c: (c != self.catalog, -used.get(c, 0.0), c),
+        )
+        now = time.time()
+        total = 0
+        evicted = 0
+        for catalog in catalogs:
+            total += sizes.get(catalog, 0)
+            if catalog == self.catalog or (
+                total <= self.max_files
+                and now - used.get(catalog, 0.0) <= self.max_age
+                and Path(catalog).is_dir()
+            ):
+                continue
+            total -= sizes.get(catalog, 0)
+            for table in ("catalog_files", "catalog_bands", "catalog_use"):
+                self._conn.execute(f"DELETE FROM {table} WHERE catalog = ?", (catalog,))
+            evicted += 1
+        return evicted
+
+    def _reclaim(self) -> None:
+        """Shrink the database file once evictions have left most of it free."""
+        (free,) = self._conn.execute("PRAGMA freelist_count").fetchone()
+        (pages,) = self._conn.execute("PRAGMA page_count").fetchone()
+        if free * 2 > pages:
+            # Fails harmlessly while another process has the database open
+            with contextlib.suppress(sqlite3.Error):
+                self._conn.execute("VACUUM")
+
+    def _refresh_file(
+        self,
+        path: str,
+        stat: os.stat_result,
+        known: tuple[int, int, str, int] | None,
+    ) -> None:
+        if (
+            known is not None
+            and known[:2] == (stat.st_mtime_ns, stat.st_size)
+            and known[3] == SKETCH_VERSION
+        ):
+            self.stats["unchanged"] += 1
+            return
+
+        try:
+            data = Path(path).read_bytes()
+        except OSError:
+            return
+        digest = content_hash(data)
+        if known is not None and known[2] == digest and known[3] == SKETCH_VERSION:
+            self._conn.execute(
+                "UPDATE catalog_files SET mtime_ns = ?, size = ? WHERE catalog = ? AND path = ?",
+                (stat.st_mtime_ns, stat.st_size, self.catalog, path),
+            )
+            self.stats["unchanged"] += 1
+            return
+
+        name, description = self._parse(Path(path))
+        words = description_shingles(description)
+        name_sig = minhash(name_shingles(name), NAME_LSH[0] * NAME_LSH[1])
+        desc_sig = minhash(words, DESCRIPTION_LSH[0] * DESCRIPTION_LSH[1])
+        body = body_words(data.decode(errors="replace"))
+        body_sim = simhash(body)
+        self._delete(path)
+        self._conn.execute(
+            "INSERT INTO catalog_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.catalog, path, stat.st_mtime_ns, stat.st_size, digest, SKETCH_VERSION,
+                name, normalize_name(name), description, _pack(name_sig), _pack(desc_sig),
+                body_hash(body), None if body_sim is None else to_signed(body_sim),
+            ),
+        )
+        rows = [("name", key) for key in band_keys(name_sig, *NAME_LSH)]
+        rows += [("desc", key) for key in band_keys(desc_sig, *DESCRIPTION_LSH)]
+        rows += [("term", key) for key in term_keys(words)]
+        self._conn.executemany(
+            "INSERT INTO catalog_bands VALUES (?, ?, ?, ?)",
+            [(self.catalog, field, key, path) for field, key in rows],
+        )
+        self.stats["updated" if known is not None else "added"] += 1
+
+    def _delete(self, path: str) -> None:
+        self._conn.execute(
+            "DELETE FROM catalog_files WHERE catalog = ? AND path = ?", (self.catalog, path)
+        )
+        self._conn.execute(
+            "DELETE FROM catalog_bands WHERE catalog = ? AND path = ?", (self.catalog, path)
+        )
+
+    def entries(self, paths: Sequence[str] | None = None) -> list[CatalogEntry]:
+        """Return indexed commands (all, or only the given paths), sorted by path."""
+        query = (
+            "SELECT path, name, normalized, description, name_sig, desc_sig,"
+            " body_hash, body_simhash FROM catalog_files WHERE catalog = ?"
+        )
+        params: list[str] = [self.catalog]
+        if paths is not None:
+            if not paths:
+                return []
+            query += f" AND path IN ({','.join('?' * len(paths))})"
+            params.extend(paths)
+        rows = self._conn.execute(query + " ORDER BY path", params).fetchall()
+        return [
+            CatalogEntry(
+                path=self.catalog_dir / Path(path).name,
+                name=name,
+                normalized=normalized,
+                description=description,
+                name_sig=_unpack(name_sig),
+                desc_sig=_unpack(desc_sig),
+                body_hash=body,
+                body_simhash=None if body_sim is None else from_signed(body_sim),
+            )
+            for path, name, normalized, description, name_sig, desc_sig, body, body_sim in rows
+        ]
+
+    def __len__(self) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(*) FROM catalog_files WHERE catalog = ?", (self.catalog,)
+        ).fetchone()
+        return int(row[0])
+
+    def candidates(self, name: str, description: str) -> list[CatalogEntry]:
+        """Return indexed commands sharing an LSH bucket with the name or description."""
+        keys = [
+            ("name", key)
+            for key in band_keys(
+                minhash(name_shingles(name), NAME_LSH[0] * NAME_LSH[1]), *NAME_LSH
+            )
+        ]
+        keys += [
+            ("desc", key)
+            for key in band_keys(
+                minhash(
+                    description_shingles(description), DESCRIPTION_LSH[0] * DESCRIPTION_LSH[1]
+                ),
+                *DESCRIPTION_LSH,
+            )
+        ]
+        paths: set[str] = set()
+        for field in ("name", "desc"):
+            field_keys = [key for f, key in keys if f == field]
+            if not field_keys:
+                continue
+            paths.update(
+                path
+                for (path,) in self._conn.execute(
+                    "SELECT DISTINCT path FROM catalog_bands INDEXED BY catalog_bands_key"
+                    " WHERE catalog = ? AND field = ?"
+                    f" AND band_key IN ({','.join('?' * len(field_keys))})",
+                    [self.catalog, field, *field_keys],
+                )
+            )
+        # Exact name matches must never depend on bucket luck
+        paths.update(
+            path
+            for (path,) in self._conn.execute(
+                "SELECT path FROM catalog_files WHERE catalog = ? AND name = ?",
+                (self.catalog, name),
+            )
+        )
+        return self.entries(sorted(paths))
+
+    def query(self, description: str, top_k: int = 5) -> list[tuple[float, CatalogEntry]]:
+        """Return up to top_k commands with the most similar descriptions.
+
+        LSH candidates are ranked by SequenceMatcher ratio. If buckets yield
+        fewer than top_k, the rest are filled from the commands sharing the
+        most description words (an inverted index in the band table).
+        """
+        found = self.candidates("", description)
+        text = description.lower()
+        ranked = sorted(
+            (
+                (SequenceMatcher(None, text, e["description"].lower()).ratio(), e)
+                for e in found
+                if e["description"]
+            ),
+            key=lambda item: (-item[0], str(item[1]["path"])),
+        )[:top_k]
+
+        if len(ranked) < top_k:
+            # Too few bucket matches: take the commands sharing most words
+            keys = term_keys(description_shingles(description))
+            seen = {e["path"].name for _, e in ranked}
+            rows = []
+            if keys:
+                rows = self._conn.execute(
+                    "SELECT path, COUNT(*) AS shared"
+                    " FROM catalog_bands INDEXED BY catalog_bands_key"
+                    " WHERE catalog = ? AND field = 'term'"
+                    f" AND band_key IN ({','.join('?' * len(keys))})"
+                    " GROUP BY path ORDER BY shared DESC, path LIMIT ?",
+                    [self.catalog, *keys, top_k + len(seen)],
+                ).fetchall()
+            paths = [path for path, _ in rows if Path(path).name not in seen]
+            ranked.extend(
+                sorted(
+                    (
+                        (SequenceMatcher(None, text, e["description"].lower()).ratio(), e)
+                        for e in self.entries(paths)
+                    ),
+                    key=lambda item: (-item[0], str(item[1]["path"])),
+                )[: top_k - len(ranked)]
+            )
+        return ranked
+
+    def close(self) -> None:
+        """Commit and close the database."""
+        with contextlib.suppress(sqlite3.Error):
+            self._conn.commit()
+            self._conn.close()
@@ -2,8 +2,13 @@
 """check-duplicates.py - Detect duplicate or redundant commands.
 
 Usage:
-    python3 scripts/check-duplicates.py <command-file-or-directory>
+    python3 scripts/check-duplicates.py <command-file-or-directory>...
     python3 scripts/check-duplicates.py --audit <commands-directory>
+                                        [--exhaustive] [--bodies] [--stats]
+                                        [--jobs N] [--json]
+    python3 scripts/check-duplicates.py --query "<description>" [--top-k N] <commands-directory>
+    python3 scripts/check-duplicates.py --scopes [--project-dir DIR] <command-file-or-directory>...
+    python3 scripts/check-duplicates.py --audit --scopes <project-directory>
 
 Detection layers:
     1. Exact name match  -> ERROR (exit 1)
@@ -13,23 +18,94 @@ Detection layers:
 For directory mode (self-validation), checks SKILL.md name against skills.
 For file mode, checks command filename against existing commands.
 
+Fuzzy name checks score only names that a trigram index
+(name_index.py) cannot rule out by length or shared trigrams; the
+bounds are exact, so results match comparing every pair. Both checks
+then go through a cascade of cheaper upper bounds on ratio()
+(ratio_cascade.py) and compute ratio() only for pairs that survive;
+--stats prints how many pairs each tier rejected.
+
+With NumPy installed, --audit compares descriptions by TF-IDF cosine
+similarity instead (description_vectors.py), which also catches
+reworded duplicates; --engine difflib keeps the character comparison.
+
+--bodies adds body-level checks to --audit: commands whose bodies
+(frontmatter stripped) are identical, or whose 64-bit SimHashes differ
+in at most --body-distance bits (simhash.py), are reported as clusters.
+
+Audit mode on catalogs of LSH_MIN_COMMANDS or more uses MinHash/LSH
+candidate generation on description words so only likely pairs reach
+SequenceMatcher, with the same thresholds. LSH trades a small, measured
+recall loss for sub-quadratic time (see
+benchmarks/bench_check_duplicates.py); --exhaustive compares every
+description pair. Checks of single commands always compare against
+every catalog entry.
+
+Command catalogs are read through a persistent index (catalog_index.py)
+that re-reads only files changed since the last run. Several new
+commands can be checked in one call against one refreshed index, and
+--query returns the --top-k commands closest to a description.
+--no-index keeps the index in memory for the run.
+
+--jobs N shards the audit's comparisons over N processes
+(audit_shards.py) and merges the matches into duplicate clusters with
+union-find instead of printing each pair; --json prints the clusters as
+a deterministic JSON report for scheduled runs.
+
+--scopes compares against every install scope at once (project
+commands/ and .claude/, ~/.claude/, and plugin catalogs) through
+command_registry.py. A name already taken in the project or user scope
+is an error; a plugin command that loses its plain /name but stays
+reachable as /ns:name is a warning.
+
 Exit codes: 0 = no duplicates, 1 = exact duplicate found
 """
 
 from __future__ import annotations
 
 import argparse
-import re
+import json
 import sys
-from difflib import SequenceMatcher
+from collections import defaultdict
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TextIO
+
+from audit_shards import Link, ShardOptions, cluster_report, sharded_links
+from catalog_index import (
+    DESCRIPTION_LSH,
+    CatalogEntry,
+    CatalogIndex,
+    lsh_candidates,
+    normalize_name,
+)
+from command_registry import SCOPES, CommandRegistry, RegistryEntry
+from description_vectors import NUMPY_AVAILABLE, DescriptionVectors
+from frontmatter import frontmatter_fields, read_frontmatter
+from name_index import NameIndex
+from ratio_cascade import RatioCascade
+from simhash import DISTANCE_LIMIT, MAX_DISTANCE, body_hash, clusters, near_duplicate_pairs
+
+# Catalogs smaller than this are audited pair by pair
+LSH_MIN_COMMANDS = 200
+
+# Fuzzy name threshold (SequenceMatcher ratio of normalized names)
+NAME_THRESHOLD = 0.85
+
+# Default thresholds: SequenceMatcher ratio for difflib, cosine for TF-IDF
+DIFFLIB_THRESHOLD = 0.80
+TFIDF_THRESHOLD = 0.75
+
+# Shared by every similarity check in this run; --stats prints its counts
+COMPARISONS = RatioCascade()
 
 
 def parse_command_frontmatter(command_path: Path) -> tuple[str, str]:
     """Extract name and description from a command .md file.
 
     For command files, name is derived from filename.
-    Description is extracted from frontmatter if present.
+    Description is extracted from frontmatter if present; only the head
+    of the file is read.
 
     Returns:
         (name, description) tuple.
@@ -37,46 +113,26 @@ def parse_command_frontmatter(command_path: Path) -> tuple[str, str]:
     name = command_path.stem  # filename without .md
 
     try:
-        text = command_path.read_text()
+        frontmatter, _ = read_frontmatter(command_path)
     except OSError:
         return name, ""
-
-    # Extract description from frontmatter if present
-    match = re.match(r"^---\s*\n(.*?)\n---", text, re.DOTALL)
-    if not match:
+    if frontmatter is None:
         return name, ""
 
-    fm = match.group(1)
-    description = ""
-    for line in fm.splitlines():
-        if line.startswith("description:"):
-            description = line.split(":", 1)[1].strip()
-            break
-
-    return name, description
+    return name, frontmatter_fields(frontmatter).get("description", "")
 
 
 def parse_skill_frontmatter(skill_md: Path) -> tuple[str, str]:
     """Extract name and description from SKILL.md frontmatter."""
     try:
-        text = skill_md.read_text()
+        frontmatter, _ = read_frontmatter(skill_md)
     except OSError:
         return "", ""
-
-    match = re.match(r"^---\s*\n(.*?)\n---", text, re.DOTALL)
-    if not match:
+    if frontmatter is None:
         return "", ""
 
-    fm = match.group(1)
-    name = ""
-    description = ""
-    for line in fm.splitlines():
-        if line.startswith("name:"):
-            name = line.split(":", 1)[1].strip()
-        elif line.startswith("description:"):
-            description = line.split(":", 1)[1].strip()
-
-    return name, description
+    fields = frontmatter_fields(frontmatter)
+    return fields.get("name", ""), fields.get("description", "")
 
 
 def collect_commands(
@@ -116,15 +172,6 @@ def collect_skills(
     return skills
 
 
-def normalize_name(name: str) -> str:
-    """Strip common prefixes and hyphens, lowercase."""
-    n = name.lower()
-    for prefix in ("platxa-", "odoo-"):
-        if n.startswith(prefix):
-            n = n[len(prefix):]
-    return n.replace("-", "")
-
-
 def check_exact_name(
     target_name: str, items: list[tuple[str, str, Path]]
 ) -> list[tuple[str, Path]]:
@@ -132,55 +179,61 @@ def check_exact_name(
     return [(n, p) for n, _, p in items if n == target_name]
 
 
+def build_name_index(items: list[tuple[str, str, Path]]) -> NameIndex:
+    """Index the normalized names of items, by position."""
+    return NameIndex(normalize_name(name) for name, _, _ in items)
+
+
 def check_fuzzy_name(
     target_name: str,
     items: list[tuple[str, str, Path]],
-    threshold: float = 0.85,
+    threshold: float = NAME_THRESHOLD,
+    index: NameIndex | None = None,
 ) -> list[tuple[str, Path, float]]:
-    """Return items with fuzzy name match above threshold."""
+    """Return items with fuzzy name match above threshold.
+
+    Only names the index cannot rule out by length or shared trigrams are
+    scored; pass an index built over items to reuse it across targets.
+    """
+    if index is None:
+        index = build_name_index(items)
     norm_target = normalize_name(target_name)
     matches: list[tuple[str, Path, float]] = []
-    for name, _, path in items:
+    for i in index.lookup(norm_target, threshold):
+        name, _, path = items[i]
         if name == target_name:
             continue
-        norm = normalize_name(name)
-        ratio = SequenceMatcher(None, norm_target, norm).ratio()
-        if ratio >= threshold:
+        ratio = COMPARISONS.ratio(norm_target, index.normalized[i], threshold)
+        if ratio is not None:
             matches.append((name, path, ratio))
     return matches
 
 
 def check_description_similarity(
     target_desc: str,
-    items: list[tuple[str, str, Path]],
-    threshold: float = 0.80,
+    items: Iterable[tuple[str, str, Path]],
+    threshold: float = DIFFLIB_THRESHOLD,
 ) -> list[tuple[str, Path, float]]:
     """Return items with similar descriptions above threshold."""
     if not target_desc:
         return []
+    target = target_desc.lower()
     matches: list[tuple[str, Path, float]] = []
     for name, desc, path in items:
         if not desc:
             continue
-        ratio = SequenceMatcher(None, target_desc.lower(), desc.lower()).ratio()
-        if ratio >= threshold:
+        ratio = COMPARISONS.ratio(target, desc.lower(), threshold)
+        if ratio is not None:
             matches.append((name, path, ratio))
     return matches
 
 
-def check_item(
+def report_similar(
     target_name: str,
     target_desc: str,
     items: list[tuple[str, str, Path]],
-) -> int:
-    """Check a single item against a collection. Returns exit code."""
-    has_error = False
-
-    exact = check_exact_name(target_name, items)
-    for name, path in exact:
-        print(f"ERROR: Exact duplicate name '{name}' in {path}", file=sys.stderr)
-        has_error = True
-
+) -> None:
+    """Print warnings for items with a similar name or description."""
     fuzzy = check_fuzzy_name(target_name, items)
     for name, path, ratio in fuzzy:
         print(
@@ -195,6 +248,80 @@ def check_item(
             file=sys.stderr,
         )
 
+
+def check_item(
+    target_name: str,
+    target_desc: str,
+    items: list[tuple[str, str, Path]],
+) -> int:
+    """Check a single item against a collection. Returns exit code."""
+    has_error = False
+
+    exact = check_exact_name(target_name, items)
+    for name, path in exact:
+        print(f"ERROR: Exact duplicate name '{name}' in {path}", file=sys.stderr)
+        has_error = True
+
+    report_similar(target_name, target_desc, items)
+
+    if has_error:
+        return 1
+
+    print(f"No duplicates found for '{target_name}'")
+    return 0
+
+
+def registry_items(
+    entries: list[RegistryEntry], skip_path: Path | None = None
+) -> list[tuple[str, str, Path]]:
+    """Return (name, description, path) of registry entries, names unqualified."""
+    skip = skip_path.resolve() if skip_path else None
+    items: list[tuple[str, str, Path]] = []
+    for entry in entries:
+        if skip is not None and entry["path"].resolve() == skip:
+            continue
+        if entry["kind"] == "skill":
+            _, desc = parse_skill_frontmatter(entry["path"] / "SKILL.md")
+        else:
+            _, desc = parse_command_frontmatter(entry["path"])
+        items.append((entry["name"], desc, entry["path"]))
+    return items
+
+
+def check_scoped_item(
+    target_name: str,
+    target_desc: str,
+    target_path: Path,
+    entries: list[RegistryEntry],
+) -> int:
+    """Check an item against registry entries of every scope. Returns exit code.
+
+    A same-named project or user entry is an error: only one of the two
+    can be invoked. A same-named plugin entry is a warning, since it
+    stays reachable as /ns:name.
+    """
+    has_error = False
+    items = registry_items(entries, skip_path=target_path)
+    skip = target_path.resolve()
+    for entry in entries:
+        if entry["name"] != target_name or entry["path"].resolve() == skip:
+            continue
+        if entry["scope"] == "plugin":
+            print(
+                f"WARNING: Name '/{target_name}' shadows plugin {entry['kind']} "
+                f"'/{entry['namespace']}:{entry['name']}' in {entry['path']}",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                f"ERROR: Exact duplicate name '{target_name}' in {entry['path']} "
+                f"({entry['scope']} scope)",
+                file=sys.stderr,
+            )
+            has_error = True
+
+    report_similar(target_name, target_desc, items)
+
     if has_error:
         return 1
 
@@ -202,8 +329,43 @@ def check_item(
     return 0
 
 
-def check_path(target_path: Path, catalog: Path | None = None) -> int:
-    """Check a file or directory against catalog. Returns exit code."""
+def open_index(
+    catalog_dir: Path, cache_dir: Path | None = None, use_index: bool = True
+) -> CatalogIndex:
+    """Open and refresh the command index for a catalog directory."""
+    index = CatalogIndex(catalog_dir, parse_command_frontmatter, cache_dir, persist=use_index)
+    index.refresh()
+    return index
+
+
+def indexed_items(
+    index: CatalogIndex, skip_path: Path | None = None
+) -> list[tuple[str, str, Path]]:
+    """Return (name, description, path) of every catalog command.
+
+    Checks compare against all of them: the name index and ratio cascade
+    prune exactly, so a check never misses a match. LSH candidates,
+    which can, are only used by audits and --query.
+    """
+    skip = skip_path.resolve() if skip_path else None
+    return [
+        (e["name"], e["description"], e["path"])
+        for e in index.entries()
+        if skip is None or e["path"].resolve() != skip
+    ]
+
+
+def check_path(
+    target_path: Path,
+    catalog: Path | None = None,
+    index: CatalogIndex | None = None,
+    registry: CommandRegistry | None = None,
+) -> int:
+    """Check a file or directory against catalog. Returns exit code.
+
+    With a registry, the target is compared against the skills or
+    commands of every install scope instead of one catalog directory.
+    """
     if target_path.is_dir():
         # Directory mode: check SKILL.md
         skill_md = target_path / "SKILL.md"
@@ -216,6 +378,10 @@ def check_path(target_path: Path, catalog: Path | None = None) -> int:
             print("ERROR: No name in frontmatter", file=sys.stderr)
             return 1
 
+        if registry is not None:
+            return check_scoped_item(
+                target_name, target_desc, target_path, registry.of_kind("skill")
+            )
         if catalog is None:
             catalog = target_path.parent
 
@@ -226,33 +392,261 @@ def check_path(target_path: Path, catalog: Path | None = None) -> int:
         # File mode: check command .md file
         target_name, target_desc = parse_command_frontmatter(target_path)
 
+        if registry is not None:
+            return check_scoped_item(
+                target_name, target_desc, target_path, registry.of_kind("command")
+            )
         if catalog is None:
             catalog = target_path.parent
+        if index is None:
+            index = open_index(catalog, use_index=False)
 
-        items = collect_commands(catalog, skip_path=target_path)
+        items = indexed_items(index, skip_path=target_path)
         return check_item(target_name, target_desc, items)
 
 
-def audit_catalog(catalog_dir: Path) -> int:
-    """Check all commands in directory against each other. Returns exit code."""
+def check_paths(
+    targets: list[Path],
+    catalog: Path | None = None,
+    cache_dir: Path | None = None,
+    use_index: bool = True,
+    registry: CommandRegistry | None = None,
+) -> int:
+    """Check several targets, refreshing each catalog's index once. Returns exit code."""
+    if registry is not None:
+        return max(check_path(target, registry=registry) for target in targets)
+
+    indexes: dict[Path, CatalogIndex] = {}
+    exit_code = 0
+    try:
+        for target in targets:
+            index = None
+            if not target.is_dir():
+                target_catalog = catalog if catalog is not None else target.parent
+                key = target_catalog.resolve()
+                if key not in indexes:
+                    indexes[key] = open_index(target_catalog, cache_dir, use_index)
+                index = indexes[key]
+            exit_code = max(exit_code, check_path(target, catalog, index))
+    finally:
+        for index in indexes.values():
+            index.close()
+    return exit_code
+
+
+def query_catalog(
+    catalogs: list[Path],
+    description: str,
+    top_k: int = 5,
+    cache_dir: Path | None = None,
+    use_index: bool = True,
+) -> int:
+    """Print the top_k commands whose descriptions are closest. Returns exit code."""
+    results = []
+    for catalog_dir in catalogs:
+        if not catalog_dir.is_dir():
+            print(f"ERROR: Not a directory: {catalog_dir}", file=sys.stderr)
+            return 1
+        index = open_index(catalog_dir, cache_dir, use_index)
+        try:
+            results.extend(index.query(description, top_k))
+        finally:
+            index.close()
+
+    results.sort(key=lambda item: (-item[0], str(item[1]["path"])))
+    if not results:
+        print("No commands found")
+    for ratio, entry in results[:top_k]:
+        print(f"{ratio:.2f}  {entry['name']}  {entry['path']}")
+    return 0
+
+
+def resolve_engine(engine: str) -> str:
+    """Return the description engine to use: "tfidf" or "difflib"."""
+    if engine == "auto":
+        return "tfidf" if NUMPY_AVAILABLE else "difflib"
+    if engine == "tfidf" and not NUMPY_AVAILABLE:
+        print("WARNING: NumPy not installed, using difflib for descriptions", file=sys.stderr)
+        return "difflib"
+    return engine
+
+
+def body_groups(entries: list[CatalogEntry]) -> dict[str, list[int]]:
+    """Group entry positions by body hash, leaving out empty bodies."""
+    empty = body_hash([])
+    by_hash: dict[str, list[int]] = defaultdict(list)
+    for i, entry in enumerate(entries):
+        if entry["body_hash"] != empty:
+            by_hash[entry["body_hash"]].append(i)
+    return by_hash
+
+
+def body_links(entries: list[CatalogEntry], max_distance: int = MAX_DISTANCE) -> list[Link]:
+    """Links between identical bodies (distance 0) and SimHash near-duplicates."""
+    by_hash = body_groups(entries)
+    links: list[Link] = [
+        (group[0], i, "body", 0) for group in by_hash.values() for i in group[1:]
+    ]
+    representatives = [group[0] for group in by_hash.values()]
+    for a, b, distance in near_duplicate_pairs(
+        [entries[i]["body_simhash"] for i in representatives], max_distance
+    ):
+        i, j = sorted((representatives[a], representatives[b]))
+        links.append((i, j, "body", distance))
+    return links
+
+
+def audit_bodies(entries: list[CatalogEntry], max_distance: int = MAX_DISTANCE) -> None:
+    """Print clusters of identical and near-duplicate command bodies.
+
+    Identical bodies are grouped by hash; SimHash near-duplicates are
+    searched among one representative per distinct body, and linked
+    representatives are clustered with all their identical copies.
+    """
+    by_hash = body_groups(entries)
+
+    for group in by_hash.values():
+        if len(group) > 1:
+            paths = ", ".join(str(entries[i]["path"]) for i in group)
+            print(
+                f"WARNING: Identical bodies ({len(group)} commands): {paths}",
+                file=sys.stderr,
+            )
+
+    representatives = [group[0] for group in by_hash.values()]
+    pairs = near_duplicate_pairs(
+        [entries[i]["body_simhash"] for i in representatives], max_distance
+    )
+    farthest: dict[int, int] = defaultdict(int)
+    for a, b, distance in pairs:
+        farthest[a] = max(farthest[a], distance)
+        farthest[b] = max(farthest[b], distance)
+    for cluster in clusters((a, b) for a, b, _ in pairs):
+        members = sorted(
+            i for r in cluster for i in by_hash[entries[representatives[r]]["body_hash"]]
+        )
+        paths = ", ".join(str(entries[i]["path"]) for i in members)
+        distance = max(farthest[r] for r in cluster)
+        print(
+            f"WARNING: Near-duplicate bodies ({len(members)} commands, "
+            f"SimHash within {distance} bits): {paths}",
+            file=sys.stderr,
+        )
+
+
+def audit_catalog(
+    catalog_dir: Path,
+    exhaustive: bool = False,
+    cache_dir: Path | None = None,
+    use_index: bool = True,
+    engine: str = "auto",
+    description_threshold: float | None = None,
+    bodies: bool = False,
+    body_distance: int = MAX_DISTANCE,
+    jobs: int | None = None,
+    json_output: bool = False,
+) -> int:
+    """Check all commands in directory against each other. Returns exit code.
+
+    Exact duplicates are grouped by name in one pass and fuzzy names are
+    looked up in one name index. With the tfidf engine, description
+    pairs come from one blocked TF-IDF cosine pass over the catalog.
+    With difflib, description checks run only on LSH candidate pairs
+    unless the catalog is small or exhaustive is set; sketches come from
+    the catalog index.
+    """
     if not catalog_dir.is_dir():
         print(f"ERROR: Not a directory: {catalog_dir}", file=sys.stderr)
         return 1
 
-    all_items = collect_commands(catalog_dir)
+    index = open_index(catalog_dir, cache_dir, use_index)
+    try:
+        entries = index.entries()
+        stats = index.stats
+    finally:
+        index.close()
+    print_index_stats([stats], sys.stderr if json_output else sys.stdout)
+    if jobs is not None or json_output:
+        return audit_clusters(
+            entries,
+            jobs=jobs or 1,
+            json_output=json_output,
+            exhaustive=exhaustive,
+            engine=engine,
+            description_threshold=description_threshold,
+            bodies=bodies,
+            body_distance=body_distance,
+        )
+    return audit_entries(
+        entries,
+        exhaustive=exhaustive,
+        engine=engine,
+        description_threshold=description_threshold,
+        bodies=bodies,
+        body_distance=body_distance,
+    )
+
+
+def print_index_stats(stats: list[dict[str, int]], file: TextIO = sys.stdout) -> None:
+    """Print the summed refresh counts of one or more catalog indexes."""
+    keys = ("added", "updated", "removed", "unchanged")
+    total = {key: sum(s[key] for s in stats) for key in keys}
+    print(
+        f"Index: {total['added']} added, {total['updated']} updated, "
+        f"{total['removed']} removed, {total['unchanged']} unchanged",
+        file=file,
+    )
+
+
+def audit_entries(
+    entries: list[CatalogEntry],
+    exhaustive: bool = False,
+    engine: str = "auto",
+    description_threshold: float | None = None,
+    bodies: bool = False,
+    body_distance: int = MAX_DISTANCE,
+    exact_names: bool = True,
+) -> int:
+    """Check catalog entries against each other. Returns exit code.
+
+    exact_names=False leaves same-named entries to the caller (scoped
+    audits report them as registry shadowing instead).
+    """
+    engine = resolve_engine(engine)
+    all_items = [(e["name"], e["description"], e["path"]) for e in entries]
     if not all_items:
-        print("No commands found in directory")
+        print("No commands found")
         return 0
 
     has_error = False
     seen_pairs: set[tuple[str, ...]] = set()
 
+    by_name: dict[str, list[int]] = defaultdict(list)
+    if exact_names:
+        for i, (name, _, _) in enumerate(all_items):
+            by_name[name].append(i)
+
+    name_index = build_name_index(all_items)
+    desc_candidates: list[set[int]] | None = None
+    # i -> [(j, cosine)] for description pairs found by TF-IDF, j > i
+    desc_pairs: dict[int, list[tuple[int, float]]] | None = None
+    if engine == "tfidf":
+        threshold = TFIDF_THRESHOLD if description_threshold is None else description_threshold
+        vectors = DescriptionVectors([desc for _, desc, _ in all_items])
+        desc_pairs = defaultdict(list)
+        for i, j, cosine in vectors.similar_pairs(threshold):
+            desc_pairs[i].append((j, cosine))
+    elif not exhaustive and len(all_items) >= LSH_MIN_COMMANDS:
+        desc_candidates = lsh_candidates([e["desc_sig"] for e in entries], *DESCRIPTION_LSH)
+    if description_threshold is None:
+        description_threshold = DIFFLIB_THRESHOLD
     for i, (name_a, desc_a, path_a) in enumerate(all_items):
-        others = all_items[:i] + all_items[i + 1:]
-
-        for name_b, _, path_b in others:
-            pair = tuple(sorted([name_a, name_b]))
-            if name_a == name_b and pair not in seen_pairs:
+        for j in by_name.get(name_a, ()):
+            if j == i:
+                continue
+            path_b = all_items[j][2]
+            pair = (name_a, name_a)
+            if pair not in seen_pairs:
                 seen_pairs.add(pair)
                 print(
                     f"ERROR: Duplicate name '{name_a}': {path_a} and {path_b}",
@@ -260,7 +654,8 @@ def audit_catalog(catalog_dir: Path) -> int:
                 )
                 has_error = True
 
-        for name_b, path_b, ratio in check_fuzzy_name(name_a, others):
+        # The index includes item i itself, skipped as an identical name
+        for name_b, path_b, ratio in check_fuzzy_name(name_a, all_items, index=name_index):
             pair = tuple(sorted([name_a, name_b]))
             if pair not in seen_pairs:
                 seen_pairs.add(pair)
@@ -270,8 +665,26 @@ def audit_catalog(catalog_dir: Path) -> int:
                     file=sys.stderr,
                 )
 
-        if desc_a:
-            for name_b, path_b, ratio in check_description_similarity(desc_a, others):
+        if desc_pairs is not None:
+            for j, cosine in desc_pairs.get(i, []):
+                name_b, _, path_b = all_items[j]
+                pair = tuple(sorted([name_a, name_b]))
+                if pair not in seen_pairs:
+                    seen_pairs.add(pair)
+                    print(
+                        f"WARNING: Similar descriptions '{name_a}' <-> '{name_b}' "
+                        f"(cosine={cosine:.2f}): {path_a} and {path_b}",
+                        file=sys.stderr,
+                    )
+        elif desc_a:
+            # Iterated in place: copying all_items per row is quadratic
+            if desc_candidates is None:
+                others = (item for j, item in enumerate(all_items) if j != i)
+            else:
+                others = (all_items[j] for j in sorted(desc_candidates[i]))
+            for name_b, path_b, ratio in check_description_similarity(
+                desc_a, others, description_threshold
+            ):
                 pair = tuple(sorted([name_a, name_b]))
                 if pair not in seen_pairs:
                     seen_pairs.add(pair)
@@ -281,6 +694,9 @@ def audit_catalog(catalog_dir: Path) -> int:
                         file=sys.stderr,
                     )
 
+    if bodies:
+        audit_bodies(entries, body_distance)
+
     if has_error:
         return 1
 
@@ -288,13 +704,175 @@ def audit_catalog(catalog_dir: Path) -> int:
     return 0
 
 
+def audit_clusters(
+    entries: list[CatalogEntry],
+    jobs: int = 1,
+    json_output: bool = False,
+    exhaustive: bool = False,
+    engine: str = "auto",
+    description_threshold: float | None = None,
+    bodies: bool = False,
+    body_distance: int = MAX_DISTANCE,
+    exact_names: bool = True,
+) -> int:
+    """Sharded audit over a process pool, reported as duplicate clusters.
+
+    Candidate pairs are split into shards of rows (audit_shards.py) and
+    the links found are merged with union-find, so memory grows with the
+    duplicates found, not the comparisons made. Prints one line per
+    cluster, or with json_output a deterministic JSON report. Returns
+    exit code: 1 if a cluster links two commands of the same name.
+    """
+    engine = resolve_engine(engine)
+    if description_threshold is None:
+        description_threshold = TFIDF_THRESHOLD if engine == "tfidf" else DIFFLIB_THRESHOLD
+    options = ShardOptions(
+        engine=engine,
+        name_threshold=NAME_THRESHOLD,
+        description_threshold=description_threshold,
+        exhaustive=exhaustive,
+        lsh=DESCRIPTION_LSH if len(entries) >= LSH_MIN_COMMANDS else None,
+        exact_names=exact_names,
+    )
+    links = sharded_links(
+        [e["name"] for e in entries],
+        [e["description"] for e in entries],
+        [e["desc_sig"] for e in entries],
+        options,
+        jobs=jobs,
+        cascade=COMPARISONS,
+    )
+    if bodies:
+        links.extend(body_links(entries, body_distance))
+    report = cluster_report(entries, links, "cosine" if engine == "tfidf" else "ratio")
+
+    has_error = "exact" in report["links"]
+    if json_output:
+        print(json.dumps(report, indent=2))
+        return 1 if has_error else 0
+
+    for cluster in report["clusters"]:
+        kinds = sorted({link["kind"] for link in cluster["links"]})
+        level = "ERROR" if "exact" in kinds else "WARNING"
+        paths = ", ".join(member["path"] for member in cluster["members"])
+        print(
+            f"{level}: Duplicate cluster ({cluster['size']} commands; "
+            f"{', '.join(kinds)}): {paths}",
+            file=sys.stderr,
+        )
+    if has_error:
+        return 1
+
+    print(
+        f"Audit complete: {len(entries)} commands checked, "
+        f"{len(report['clusters'])} duplicate clusters"
+    )
+    return 0
+
+
+def report_shadowing(registry: CommandRegistry) -> bool:
+    """Print entries that lose an invocation name to another. Returns True on error.
+
+    An entry with no name left cannot be invoked (error); a plugin entry
+    that only lost its plain /name is still reachable as /ns:name.
+    """
+    has_error = False
+    for entry in registry.shadowed():
+        for name in entry["shadowed"]:
+            winner = registry.resolve(name, entry["kind"])
+            assert winner is not None
+            if entry["invocations"]:
+                print(
+                    f"WARNING: '/{name}' resolves to {winner['path']} ({winner['scope']} scope); "
+                    f"{entry['path']} is only reachable as '/{entry['invocations'][0]}'",
+                    file=sys.stderr,
+                )
+            else:
+                print(
+                    f"ERROR: '/{name}' in {entry['path']} ({entry['scope']} scope) is "
+                    f"shadowed by {winner['path']} ({winner['scope']} scope)",
+                    file=sys.stderr,
+                )
+                has_error = True
+    return has_error
+
+
+def audit_scopes(
+    project_dir: Path,
+    exhaustive: bool = False,
+    cache_dir: Path | None = None,
+    use_index: bool = True,
+    engine: str = "auto",
+    description_threshold: float | None = None,
+    bodies: bool = False,
+    body_distance: int = MAX_DISTANCE,
+    jobs: int | None = None,
+    json_output: bool = False,
+) -> int:
+    """Audit the commands of every install scope of a project as one catalog.
+
+    Shadowed invocation names come from the registry; similar names,
+    descriptions and (with bodies=True) bodies are checked across all
+    scopes, reading each catalog directory through its index.
+    """
+    if not project_dir.is_dir():
+        print(f"ERROR: Not a directory: {project_dir}", file=sys.stderr)
+        return 1
+
+    registry = CommandRegistry(project_dir)
+    commands = registry.of_kind("command")
+    by_directory: dict[Path, set[Path]] = defaultdict(set)
+    for entry in commands:
+        by_directory[entry["path"].parent].add(entry["path"])
+
+    entries: list[CatalogEntry] = []
+    stats = []
+    for directory, paths in by_directory.items():
+        index = open_index(directory, cache_dir, use_index)
+        try:
+            entries.extend(e for e in index.entries() if e["path"] in paths)
+            stats.append(index.stats)
+        finally:
+            index.close()
+    out = sys.stderr if json_output else sys.stdout
+    print_index_stats(stats, out)
+    scopes = sorted({entry["scope"] for entry in commands}, key=SCOPES.index)
+    print(f"Scopes: {', '.join(scopes) or 'none'} ({len(commands)} commands)", file=out)
+
+    has_error = report_shadowing(registry)
+    if jobs is not None or json_output:
+        exit_code = audit_clusters(
+            entries,
+            jobs=jobs or 1,
+            json_output=json_output,
+            exhaustive=exhaustive,
+            engine=engine,
+            description_threshold=description_threshold,
+            bodies=bodies,
+            body_distance=body_distance,
+            exact_names=False,
+        )
+        return max(exit_code, int(has_error))
+    exit_code = audit_entries(
+        entries,
+        exhaustive=exhaustive,
+        engine=engine,
+        description_threshold=description_threshold,
+        bodies=bodies,
+        body_distance=body_distance,
+        exact_names=False,
+    )
+    return max(exit_code, int(has_error))
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Detect duplicate commands")
     parser.add_argument(
         "path",
         type=Path,
-        help="Command file, directory, or catalog directory with --audit",
+        nargs="+",
+        help="Command file(s), directory, or catalog directory with --audit/--query",
     )
     parser.add_argument(
         "--audit",
@@ -307,13 +885,117 @@ def main() -> int:
         default=None,
         help="Catalog directory to compare against (default: parent of target)",
     )
+    parser.add_argument(
+        "--scopes",
+        action="store_true",
+        help="Compare against the commands and skills of every install scope (project, "
+        "user, plugins) of --project-dir; with --audit, paths are project directories",
+    )
+    parser.add_argument(
+        "--project-dir",
+        type=Path,
+        default=Path("."),
+        help="Project whose install scopes --scopes reads (default: current directory)",
+    )
+    parser.add_argument(
+        "--exhaustive",
+        action="store_true",
+        help="With --audit, compare every description pair instead of LSH candidates",
+    )
+    parser.add_argument(
+        "--query",
+        default=None,
+        metavar="DESCRIPTION",
+        help="List the catalog commands closest to this description",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=5, help="Results shown for --query (default: 5)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("auto", "tfidf", "difflib"),
+        default="auto",
+        help="Description similarity in --audit: TF-IDF cosine (needs NumPy) or "
+        "difflib ratio (default: tfidf when NumPy is installed)",
+    )
+    parser.add_argument(
+        "--description-threshold",
+        type=float,
+        default=None,
+        help=f"Description similarity threshold in --audit (default: cosine {TFIDF_THRESHOLD} "
+        f"for tfidf, ratio {DIFFLIB_THRESHOLD} for difflib)",
+    )
+    parser.add_argument(
+        "--bodies",
+        action="store_true",
+        help="With --audit, also cluster identical and near-duplicate command bodies",
+    )
+    parser.add_argument(
+        "--body-distance",
+        type=int,
+        default=MAX_DISTANCE,
+        help=f"SimHash bits two bodies may differ in, 0 to {DISTANCE_LIMIT} "
+        f"(default: {MAX_DISTANCE})",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="With --audit, shard the comparisons over N processes and report "
+        "duplicate clusters instead of pairs",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="With --audit, print the duplicate clusters as a JSON report",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print how many comparisons each bound rejected before ratio()",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not read or update the on-disk catalog index",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Index directory (default: $PLATXA_CACHE_DIR or .cache/)",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_intermixed_args()
+    if not 0 <= args.body_distance <= DISTANCE_LIMIT:
+        parser.error(f"--body-distance must be 0 to {DISTANCE_LIMIT}")
+    use_index = not args.no_index
 
+    if args.query is not None:
+        return query_catalog(args.path, args.query, args.top_k, args.cache_dir, use_index)
     if args.audit:
-        return audit_catalog(args.path)
+        audit = audit_scopes if args.scopes else audit_catalog
+        exit_code = max(
+            audit(
+                path,
+                exhaustive=args.exhaustive,
+                cache_dir=args.cache_dir,
+                use_index=use_index,
+                engine=args.engine,
+                description_threshold=args.description_threshold,
+                bodies=args.bodies,
+                body_distance=args.body_distance,
+                jobs=args.jobs,
+                json_output=args.json,
+            )
+            for path in args.path
+        )
     else:
-        return check_path(args.path, catalog=args.catalog)
+        registry = CommandRegistry(args.project_dir) if args.scopes else None
+        exit_code = check_paths(args.path, args.catalog, args.cache_dir, use_index, registry)
+    if args.stats:
+        print(COMPARISONS.summary(), file=sys.stderr if args.json else sys.stdout)
+    return exit_code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""command_registry.py - Every installed command and skill, across install scopes.
+
+install-command.sh can put a command in three places, and Claude Code
+loads all of them:
+
+- project: commands/ and .claude/commands/ (skills in .claude/skills/)
+- user: ~/.claude/commands/ (skills in ~/.claude/skills/)
+- plugin: .claude/plugins/<ns>/commands/ under the project or user
+  directory, at any depth (marketplace checkouts nest plugins)
+
+Subdirectories of a commands/ directory namespace their commands
+(commands/frontend/page.md is ``/frontend:page``). Plugin commands are
+invoked as ``/ns:cmd``, and also as plain ``/cmd`` while no other
+command claims that name.
+
+CommandRegistry walks each base directory once with os.scandir, only
+descending into commands/, skills/ and plugins/ (so ~/.claude/projects
+and other state is never listed), and keeps one merged list of entries
+tagged with scope and namespace. Invocation names are then assigned in
+one pass in precedence order, project before user before plugin: the
+first entry to claim a name gets it, and later claimants record the
+name under ``shadowed``. An entry whose every name is shadowed cannot
+be invoked at all.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TypedDict
+
+# Precedence when two entries claim the same invocation name
+SCOPES = ("project", "user", "plugin")
+KINDS = ("command", "skill")
+
+_CLAUDE_DIRS = frozenset({"commands", "skills", "plugins"})
+_CATALOG_DIRS = frozenset({"commands", "skills"})
+
+
+class RegistryEntry(TypedDict):
+    """One installed command or skill."""
+
+    path: Path
+    kind: str
+    scope: str
+    namespace: str
+    name: str
+    invocations: list[str]
+    shadowed: list[str]
+
+
+def _walk(base: Path, top: frozenset[str]) -> Iterator[tuple[str, ...]]:
+    """Yield path parts, relative to base, of every file under the top dirs.
+
+    Directories are listed once each (symlinked directories are
+    followed, guarded against cycles) in sorted order; hidden entries are
+    skipped.
+    """
+    try:
+        with os.scandir(base) as it:
+            roots = sorted(e.name for e in it if e.name in top and e.is_dir())
+    except OSError:
+        return
+
+    visited: set[tuple[int, int]] = set()
+    stack: list[tuple[str, ...]] = [(name,) for name in reversed(roots)]
+    while stack:
+        parts = stack.pop()
+        directory = base.joinpath(*parts)
+        try:
+            stat = directory.stat()
+            if (stat.st_dev, stat.st_ino) in visited:
+                continue
+            visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(directory) as it:
+                children = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs: list[tuple[str, ...]] = []
+        for entry in children:
+            if entry.name.startswith("."):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                subdirs.append((*parts, entry.name))
+            else:
+                yield (*parts, entry.name)
+        stack.extend(reversed(subdirs))
+
+
+def classify(parts: tuple[str, ...]) -> tuple[str, str, str] | None:
+    """Return (kind, namespace, name) for a file below a .claude directory.
+
+    parts starts with commands, skills or plugins; files that are not a
+    command (.md under commands/) or a skill (<name>/SKILL.md under
+    skills/) return None.
+    """
+    namespace = ""
+    if parts[0] == "plugins":
+        # The plugin is the directory holding its commands/ or skills/
+        catalog = next((i for i in range(2, len(parts) - 1) if parts[i] in _CATALOG_DIRS), None)
+        if catalog is None:
+            return None
+        namespace = parts[catalog - 1]
+        parts = parts[catalog:]
+
+    if parts[0] == "commands" and len(parts) > 1 and parts[-1].endswith(".md"):
+        return "command", namespace, ":".join((*parts[1:-1], parts[-1][:-3]))
+    if parts[0] == "skills" and len(parts) == 3 and parts[2] == "SKILL.md":
+        return "skill", namespace, parts[1]
+    return None
+
+
+class CommandRegistry:
+    """Merged catalog of commands and skills from every install scope."""
+
+    def __init__(self, project_dir: Path, home: Path | None = None) -> None:
+        self.project_dir = project_dir
+        self.home = Path.home() if home is None else home
+        # (base directory, top-level dirs walked, scope of its non-plugin files)
+        bases = [
+            (project_dir, frozenset({"commands"}), "project"),
+            (project_dir / ".claude", _CLAUDE_DIRS, "project"),
+            (self.home / ".claude", _CLAUDE_DIRS, "user"),
+        ]
+
+        by_scope: dict[str, list[RegistryEntry]] = {scope: [] for scope in SCOPES}
+        seen: set[Path] = set()
+        for base, top, scope in bases:
+            for parts in _walk(base, top):
+                found = classify(parts)
+                if found is None:
+                    continue
+                kind, namespace, name = found
+                path = base.joinpath(*parts)
+                if kind == "skill":
+                    path = path.parent
+                resolved = path.resolve()
+                if resolved in seen:
+                    continue
+                seen.add(resolved)
+                entry_scope = "plugin" if namespace else scope
+                by_scope[entry_scope].append(
+                    RegistryEntry(
+                        path=path,
+                        kind=kind,
+                        scope=entry_scope,
+                        namespace=namespace,
+                        name=name,
+                        invocations=[],
+                        shadowed=[],
+                    )
+                )
+        self.entries = [entry for scope in SCOPES for entry in by_scope[scope]]
+
+        # One pass in precedence order: the first entry to claim a name keeps it
+        self._resolved: dict[tuple[str, str], RegistryEntry] = {}
+        for entry in self.entries:
+            names = [entry["name"]]
+            if entry["namespace"]:
+                names.insert(0, f"{entry['namespace']}:{entry['name']}")
+            for name in names:
+                key = (entry["kind"], name)
+                if key in self._resolved:
+                    entry["shadowed"].append(name)
+                else:
+                    self._resolved[key] = entry
+                    entry["invocations"].append(name)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def of_kind(self, kind: str) -> list[RegistryEntry]:
+        """Entries of one kind ("command" or "skill"), in precedence order."""
+        return [entry for entry in self.entries if entry["kind"] == kind]
+
+    def resolve(self, invocation: str, kind: str = "command") -> RegistryEntry | None:
+        """Return the entry an invocation name (without the slash) reaches."""
+        return self._resolved.get((kind, invocation.removeprefix("/")))
+
+    def invocation_map(self, kind: str = "command") -> dict[str, Path]:
+        """Map every reachable invocation name to its file."""
+        return {
+            name: entry["path"]
+            for (entry_kind, name), entry in self._resolved.items()
+            if entry_kind == kind
+        }
+
+    def shadowed(self) -> list[RegistryEntry]:
+        """Entries that lost at least one invocation name to another entry."""
+        return [entry for entry in self.entries if entry["shadowed"]]
@@ -0,0 +1,211 @@
+"""content_cache.py - Persistent content-addressed result cache.
+
+Shared by the validation scripts to avoid recomputing results for files
+whose content has not changed. Entries live in a single SQLite database
+and are keyed by (namespace, key), where the key is normally a content
+hash combined with whatever else determines the result (encoding name,
+rule-set version, ...).
+
+Each namespace is bounded by ``max_entries`` with least-recently-used
+eviction. Lookups only read: new entries and last-used times are held
+in memory and written in one short transaction on ``close()``, and the
+database is in WAL mode, so parallel workers sharing the cache do not
+wait on each other's locks. Any failure to open or write the database disables the cache
+silently — a cache must never turn a passing validation into a crash.
+
+Cache location (first match wins):
+    1. Explicit ``cache_dir`` argument (``--cache-dir`` on the CLIs)
+    2. ``PLATXA_CACHE_DIR`` environment variable
+    3. ``.cache/`` at the generator root
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from types import TracebackType
+
+CACHE_DB_NAME = "platxa-cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory used when none is given explicitly."""
+    env = os.environ.get("PLATXA_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path(__file__).resolve().parent.parent / ".cache"
+
+
+def content_hasher() -> hashlib.blake2b:
+    """Return an incremental hasher producing the same digests as content_hash()."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_hash(data: bytes) -> str:
+    """Return a short, stable hex digest for file content."""
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class ContentCache:
+    """SQLite-backed key/value cache with per-namespace LRU eviction.
+
+    Values are stored as text; callers serialize structured results
+    (e.g. with ``json.dumps``) themselves. Writes, including the
+    last-used time of every hit, are held until ``close()`` and then
+    written and committed in one transaction.
+
+    A cache opened with ``shared=other`` uses other's connection for its
+    own namespace, so one process can write two namespaces without one
+    connection's open transaction locking out the other. Its close()
+    writes and evicts; closing other commits both.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        cache_dir: Path | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        *,
+        shared: ContentCache | None = None,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._owner = shared is None
+        self._pending: dict[str, str] = {}
+        self._used: dict[str, float] = {}
+        if shared is not None:
+            self._conn = shared._conn
+            return
+
+        directory = cache_dir if cache_dir is not None else default_cache_dir()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(directory / CACHE_DB_NAME), timeout=10)
+            # Readers never wait for a writer; not every filesystem supports it
+            with contextlib.suppress(sqlite3.Error):
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        except (OSError, sqlite3.Error):
+            self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        """True if the backing database is usable."""
+        return self._conn is not None
+
+    def get(self, key: str) -> str | None:
+        """Return the cached value for key, or None on a miss."""
+        if self._conn is None:
+            return None
+        if key in self._pending:
+            self.hits += 1
+            return self._pending[key]
+        try:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error:
+            self._disable()
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self._used[key] = time.time()
+        self.hits += 1
+        return str(row[0])
+
+    def put(self, key: str, value: str) -> None:
+        """Store value under key, replacing any previous entry."""
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[tuple[str, str]]) -> None:
+        """Store several (key, value) pairs, written on close()."""
+        if self._conn is None:
+            return
+        self._pending.update(items)
+
+    def _flush(self) -> None:
+        """Write held entries and last-used times (committed by the owner's close())."""
+        if self._conn is None:
+            return
+        now = time.time()
+        try:
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE namespace = ? AND key = ?",
+                [(used, self.namespace, k) for k, used in self._used.items()],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.namespace, k, v, now) for k, v in self._pending.items()],
+            )
+        except sqlite3.Error:
+            self._disable()
+        self._pending.clear()
+        self._used.clear()
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries beyond max_entries."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key NOT IN ("
+                " SELECT key FROM entries WHERE namespace = ?"
+                " ORDER BY last_used DESC LIMIT ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            )
+        except sqlite3.Error:
+            self._disable()
+
+    def close(self) -> None:
+        """Write held entries, evict, commit and close the database."""
+        if self._conn is None:
+            return
+        self._flush()
+        self.evict()
+        if self._conn is not None and self._owner:
+            with contextlib.suppress(sqlite3.Error):
+                self._conn.commit()
+        self._disable()
+
+    def _disable(self) -> None:
+        if self._conn is not None and self._owner:
+            with contextlib.suppress(sqlite3.Error):
+                self._conn.close()
+        self._conn = None
+
+    def __enter__(self) -> ContentCache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,246 @@
+"""context_resolver.py - Transitive context cost of a command invocation.
+
+A command's markdown is only part of what one invocation loads:
+
+- ``@path`` references inject files (a single file, every file in a
+  directory, or every match of a glob) into the prompt. See
+  references/patterns/file-reference-patterns.md.
+- ``/name`` mentions of other installed commands chain them into the
+  same turn. See references/patterns/sequential-composition.md.
+
+ContextResolver follows both kinds of edge from a command, recursing
+into markdown files (included files of other types are loaded verbatim,
+so an ``@`` in a TypeScript decorator is not a reference). Each file is
+loaded at most once per invocation; cycles are reported rather than
+followed. Parsed edges and token counts are memoized on the resolver,
+so resolving many commands that share includes reads and tokenizes
+each file once, and all uncounted files are tokenized in one batch.
+
+Fenced code blocks are skipped: ``@file`` and ``/command`` inside
+them are examples, not instructions. References containing ``$`` are
+filled in from arguments at run time and cannot be resolved statically.
+"""
+
+from __future__ import annotations
+
+import glob
+import re
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import TypedDict
+
+# Deepest include chain followed, matching Claude Code's import hop limit
+MAX_DEPTH = 5
+
+_FENCE = re.compile(r"^\s*(`{3,}|~{3,})")
+_FILE_REF = re.compile(r"(?:^|(?<=[\s(`]))@([^\s`'\"()<>,;]+)")
+_COMMAND_REF = re.compile(r"(?:^|(?<=[\s(`]))/([a-z0-9][\w-]*(?::[\w-]+)*)(?=[\s`.,:;)]|$)")
+_GLOB_CHARS = frozenset("*?[")
+
+
+class LoadedFile(TypedDict):
+    """One file loaded by an invocation."""
+
+    path: str
+    kind: str
+    tokens: int
+    depth: int
+    via: str
+
+
+class Resolution(TypedDict):
+    """Everything one invocation loads, in discovery order."""
+
+    loaded: list[LoadedFile]
+    total_tokens: int
+    cycles: list[list[str]]
+    unresolved: list[str]
+    truncated: list[str]
+
+
+def extract_references(text: str) -> tuple[list[str], list[str]]:
+    """Return (file references, command names) outside fenced code blocks."""
+    files: list[str] = []
+    commands: list[str] = []
+    fence = ""
+    for line in text.splitlines():
+        match = _FENCE.match(line)
+        if match:
+            marker = match.group(1)
+            if not fence:
+                fence = marker
+            elif marker.startswith(fence):
+                fence = ""
+            continue
+        if fence:
+            continue
+        for ref in _FILE_REF.findall(line):
+            ref = ref.rstrip(".:")
+            if ref and "$" not in ref and ref not in files:
+                files.append(ref)
+        for name in _COMMAND_REF.findall(line):
+            if name not in commands:
+                commands.append(name)
+    return files, commands
+
+
+def command_name(path: Path) -> str:
+    """Return the invocation name of a command file.
+
+    Files in subdirectories of a commands/ directory are namespaced:
+    commands/frontend/page.md is invoked as ``/frontend:page``.
+    """
+    parts = path.with_suffix("").parts
+    if "commands" in parts:
+        index = len(parts) - 1 - parts[::-1].index("commands")
+        return ":".join(parts[index + 1 :])
+    return path.stem
+
+
+class ContextResolver:
+    """Resolve and cost the context loaded by command invocations."""
+
+    def __init__(
+        self,
+        project_dir: Path,
+        commands: dict[str, Path],
+        count: Callable[[Sequence[Path]], list[int]],
+    ) -> None:
+        self.project_dir = project_dir
+        self.commands = commands
+        self._count = count
+        self._names = {path.resolve(): name for name, path in commands.items()}
+        self._edges: dict[Path, tuple[list[tuple[str, Path]], list[str]]] = {}
+        self._tokens: dict[Path, int] = {}
+
+    def label(self, path: Path) -> str:
+        """Return a short display name for a loaded file."""
+        name = self._names.get(path)
+        if name is not None:
+            return f"/{name}"
+        try:
+            return str(path.relative_to(self.project_dir.resolve()))
+        except ValueError:
+            return str(path)
+
+    def expand(self, ref: str, base: Path) -> list[Path]:
+        """Expand one @reference to the files it injects.
+
+        Paths are tried against the project directory first (where the
+        command runs), then against the referencing file's directory.
+        Absolute globs are expanded as they are.
+        """
+        if _GLOB_CHARS.intersection(ref) and Path(ref).is_absolute():
+            matches = sorted(Path(p) for p in glob.glob(ref, recursive=True))
+            return [p.resolve() for p in matches if p.is_file()]
+        for anchor in (self.project_dir, base):
+            if _GLOB_CHARS.intersection(ref):
+                matches = sorted(p for p in anchor.glob(ref.removeprefix("./")) if p.is_file())
+                if matches:
+                    return [p.resolve() for p in matches]
+                continue
+            target = anchor / ref
+            if target.is_file():
+                return [target.resolve()]
+            if target.is_dir():
+                return sorted(
+                    p.resolve()
+                    for p in target.iterdir()
+                    if p.is_file() and not p.name.startswith(".")
+                )
+        return []
+
+    def edges(self, path: Path) -> tuple[list[tuple[str, Path]], list[str]]:
+        """Return ((kind, target) edges, unresolved refs) for a file, memoized."""
+        if path in self._edges:
+            return self._edges[path]
+
+        result: list[tuple[str, Path]] = []
+        unresolved: list[str] = []
+        if path.suffix == ".md":
+            files, names = extract_references(path.read_text(errors="replace"))
+            for ref in files:
+                targets = self.expand(ref, path.parent)
+                if not targets:
+                    unresolved.append(f"@{ref}")
+                result.extend(("file", target) for target in targets)
+            for name in names:
+                command = self.commands.get(name)
+                if command is not None:
+                    result.append(("command", command.resolve()))
+
+        self._edges[path] = (result, unresolved)
+        return result, unresolved
+
+    def tokens(self, paths: Sequence[Path]) -> list[int]:
+        """Return token counts, counting all unmemoized paths in one batch."""
+        missing = list(dict.fromkeys(p for p in paths if p not in self._tokens))
+        if missing:
+            self._tokens.update(zip(missing, self._count(missing), strict=True))
+        return [self._tokens[p] for p in paths]
+
+    def resolve(self, command: Path) -> Resolution:
+        """Resolve everything one invocation of command loads.
+
+        Depth-first, each file loaded once. An edge back to a file still
+        on the current chain is recorded as a cycle; chains deeper than
+        MAX_DEPTH are cut and reported as truncated.
+        """
+        root = command.resolve()
+        order: list[tuple[Path, str, int, Path | None]] = [(root, "command", 0, None)]
+        seen = {root}
+        cycles: list[list[str]] = []
+        unresolved: list[str] = []
+        truncated: list[str] = []
+
+        # Stack of (path, iterator over its edges); chain mirrors the stack
+        chain = [root]
+        stack = [(root, iter(self._edges_of(root, unresolved)))]
+        while stack:
+            path, pending = stack[-1]
+            edge = next(pending, None)
+            if edge is None:
+                stack.pop()
+                chain.pop()
+                continue
+            kind, target = edge
+            if target == path:
+                # A command naming itself is a usage example, not a chain
+                continue
+            if target in chain:
+                cycle = chain[chain.index(target) :] + [target]
+                cycles.append([self.label(p) for p in cycle])
+                continue
+            if target in seen:
+                continue
+            seen.add(target)
+            order.append((target, kind, len(chain), path))
+            if len(chain) >= MAX_DEPTH:
+                truncated.append(self.label(target))
+                continue
+            chain.append(target)
+            stack.append((target, iter(self._edges_of(target, unresolved))))
+
+        counts = self.tokens([path for path, _, _, _ in order])
+        loaded = [
+            LoadedFile(
+                path=self.label(path),
+                kind=kind,
+                tokens=tokens,
+                depth=depth,
+                via=self.label(via) if via is not None else "",
+            )
+            for (path, kind, depth, via), tokens in zip(order, counts, strict=True)
+        ]
+        return Resolution(
+            loaded=loaded,
+            total_tokens=sum(counts),
+            cycles=cycles,
+            unresolved=unresolved,
+            truncated=truncated,
+        )
+
+    def _edges_of(self, path: Path, unresolved: list[str]) -> list[tuple[str, Path]]:
+        result, missing = self.edges(path)
+        unresolved.extend(f"{self.label(path)}: {ref}" for ref in missing)
+        return result
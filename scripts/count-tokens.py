@@ -2,24 +2,78 @@
 """count-tokens.py - Count tokens in command files.
 
 Usage: count-tokens.py <command-file-or-directory> [--json] [--warn-threshold N]
+                       [--no-cache] [--cache-dir DIR]
+                       [--sections [--top N]] [--resolve [--project-dir DIR]]
+                       [--simulate MESSAGES] [--redundancy]
+       count-tokens.py --catalog <project-dir> [--jobs N] [--json]
 
 Provides accurate token counts using tiktoken (cl100k_base encoding)
-with fallback to word-based estimation.
+with fallback to a calibrated character-class estimate. The estimate's
+error band is reported in the method field (e.g. "estimate±7%").
 
 Budget limits for commands:
 - Recommended: 2000 tokens, 300 lines
 - Hard limit: 4000 tokens, 600 lines
 
 When passed a directory (self-validation), uses skill-level limits.
+
+Catalog mode (--catalog) analyzes every command installed for a project
+(commands/, .claude/commands/, ~/.claude/commands/ and plugin commands,
+as found by command_registry.py) in one process pool, streaming one result
+per line followed by an aggregate budget summary.
+
+Files larger than STREAM_THRESHOLD_BYTES are read and tokenized in
+fixed-size chunks split at token-safe boundaries, so peak memory stays
+bounded while counts match the whole-file result.
+
+On offline machines, point --encoding-file (or $PLATXA_ENCODING_FILE) at
+a cl100k_base rank file, or place one in assets/encodings/. Binary .bpe
+tables produced by bpe_ranks.py are memory-mapped at startup; tiktoken
+is then never asked to download anything. A $PLATXA_ENCODING_FILE that
+does not exist is warned about and skipped; cached counts are keyed by
+the rank file's content hash.
+
+With --sections, the command (or SKILL.md) is split into frontmatter,
+heading sections, fenced code blocks and tables, and tokens are
+attributed to each so the most expensive parts can be trimmed first.
+
+With --resolve, @file references and /command chains are followed
+transitively (see context_resolver.py) and the total loaded by one
+invocation is gated against INVOCATION_LIMITS.
+
+With --simulate N, cumulative tokens over an N-message conversation are
+compared for the command form (re-processed every message) and the
+skill form (SKILL.md loaded on demand, then one reference per phase),
+with the break-even message and a recommendation.
+
+With --redundancy (directory mode), references/ is shingled and
+rolling-hashed in one linear pass (see redundancy.py) to report text
+repeated across files and how many tokens the copies cost.
+
+Token counts are cached on disk keyed by content hash and encoding, so
+unchanged files cost one hash and one lookup (see content_cache.py).
 """
 
 from __future__ import annotations
 
 import argparse
+import codecs
 import json
+import multiprocessing
+import os
+import re
 import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import cache
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
+
+from bpe_ranks import load_encoding
+from command_registry import CommandRegistry
+from content_cache import ContentCache, content_hash, content_hasher
+from context_resolver import MAX_DEPTH, ContextResolver, Resolution
+from frontmatter import split_frontmatter
+from redundancy import RedundantBlock, find_redundant_blocks, read_tree
 
 # Try to import tiktoken for accurate counting
 try:
@@ -40,6 +94,66 @@ class FileTokens(TypedDict):
     method: str
 
 
+class SectionTokens(TypedDict):
+    """Token and line attribution for one section of a markdown file."""
+
+    kind: str
+    title: str
+    start_line: int
+    end_line: int
+    lines: int
+    tokens: int
+    share: float
+
+
+class InvocationReport(TypedDict):
+    """Tokens loaded by one command invocation, gated against INVOCATION_LIMITS."""
+
+    resolution: Resolution
+    invocation_tokens: int
+    warnings: list[str]
+    passed: bool
+
+
+class CostSimulation(TypedDict):
+    """Cumulative command-form vs skill-form cost over a conversation."""
+
+    messages: int
+    command_tokens: int
+    skill_md_tokens: int
+    reference_tokens: list[int]
+    command_cumulative: int
+    skill_cumulative: int
+    break_even: int | None
+    savings: int
+    savings_pct: float
+    recommendation: list[str]
+    series: list[tuple[int, int, int]]
+
+
+class RedundancyReport(TypedDict):
+    """Text repeated across references/, with the tokens the copies cost."""
+
+    files: int
+    duplicated_tokens: int
+    duplicated_pct: float
+    blocks: list[dict[str, Any]]
+
+
+class CatalogSummary(TypedDict):
+    """Aggregate budget summary for catalog mode."""
+
+    commands: int
+    passed: int
+    failed: int
+    over_recommended: int
+    total_tokens: int
+    total_lines: int
+    largest_command: str
+    largest_tokens: int
+    method: str
+
+
 class TokenReport(TypedDict):
     """Complete token count report."""
 
@@ -86,18 +200,168 @@ SKILL_HARD_LIMITS = {
     "total_skill_tokens": 70000,
 }
 
+# Everything one command invocation loads: the command, its @file
+# includes and any commands it chains, resolved transitively.
+INVOCATION_LIMITS = {
+    "invocation_tokens": 8000,
+}
+
+INVOCATION_HARD_LIMITS = {
+    "invocation_tokens": 16000,
+}
+
+
+# Number of command files handed to a catalog worker at once
+CATALOG_CHUNK_SIZE = 64
+
+# Markdown structure used by --sections
+_HEADING = re.compile(r"^#{1,6}\s")
+_FENCE = re.compile(r"^(`{3,}|~{3,})")
+
+# Local rank files for offline tiktoken use, checked in this order after
+# $PLATXA_ENCODING_FILE (see bpe_ranks.py)
+ENCODING_FILE_ENV = "PLATXA_ENCODING_FILE"
+VENDORED_ENCODING_FILES = (
+    Path(__file__).resolve().parent.parent / "assets" / "encodings" / "cl100k_base.bpe",
+    Path(__file__).resolve().parent.parent / "assets" / "encodings" / "cl100k_base.tiktoken",
+)
+
+# Fallback estimator: text is split into pre-tokens with a stdlib-re
+# approximation of the cl100k_base split pattern, and each character
+# class gets its own (tokens per piece, tokens per char) coefficients.
+# Calibrated against tiktoken on references/ (plus a multilingual sample
+# for the non-Latin classes) with benchmarks/bench_token_estimate.py
+# --calibrate. ESTIMATE_ERROR_PCT is the worst per-file error seen on
+# references/ and is reported in the method field.
+ESTIMATE_VERSION = "v2"
+ESTIMATE_CLASSES = ("word", "intl", "number", "punct", "symbol", "newline", "space")
+ESTIMATE_COEFFICIENTS: dict[str, tuple[float, float]] = {
+    "word": (0.8745, 0.0355),
+    "intl": (0.0000, 0.7533),
+    "number": (1.0000, 0.0000),
+    "punct": (0.6810, 0.1812),
+    "symbol": (0.3772, 0.4223),
+    "newline": (1.0000, 0.0000),
+    "space": (1.0000, 0.0000),
+}
+ESTIMATE_ERROR_PCT = 7
+ESTIMATE_METHOD = f"estimate±{ESTIMATE_ERROR_PCT}%"
+_ESTIMATE_SPLIT = re.compile(
+    r"(?P<word>'(?i:s|t|re|ve|m|ll|d)|(?:[^\r\n\w]|_)?[A-Za-z]+(?![^\W\d_]))"
+    r"|(?P<intl>(?:[^\r\n\w]|_)?[^\W\d_]+)"
+    r"|(?P<number>\d{1,3})"
+    r"|(?P<punct> ?[!-/:-@\[-`{-~]+[\r\n]*)"
+    r"|(?P<symbol> ?[^\s\w\x00-\x7f]+[\r\n]*)"
+    r"|(?P<newline>\s*[\r\n]+)"
+    r"|(?P<space>\s+(?!\S)|\s+)"
+)
+
+# Files above this size are counted in bounded-memory chunks
+STREAM_THRESHOLD_BYTES = 4 * 1024 * 1024
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+# Safe split points for chunked tokenization. A newline followed by a
+# non-space character always ends a cl100k pre-token (no pattern lets a
+# piece run from a newline into the next word), and the same holds for
+# the position before a space between two ASCII letters. Splitting there
+# gives the same token sequence as encoding the whole text.
+_WORD_BOUNDARY = re.compile(r"(?<=[A-Za-z])(?= [A-Za-z])")
+
+# Default bound on cached token counts (LRU-evicted beyond this)
+DEFAULT_CACHE_ENTRIES = 20000
+
+
+def find_encoding_file() -> Path | None:
+    """Locate a local cl100k_base rank file, if one is configured or vendored.
+
+    A $PLATXA_ENCODING_FILE that is not a file is skipped (main() warns
+    about it), so a mistyped path falls back instead of failing.
+    """
+    env = os.environ.get(ENCODING_FILE_ENV)
+    if env and Path(env).is_file():
+        return Path(env)
+    for candidate in VENDORED_ENCODING_FILES:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+@cache
+def get_encoder() -> Any:
+    """Load the cl100k_base encoder once per process.
+
+    A local rank file (see find_encoding_file) takes precedence over
+    tiktoken's own loader, which may need the network.
+    """
+    assert tiktoken is not None
+    encoding_file = find_encoding_file()
+    if encoding_file is not None:
+        return load_encoding(encoding_file)
+    return tiktoken.get_encoding("cl100k_base")
+
 
 def count_tokens_tiktoken(text: str) -> int:
     """Count tokens using tiktoken (accurate)."""
-    assert tiktoken is not None
-    enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+    return len(get_encoder().encode(text))
+
+
+def count_tokens_tiktoken_batch(texts: Sequence[str]) -> list[int]:
+    """Count tokens for many texts at once.
+
+    tiktoken releases the GIL while encoding, so encode_batch spreads the
+    work over one thread per core.
+    """
+    if len(texts) == 1:
+        return [count_tokens_tiktoken(texts[0])]
+    encoded = get_encoder().encode_batch(list(texts), num_threads=os.cpu_count() or 1)
+    return [len(tokens) for tokens in encoded]
+
+
+def estimate_features(text: str) -> list[int]:
+    """Return per-class (pieces, chars) counts for the fallback estimator.
+
+    Features are plain integer sums, so they can be accumulated across
+    chunks and give exactly the whole-text estimate.
+    """
+    features = [0] * (2 * len(ESTIMATE_CLASSES))
+    for match in _ESTIMATE_SPLIT.finditer(text):
+        # Each class is exactly one capture group, numbered in ESTIMATE_CLASSES order
+        slot = 2 * match.lastindex - 2  # type: ignore[operator]
+        features[slot] += 1
+        features[slot + 1] += match.end() - match.start()
+    return features
+
+
+def estimate_from_features(features: Sequence[int]) -> int:
+    """Turn accumulated estimate_features() into a token estimate."""
+    total = 0.0
+    for i, name in enumerate(ESTIMATE_CLASSES):
+        per_piece, per_char = ESTIMATE_COEFFICIENTS[name]
+        total += per_piece * features[2 * i] + per_char * features[2 * i + 1]
+    return round(total)
 
 
 def count_tokens_estimate(text: str) -> int:
-    """Estimate tokens from word count (fallback)."""
-    words = len(text.split())
-    return int(words * 1.3)
+    """Estimate tokens from character-class pre-tokens (fallback)."""
+    return estimate_from_features(estimate_features(text))
+
+
+def count_tokens_stream(chunks: Iterable[str]) -> tuple[int, str]:
+    """Count tokens over text chunks split at safe boundaries.
+
+    Only one chunk is held at a time. The estimate accumulates integer
+    features and rounds once, so it matches count_tokens_estimate() on
+    the whole text.
+    """
+    if TIKTOKEN_AVAILABLE:
+        enc = get_encoder()
+        return sum(len(enc.encode(chunk)) for chunk in chunks), "tiktoken"
+    else:
+        totals = [0] * (2 * len(ESTIMATE_CLASSES))
+        for chunk in chunks:
+            for i, value in enumerate(estimate_features(chunk)):
+                totals[i] += value
+        return estimate_from_features(totals), ESTIMATE_METHOD
 
 
 def count_tokens(text: str) -> tuple[int, str]:
@@ -105,15 +369,183 @@ def count_tokens(text: str) -> tuple[int, str]:
     if TIKTOKEN_AVAILABLE:
         return count_tokens_tiktoken(text), "tiktoken"
     else:
-        return count_tokens_estimate(text), "estimate"
+        return count_tokens_estimate(text), ESTIMATE_METHOD
+
+
+def count_tokens_batch(texts: Sequence[str]) -> tuple[list[int], str]:
+    """Count tokens for many texts with best available method."""
+    if TIKTOKEN_AVAILABLE:
+        return count_tokens_tiktoken_batch(texts), "tiktoken"
+    else:
+        return [count_tokens_estimate(t) for t in texts], ESTIMATE_METHOD
 
 
 def count_lines(text: str) -> int:
     """Count lines in text."""
-    return len(text.split("\n"))
+    return text.count("\n") + 1
+
+
+def counting_method() -> str:
+    """Return the method label reported for the active counter."""
+    return "tiktoken" if TIKTOKEN_AVAILABLE else ESTIMATE_METHOD
+
+
+@cache
+def _rank_file_digest(path: Path, mtime_ns: int, size: int) -> str:
+    """Content hash of a rank file, computed once per version of the file."""
+    return content_hash(path.read_bytes())
+
+
+def encoding_name() -> str:
+    """Identify the active counting method, and its rank file, for cache keys."""
+    if not TIKTOKEN_AVAILABLE:
+        return f"estimate-{ESTIMATE_VERSION}"
+    encoding_file = find_encoding_file()
+    if encoding_file is None:
+        return "cl100k_base"
+    stat = encoding_file.stat()
+    return f"cl100k_base@{_rank_file_digest(encoding_file, stat.st_mtime_ns, stat.st_size)}"
+
+
+def decode_text(data: bytes) -> str:
+    """Decode file bytes the way Path.read_text() does (universal newlines)."""
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _last_safe_boundary(text: str) -> int:
+    """Return the index of the last token-safe split point in text, or -1."""
+    index = text.rfind("\n", 0, len(text) - 1)
+    while index >= 0:
+        if not text[index + 1].isspace():
+            return index + 1
+        index = text.rfind("\n", 0, index)
+
+    last = -1
+    for match in _WORD_BOUNDARY.finditer(text):
+        last = match.start()
+    return last
+
+
+def iter_text_chunks(path: Path, chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[str]:
+    """Yield a file's decoded text in pieces split only at token-safe boundaries.
+
+    Joining the pieces gives exactly decode_text(path.read_bytes()). Text
+    with no safe boundary (one enormous unbroken token run) is carried
+    into the next read until a boundary appears.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    carry = ""
+    pending_cr = ""
+
+    with path.open("rb") as fh:
+        while True:
+            block = fh.read(chunk_bytes)
+            final = not block
+            raw = pending_cr + decoder.decode(block, final=final)
+            pending_cr = ""
+            if not final and raw.endswith("\r"):
+                # A CR at the block edge may be half of a CRLF pair
+                raw, pending_cr = raw[:-1], "\r"
+            text = carry + raw.replace("\r\n", "\n").replace("\r", "\n")
+
+            if final:
+                if text:
+                    yield text
+                return
+
+            split = _last_safe_boundary(text)
+            if split <= 0:
+                carry = text
+                continue
+            yield text[:split]
+            carry = text[split:]
+
+
+def scan_file(path: Path, chunk_bytes: int = STREAM_CHUNK_BYTES) -> tuple[str, int]:
+    """Return (content hash, line count) for a file without loading it whole."""
+    hasher = content_hasher()
+    newlines = 0
+    prev_cr = False
+
+    with path.open("rb") as fh:
+        while block := fh.read(chunk_bytes):
+            hasher.update(block)
+            newlines += block.count(b"\n") + block.count(b"\r") - block.count(b"\r\n")
+            if prev_cr and block.startswith(b"\n"):
+                newlines -= 1
+            prev_cr = block.endswith(b"\r")
+
+    return hasher.hexdigest(), newlines + 1
+
+
+def count_large_file(path: Path, cache: ContentCache | None = None) -> tuple[int, int, str]:
+    """Count (tokens, lines, method) for a large file in bounded memory."""
+    digest, lines = scan_file(path)
+    key = f"{digest}:{encoding_name()}"
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return int(cached), lines, counting_method()
+
+    tokens, method = count_tokens_stream(iter_text_chunks(path))
+    if cache is not None:
+        cache.put(key, str(tokens))
+    return tokens, lines, method
+
+
+def count_files(
+    paths: Sequence[Path], cache: ContentCache | None = None
+) -> list[tuple[int, int, str]]:
+    """Count (tokens, lines, method) for several files in one batch.
+
+    Cache hits cost one hash and one lookup. All misses are decoded and
+    sent through a single batched tokenizer call, so large reference
+    trees scale with core count rather than file count. Files above
+    STREAM_THRESHOLD_BYTES are counted separately in bounded memory.
+    """
+    method = counting_method()
+    results: list[tuple[int, int, str]] = []
+    pending: list[tuple[int, str, bytes]] = []
+
+    for index, path in enumerate(paths):
+        if path.stat().st_size > STREAM_THRESHOLD_BYTES:
+            results.append(count_large_file(path, cache))
+            continue
+
+        data = path.read_bytes()
+        lines = data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n") + 1
+        results.append((0, lines, method))
+
+        key = ""
+        if cache is not None:
+            key = f"{content_hash(data)}:{encoding_name()}"
+            cached = cache.get(key)
+            if cached is not None:
+                results[index] = (int(cached), lines, method)
+                continue
+        pending.append((index, key, data))
+
+    if pending:
+        counts, method = count_tokens_batch([decode_text(data) for _, _, data in pending])
+        for (index, _, _), tokens in zip(pending, counts, strict=True):
+            results[index] = (tokens, results[index][1], method)
+        if cache is not None:
+            cache.put_many(
+                (key, str(tokens)) for (_, key, _), tokens in zip(pending, counts, strict=True)
+            )
+
+    return results
+
+
+def count_file(path: Path, cache: ContentCache | None = None) -> tuple[int, int, str]:
+    """Count (tokens, lines, method) for a single file, consulting the cache first."""
+    return count_files([path], cache)[0]
 
 
-def analyze_command_file(command_path: Path, warn_threshold: int = 80) -> TokenReport:
+def analyze_command_file(
+    command_path: Path, warn_threshold: int = 80, cache: ContentCache | None = None
+) -> TokenReport:
     """Analyze token counts for a single command file."""
     warnings: list[str] = []
     command_name = command_path.stem
@@ -132,9 +564,7 @@ def analyze_command_file(command_path: Path, warn_threshold: int = 80) -> TokenR
             is_directory=False,
         )
 
-    content = command_path.read_text()
-    tokens, method = count_tokens(content)
-    lines = count_lines(content)
+    tokens, lines, method = count_file(command_path, cache)
 
     limits = COMMAND_LIMITS
     hard = COMMAND_HARD_LIMITS
@@ -146,7 +576,8 @@ def analyze_command_file(command_path: Path, warn_threshold: int = 80) -> TokenR
         )
         warnings.append(
             "Consider converting to a skill — commands are re-processed every message, "
-            "skills load on demand. See references/patterns/command-vs-skill-vs-hook.md"
+            "skills load on demand. Run with --simulate N for the break-even point. "
+            "See references/patterns/command-vs-skill-vs-hook.md"
         )
     elif tokens > limits["command_tokens"] * warn_threshold / 100:
         warnings.append(
@@ -179,7 +610,9 @@ def analyze_command_file(command_path: Path, warn_threshold: int = 80) -> TokenR
     )
 
 
-def analyze_directory(skill_dir: Path, warn_threshold: int = 80) -> TokenReport:
+def analyze_directory(
+    skill_dir: Path, warn_threshold: int = 80, cache: ContentCache | None = None
+) -> TokenReport:
     """Analyze token counts for a skill directory (self-validation)."""
     warnings: list[str] = []
     skill_name = skill_dir.name
@@ -199,9 +632,7 @@ def analyze_directory(skill_dir: Path, warn_threshold: int = 80) -> TokenReport:
             is_directory=True,
         )
 
-    content = skill_md.read_text()
-    skill_tokens, method = count_tokens(content)
-    skill_lines = count_lines(content)
+    skill_tokens, skill_lines, method = count_file(skill_md, cache)
 
     limits = SKILL_LIMITS
     hard = SKILL_HARD_LIMITS
@@ -233,10 +664,9 @@ def analyze_directory(skill_dir: Path, warn_threshold: int = 80) -> TokenReport:
 
     refs_dir = skill_dir / "references"
     if refs_dir.exists():
-        for ref_file in sorted(refs_dir.rglob("*.md")):
-            ref_content = ref_file.read_text()
-            ref_tokens, _ = count_tokens(ref_content)
-            ref_lines = count_lines(ref_content)
+        ref_paths = sorted(refs_dir.rglob("*.md"))
+        ref_counts = count_files(ref_paths, cache)
+        for ref_file, (ref_tokens, ref_lines, _) in zip(ref_paths, ref_counts, strict=True):
             rel_path = str(ref_file.relative_to(skill_dir))
             ref_files.append(
                 FileTokens(path=rel_path, tokens=ref_tokens, lines=ref_lines, method=method)
@@ -284,7 +714,327 @@ def analyze_directory(skill_dir: Path, warn_threshold: int = 80) -> TokenReport:
     )
 
 
-def print_report(report: TokenReport) -> None:
+def command_registry(project_dir: Path) -> dict[str, Path]:
+    """Map invocation names to installed command files (first scope wins)."""
+    return CommandRegistry(project_dir).invocation_map()
+
+
+def analyze_invocation(
+    command_path: Path,
+    project_dir: Path,
+    warn_threshold: int = 80,
+    cache: ContentCache | None = None,
+) -> InvocationReport:
+    """Resolve everything one invocation of a command loads and gate the total."""
+    resolver = ContextResolver(
+        project_dir,
+        command_registry(project_dir),
+        lambda paths: [tokens for tokens, _, _ in count_files(paths, cache)],
+    )
+    resolution = resolver.resolve(command_path)
+    tokens = resolution["total_tokens"]
+    warnings: list[str] = []
+
+    limit = INVOCATION_LIMITS["invocation_tokens"]
+    if tokens > limit:
+        warnings.append(f"Invocation loads more than recommended: {tokens} > {limit} tokens")
+    elif tokens > limit * warn_threshold / 100:
+        warnings.append(
+            f"Invocation approaching token limit: {tokens} ({warn_threshold}% of {limit})"
+        )
+    for cycle in resolution["cycles"]:
+        warnings.append(f"Reference cycle: {' → '.join(cycle)}")
+    for label in resolution["truncated"]:
+        warnings.append(f"Include chain deeper than {MAX_DEPTH} levels stops at {label}")
+
+    return InvocationReport(
+        resolution=resolution,
+        invocation_tokens=tokens,
+        warnings=warnings,
+        passed=tokens <= INVOCATION_HARD_LIMITS["invocation_tokens"],
+    )
+
+
+def print_invocation(invocation: InvocationReport) -> None:
+    """Print the files one invocation loads, in discovery order."""
+    resolution = invocation["resolution"]
+    print("Loaded per invocation:")
+    for f in resolution["loaded"]:
+        indent = "  " * (f["depth"] + 1)
+        print(f"{indent}{f['path']}: {f['tokens']:,} tokens ({f['kind']})")
+    print("  ────────────────────────────")
+    print(
+        f"  Total: {invocation['invocation_tokens']:,} / "
+        f"{INVOCATION_LIMITS['invocation_tokens']:,}"
+    )
+    if resolution["unresolved"]:
+        print("  Unresolved (runtime or missing):")
+        for ref in resolution["unresolved"]:
+            print(f"    {ref}")
+    print()
+
+
+def simulate_cost(
+    command_tokens: int, skill_md_tokens: int, reference_tokens: Sequence[int], messages: int
+) -> CostSimulation:
+    """Simulate cumulative tokens over a conversation for both forms.
+
+    The command form re-processes its full text on every message. The
+    skill form loads SKILL.md on the first message and each reference
+    once, when its phase starts; phases are spread evenly over the
+    conversation. Name and description metadata are listed in both forms
+    and cancel out, so they are left out.
+    """
+    loads = [0] * (messages + 1)
+    loads[1] = skill_md_tokens
+    for i, tokens in enumerate(reference_tokens):
+        loads[1 + i * messages // len(reference_tokens)] += tokens
+
+    series: list[tuple[int, int, int]] = []
+    skill_cumulative = 0
+    break_even = None
+    for n in range(1, messages + 1):
+        skill_cumulative += loads[n]
+        command_cumulative = n * command_tokens
+        series.append((n, command_cumulative, skill_cumulative))
+        if break_even is None and command_cumulative > skill_cumulative:
+            break_even = n
+
+    command_cumulative = messages * command_tokens
+    savings = command_cumulative - skill_cumulative
+    return CostSimulation(
+        messages=messages,
+        command_tokens=command_tokens,
+        skill_md_tokens=skill_md_tokens,
+        reference_tokens=list(reference_tokens),
+        command_cumulative=command_cumulative,
+        skill_cumulative=skill_cumulative,
+        break_even=break_even,
+        savings=savings,
+        savings_pct=round(savings / command_cumulative * 100, 1) if command_cumulative else 0.0,
+        recommendation=recommend_form(
+            command_tokens, skill_md_tokens, reference_tokens, break_even, savings, messages
+        ),
+        series=series,
+    )
+
+
+def recommend_form(
+    command_tokens: int,
+    skill_md_tokens: int,
+    reference_tokens: Sequence[int],
+    break_even: int | None,
+    savings: int,
+    messages: int,
+) -> list[str]:
+    """Turn a simulation into concrete advice, judged against the budget tables."""
+    advice: list[str] = []
+    if command_tokens > COMMAND_HARD_LIMITS["command_tokens"]:
+        advice.append(
+            f"Convert to a skill: as a command it exceeds the hard limit "
+            f"({command_tokens} > {COMMAND_HARD_LIMITS['command_tokens']} tokens) "
+            f"and would cost {savings:,} more tokens over {messages} messages"
+        )
+    elif command_tokens > COMMAND_LIMITS["command_tokens"]:
+        advice.append(
+            f"Convert to a skill: over the recommended command budget "
+            f"({command_tokens} > {COMMAND_LIMITS['command_tokens']} tokens); "
+            f"break-even at message {break_even}, saving {savings:,} tokens over {messages}"
+        )
+    elif break_even is None or savings <= 0:
+        advice.append(
+            f"Keep as a command: the skill form is never cheaper within {messages} messages"
+        )
+    else:
+        advice.append(
+            f"Keep as a command for short sessions: within budget ({command_tokens} <= "
+            f"{COMMAND_LIMITS['command_tokens']} tokens); past message {break_even} the "
+            f"skill form is cheaper, saving {savings:,} tokens over {messages}"
+        )
+
+    if skill_md_tokens > SKILL_LIMITS["skill_md_tokens"]:
+        advice.append(
+            f"Move detail from SKILL.md into references/: {skill_md_tokens} > "
+            f"{SKILL_LIMITS['skill_md_tokens']} tokens"
+        )
+    oversized = sum(1 for t in reference_tokens if t > SKILL_LIMITS["single_ref_tokens"])
+    if oversized:
+        advice.append(
+            f"Split {oversized} reference(s) over {SKILL_LIMITS['single_ref_tokens']} "
+            f"tokens so each phase loads less"
+        )
+    return advice
+
+
+def print_simulation(simulation: CostSimulation) -> None:
+    """Print cumulative costs at a few checkpoints plus the recommendation."""
+    messages = simulation["messages"]
+    checkpoints = sorted({1, 2, 5, 10, 20, 50, 100, messages} & set(range(1, messages + 1)))
+    print(f"Cost over {messages} messages:")
+    print(f"  {'Message':>8}  {'Command':>10}  {'Skill':>10}")
+    for n, command_cumulative, skill_cumulative in simulation["series"]:
+        if n in checkpoints:
+            print(f"  {n:>8}  {command_cumulative:>10,}  {skill_cumulative:>10,}")
+    if simulation["break_even"] is None:
+        print("  Break-even: none within the conversation")
+    else:
+        print(f"  Break-even: message {simulation['break_even']}")
+    print(f"  Skill form saves: {simulation['savings']:,} tokens ({simulation['savings_pct']}%)")
+    print()
+    print("Recommendation:")
+    for line in simulation["recommendation"]:
+        print(f"  → {line}")
+    print()
+
+
+def analyze_redundancy(skill_dir: Path, ref_total_tokens: int) -> RedundancyReport:
+    """Find repeated blocks across references/ and count their tokens."""
+    refs_dir = skill_dir / "references"
+    files = read_tree(refs_dir) if refs_dir.is_dir() else []
+    found: list[RedundantBlock] = find_redundant_blocks(files)
+    counts, _ = count_tokens_batch([b["text"] for b in found]) if found else ([], "")
+
+    blocks = [
+        {
+            "path": f"references/{b['path']}",
+            "start_line": b["start_line"],
+            "end_line": b["end_line"],
+            "tokens": tokens,
+            "duplicate_of": f"references/{b['duplicate_of']}",
+        }
+        for b, tokens in zip(found, counts, strict=True)
+    ]
+    blocks.sort(key=lambda b: (-b["tokens"], b["path"], b["start_line"]))
+    duplicated = sum(counts)
+    return RedundancyReport(
+        files=len(files),
+        duplicated_tokens=duplicated,
+        duplicated_pct=round(duplicated / ref_total_tokens * 100, 1) if ref_total_tokens else 0.0,
+        blocks=blocks,
+    )
+
+
+def print_redundancy(redundancy: RedundancyReport, top: int) -> None:
+    """Print the largest repeated blocks and the tokens they cost."""
+    print()
+    print(
+        f"Redundant text in references/ ({redundancy['files']} files): "
+        f"{redundancy['duplicated_tokens']:,} tokens ({redundancy['duplicated_pct']}%)"
+    )
+    for b in redundancy["blocks"][:top]:
+        span = f"{b['path']}:{b['start_line']}-{b['end_line']}"
+        print(f"  {b['tokens']:>6,} tok  {span}  repeats {b['duplicate_of']}")
+
+
+def split_sections(text: str) -> list[tuple[str, str, int, int, str]]:
+    """Split markdown into (kind, title, start_line, end_line, text) sections.
+
+    Kinds are "frontmatter", "heading" (a heading plus its prose),
+    "prose" (text before the first heading or after a block), "code"
+    (fenced block) and "table". Lines are 1-based and inclusive.
+
+    A section never starts with a blank or indented line; those stay with
+    the section before. Every boundary therefore falls after a newline
+    and before a non-space character, which is a token-safe split point,
+    so section counts add up to the whole-file count.
+    """
+    lines = text.split("\n")
+    spans: list[list[Any]] = []  # [kind, title, start, end) over line indexes
+    heading = ""
+    index = 0
+
+    def add(kind: str, title: str, start: int, end: int) -> None:
+        if end > start:
+            spans.append([kind, title, start, end])
+
+    frontmatter, offset = split_frontmatter(text)
+    if frontmatter is not None:
+        # Lines up to and including the closing delimiter
+        index = text.count("\n", 0, offset) + (not text.endswith("\n", 0, offset))
+        add("frontmatter", "frontmatter", 0, index)
+
+    start, kind = index, "prose"
+    while index < len(lines):
+        line = lines[index]
+        fence = _FENCE.match(line)
+        if fence or line.startswith("|"):
+            add(kind, heading or "(preamble)", start, index)
+            end = index + 1
+            if fence:
+                marker = fence.group(1)
+                while end < len(lines) and not lines[end].startswith(marker):
+                    end += 1
+                end = min(end + 1, len(lines))
+                language = line[len(marker) :].strip() or "text"
+                add("code", f"{heading or '(preamble)'} [{language}]", index, end)
+            else:
+                while end < len(lines) and lines[end].startswith("|"):
+                    end += 1
+                add("table", heading or "(preamble)", index, end)
+            start, kind, index = end, "prose", end
+            continue
+        if _HEADING.match(line):
+            add(kind, heading or "(preamble)", start, index)
+            heading = line.strip()
+            start, kind = index, "heading"
+        index += 1
+    add(kind, heading or "(preamble)", start, len(lines))
+
+    # Keep blank and indented lines with the preceding section
+    merged: list[list[Any]] = []
+    for span in spans:
+        while span[2] < span[3] and merged and (not lines[span[2]] or lines[span[2]][0].isspace()):
+            merged[-1][3] += 1
+            span[2] += 1
+        if span[2] < span[3]:
+            merged.append(span)
+
+    return [
+        (kind, title, start + 1, end, "\n".join(lines[start:end]))
+        for kind, title, start, end in merged
+    ]
+
+
+def analyze_sections(path: Path) -> list[SectionTokens]:
+    """Attribute tokens and lines to each section, most expensive first."""
+    sections = split_sections(decode_text(path.read_bytes()))
+    # Re-attach the newline each section loses in the split (except the last)
+    texts = [
+        body + "\n" if i < len(sections) - 1 else body
+        for i, (_, _, _, _, body) in enumerate(sections)
+    ]
+    counts, _ = count_tokens_batch(texts) if texts else ([], "")
+    total = sum(counts) or 1
+
+    result = [
+        SectionTokens(
+            kind=kind,
+            title=title,
+            start_line=start,
+            end_line=end,
+            lines=end - start + 1,
+            tokens=tokens,
+            share=round(tokens / total * 100, 1),
+        )
+        for (kind, title, start, end, _), tokens in zip(sections, counts, strict=True)
+    ]
+    return sorted(result, key=lambda s: (-s["tokens"], s["start_line"]))
+
+
+def print_sections(sections: list[SectionTokens], top: int) -> None:
+    """Print a ranked token heat map of sections."""
+    print()
+    print(f"Most expensive sections (top {min(top, len(sections))} of {len(sections)}):")
+    for s in sections[:top]:
+        bar = "█" * max(1, round(s["share"] / 5)) if s["tokens"] else ""
+        span = f"L{s['start_line']}-{s['end_line']}"
+        print(
+            f"  {s['tokens']:>6,} tok {s['share']:>5.1f}%  {bar:<20} {span:<10} "
+            f"{s['kind']}: {s['title']}"
+        )
+
+
+def print_report(report: TokenReport, invocation: InvocationReport | None = None) -> None:
     """Print human-readable token report."""
     print(f"Token Count Report: {report['command_name']}")
     print("━" * 50)
@@ -312,6 +1062,9 @@ def print_report(report: TokenReport) -> None:
     print(f"Method: {report['method']}")
     print()
 
+    if invocation is not None:
+        print_invocation(invocation)
+
     if report["warnings"]:
         print("Warnings:")
         for w in report["warnings"]:
@@ -325,32 +1078,340 @@ def print_report(report: TokenReport) -> None:
         print("✗ FAILED - Exceeds token budget")
 
 
+def iter_catalog_commands(project_dir: Path) -> Iterator[Path]:
+    """Yield every command file installed for a project, once each.
+
+    Covers commands/, .claude/commands/, ~/.claude/commands/ and plugin
+    commands under .claude/plugins/ (including namespaced subdirectories),
+    as listed by CommandRegistry.
+    """
+    for entry in CommandRegistry(project_dir).of_kind("command"):
+        yield entry["path"]
+
+
+def _chunks(paths: Iterator[Path], size: int) -> Iterator[list[Path]]:
+    chunk: list[Path] = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _analyze_catalog_chunk(
+    task: tuple[list[Path], int, bool, Path | None, int],
+) -> list[dict[str, Any]]:
+    """Worker: analyze a chunk of command files with one cache connection."""
+    paths, warn_threshold, use_cache, cache_dir, max_entries = task
+    cache = ContentCache("tokens", cache_dir, max_entries) if use_cache else None
+    try:
+        return [
+            {"path": str(path), **analyze_command_file(path, warn_threshold, cache)}
+            for path in paths
+        ]
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def analyze_catalog(
+    project_dir: Path,
+    warn_threshold: int = 80,
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_dir: Path | None = None,
+    max_entries: int = DEFAULT_CACHE_ENTRIES,
+) -> Iterator[dict[str, Any]]:
+    """Analyze every catalog command, yielding results in discovery order.
+
+    Work is handed out in chunks and consumed lazily, so memory stays flat
+    regardless of catalog size.
+    """
+    tasks = (
+        (chunk, warn_threshold, use_cache, cache_dir, max_entries)
+        for chunk in _chunks(iter_catalog_commands(project_dir), CATALOG_CHUNK_SIZE)
+    )
+
+    if jobs <= 1:
+        for task in tasks:
+            yield from _analyze_catalog_chunk(task)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        for results in pool.imap(_analyze_catalog_chunk, tasks):
+            yield from results
+
+
+def summarize_catalog(
+    records: Iterator[dict[str, Any]], emit: Callable[[dict[str, Any]], None]
+) -> CatalogSummary:
+    """Pass each record to emit() while accumulating the budget summary."""
+    summary = CatalogSummary(
+        commands=0,
+        passed=0,
+        failed=0,
+        over_recommended=0,
+        total_tokens=0,
+        total_lines=0,
+        largest_command="",
+        largest_tokens=0,
+        method="none",
+    )
+    for record in records:
+        emit(record)
+        summary["commands"] += 1
+        summary["passed" if record["passed"] else "failed"] += 1
+        if (
+            record["command_tokens"] > COMMAND_LIMITS["command_tokens"]
+            or record["command_lines"] > COMMAND_LIMITS["command_lines"]
+        ):
+            summary["over_recommended"] += 1
+        summary["total_tokens"] += record["command_tokens"]
+        summary["total_lines"] += record["command_lines"]
+        if record["command_tokens"] > summary["largest_tokens"] or not summary["largest_command"]:
+            summary["largest_command"] = record["path"]
+            summary["largest_tokens"] = record["command_tokens"]
+        summary["method"] = record["method"]
+    return summary
+
+
+def print_catalog_record(record: dict[str, Any]) -> None:
+    """Print one human-readable catalog line."""
+    mark = "✓" if record["passed"] else "✗"
+    print(
+        f"{mark} {record['path']}: {record['command_tokens']:,} tokens, "
+        f"{record['command_lines']:,} lines"
+    )
+
+
+def print_catalog_summary(summary: CatalogSummary) -> None:
+    """Print human-readable catalog summary."""
+    print()
+    print("━" * 50)
+    print(f"Catalog: {summary['commands']:,} commands")
+    print(f"  Passed:           {summary['passed']:,}")
+    print(f"  Failed:           {summary['failed']:,}")
+    print(f"  Over recommended: {summary['over_recommended']:,}")
+    print(f"  Total tokens:     {summary['total_tokens']:,}")
+    print(f"  Total lines:      {summary['total_lines']:,}")
+    if summary["largest_command"]:
+        print(f"  Largest:          {summary['largest_command']} ({summary['largest_tokens']:,})")
+    print(f"  Method:           {summary['method']}")
+    print("━" * 50)
+    if summary["failed"] == 0:
+        print("✓ PASSED - All commands within token budget")
+    else:
+        print(f"✗ FAILED - {summary['failed']} command(s) exceed token budget")
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Count tokens in command files")
-    parser.add_argument("path", type=Path, help="Path to command file or directory")
+    parser.add_argument(
+        "path", type=Path, nargs="?", help="Path to command file or directory"
+    )
+    parser.add_argument(
+        "--catalog",
+        type=Path,
+        default=None,
+        help="Analyze every installed command for this project directory (NDJSON with --json)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for --catalog (default: CPU count)",
+    )
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     parser.add_argument(
         "--warn-threshold", type=int, default=80, help="Warning threshold percentage (default: 80)"
     )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the on-disk token count cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Token cache directory (default: $PLATXA_CACHE_DIR or .cache/)",
+    )
+    parser.add_argument(
+        "--sections",
+        action="store_true",
+        help="Attribute tokens to frontmatter, headings, code blocks and tables",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Rows shown for --sections and --redundancy (default: 10)",
+    )
+    parser.add_argument(
+        "--resolve",
+        action="store_true",
+        help="Follow @file references and /command chains; gate the per-invocation total",
+    )
+    parser.add_argument(
+        "--project-dir",
+        type=Path,
+        default=Path.cwd(),
+        help="Project the command runs in, for --resolve (default: current directory)",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        default=None,
+        metavar="MESSAGES",
+        help="Compare cumulative command vs skill cost over a conversation of N messages",
+    )
+    parser.add_argument(
+        "--redundancy",
+        action="store_true",
+        help="Report text repeated across references/ (directory mode)",
+    )
+    parser.add_argument(
+        "--encoding-file",
+        type=Path,
+        default=None,
+        help="Local cl100k_base rank file (.bpe or .tiktoken); avoids any download",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Maximum cached counts kept, LRU-evicted (default: {DEFAULT_CACHE_ENTRIES})",
+    )
 
     args = parser.parse_args()
 
-    if args.path.is_dir():
-        report = analyze_directory(args.path, args.warn_threshold)
-    elif args.path.is_file():
-        report = analyze_command_file(args.path, args.warn_threshold)
-    else:
+    if args.encoding_file is not None:
+        if not args.encoding_file.is_file():
+            print(f"Error: Encoding file not found: {args.encoding_file}", file=sys.stderr)
+            return 1
+        # Exported so catalog worker processes pick up the same file
+        os.environ[ENCODING_FILE_ENV] = str(args.encoding_file.resolve())
+    elif os.environ.get(ENCODING_FILE_ENV) and not Path(os.environ[ENCODING_FILE_ENV]).is_file():
+        fallback = "the vendored rank file or tiktoken" if TIKTOKEN_AVAILABLE else "the estimate"
+        print(
+            f"Warning: ${ENCODING_FILE_ENV} is not a file: {os.environ[ENCODING_FILE_ENV]}; "
+            f"using {fallback}",
+            file=sys.stderr,
+        )
+
+    if args.catalog is not None:
+        return run_catalog(args)
+
+    if args.path is None:
+        parser.error("path is required unless --catalog is given")
+
+    if not args.path.exists():
         print(f"Error: Path does not exist: {args.path}", file=sys.stderr)
         return 1
 
+    if args.simulate is not None and args.simulate < 1:
+        parser.error("--simulate needs at least 1 message")
+
+    if args.redundancy and not args.path.is_dir():
+        parser.error("--redundancy applies to skill directories")
+
+    if args.resolve and args.path.is_dir():
+        parser.error("--resolve applies to command files, not directories")
+
+    cache = None
+    if not args.no_cache:
+        cache = ContentCache("tokens", args.cache_dir, args.cache_max_entries)
+
+    try:
+        if args.path.is_dir():
+            report = analyze_directory(args.path, args.warn_threshold, cache)
+        else:
+            report = analyze_command_file(args.path, args.warn_threshold, cache)
+        invocation = None
+        if args.resolve:
+            invocation = analyze_invocation(args.path, args.project_dir, args.warn_threshold, cache)
+            report["warnings"].extend(invocation["warnings"])
+            report["passed"] = report["passed"] and invocation["passed"]
+    finally:
+        if cache is not None:
+            cache.close()
+
+    sections: list[SectionTokens] = []
+    if args.sections:
+        main_file = args.path / "SKILL.md" if args.path.is_dir() else args.path
+        if main_file.is_file():
+            sections = analyze_sections(main_file)
+
+    redundancy = None
+    if args.redundancy:
+        redundancy = analyze_redundancy(args.path, report["ref_total_tokens"])
+
+    simulation = None
+    if args.simulate is not None:
+        if report["is_directory"]:
+            # Command form: SKILL.md with every reference inlined
+            references = [f["tokens"] for f in report["ref_files"]]
+            command_tokens = report["total_tokens"]
+        elif invocation is not None:
+            # Includes of a converted command become its references
+            references = [f["tokens"] for f in invocation["resolution"]["loaded"][1:]]
+            command_tokens = invocation["invocation_tokens"]
+        else:
+            references = []
+            command_tokens = report["command_tokens"]
+        simulation = simulate_cost(
+            command_tokens, report["command_tokens"], references, args.simulate
+        )
+
     if args.json:
-        print(json.dumps(report, indent=2))
+        output: dict[str, Any] = dict(report)
+        if args.sections:
+            output["sections"] = sections
+        if invocation is not None:
+            output["invocation"] = invocation
+        if redundancy is not None:
+            output["redundancy"] = redundancy
+        if simulation is not None:
+            output["simulation"] = simulation
+        print(json.dumps(output, indent=2))
     else:
-        print_report(report)
+        print_report(report, invocation)
+        if sections:
+            print_sections(sections, args.top)
+        if redundancy is not None:
+            print_redundancy(redundancy, args.top)
+        if simulation is not None:
+            print()
+            print_simulation(simulation)
 
     return 0 if report["passed"] else 1
 
 
+def run_catalog(args: argparse.Namespace) -> int:
+    """Run catalog mode and return the exit code."""
+    if not args.catalog.is_dir():
+        print(f"Error: Not a directory: {args.catalog}", file=sys.stderr)
+        return 1
+
+    records = analyze_catalog(
+        args.catalog,
+        args.warn_threshold,
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        max_entries=args.cache_max_entries,
+    )
+
+    if args.json:
+        summary = summarize_catalog(records, lambda r: print(json.dumps(r)))
+        print(json.dumps({"summary": summary}))
+    else:
+        summary = summarize_catalog(records, print_catalog_record)
+        print_catalog_summary(summary)
+
+    return 0 if summary["failed"] == 0 else 1
+
+
 if __name__ == "__main__":
     sys.exit(main())
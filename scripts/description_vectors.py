@@ -0,0 +1,131 @@
+"""description_vectors.py - TF-IDF cosine similarity of command descriptions.
+
+SequenceMatcher compares descriptions character by character: slow on
+the long SKILL.md descriptions validate-frontmatter.sh allows (up to
+1024 characters) and blind to reworded duplicates ("Run the linters on
+changed files" vs "Lint files that changed"). DescriptionVectors builds
+one sparse TF-IDF vector per description, over the same stopword-free
+words the catalog index uses, and finds every pair whose cosine
+similarity reaches a threshold.
+
+Vectors are stored in CSR form (indptr, indices, data) and normalized,
+so cosine is a dot product. Pairs are computed block by block: a block
+of rows is densified over the vocabulary and multiplied against a
+chunk of sparse rows by gathering the dense columns each nonzero needs
+and summing per row with np.add.reduceat. Block and chunk sizes are
+chosen so no intermediate array exceeds BLOCK_ELEMENTS values, keeping
+memory bounded however large the catalog is.
+
+NumPy is optional. NUMPY_AVAILABLE is False without it, and callers
+fall back to the difflib comparison.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from collections.abc import Sequence
+from typing import Any
+
+from catalog_index import description_words
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None  # type: ignore[assignment]
+    NUMPY_AVAILABLE = False
+
+# Largest intermediate array, in float32 values (4M values = 16 MB)
+BLOCK_ELEMENTS = 1 << 22
+
+
+class DescriptionVectors:
+    """L2-normalized TF-IDF vectors of a list of descriptions."""
+
+    def __init__(self, descriptions: Sequence[str]) -> None:
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("DescriptionVectors requires NumPy")
+
+        counts = [Counter(description_words(d)) for d in descriptions]
+        document_frequency: Counter[str] = Counter()
+        for words in counts:
+            document_frequency.update(words.keys())
+        self.vocabulary = {word: i for i, word in enumerate(sorted(document_frequency))}
+
+        # Smoothed IDF: terms in every description still count a little
+        n = len(descriptions)
+        idf = {
+            word: math.log((1 + n) / (1 + df)) + 1 for word, df in document_frequency.items()
+        }
+
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for words in counts:
+            row = sorted(
+                (self.vocabulary[word], (1 + math.log(tf)) * idf[word])
+                for word, tf in words.items()
+            )
+            norm = math.sqrt(sum(weight * weight for _, weight in row)) or 1.0
+            indices.extend(column for column, _ in row)
+            data.extend(weight / norm for _, weight in row)
+            indptr.append(len(indices))
+
+        self.indptr: Any = np.asarray(indptr, dtype=np.int64)
+        self.indices: Any = np.asarray(indices, dtype=np.int64)
+        self.data: Any = np.asarray(data, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def _dense(self, start: int, stop: int) -> Any:
+        """Rows start..stop as a dense (rows x vocabulary) array."""
+        block = np.zeros((stop - start, max(1, len(self.vocabulary))), dtype=np.float32)
+        lo, hi = self.indptr[start], self.indptr[stop]
+        rows = np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1]))
+        block[rows, self.indices[lo:hi]] = self.data[lo:hi]
+        return block
+
+    def _dot(self, block: Any, start: int, stop: int) -> Any:
+        """Dot products of dense block rows with sparse rows start..stop."""
+        lo, hi = self.indptr[start], self.indptr[stop]
+        result = np.zeros((block.shape[0], stop - start), dtype=np.float32)
+        if hi == lo:
+            return result
+        products = block[:, self.indices[lo:hi]] * self.data[lo:hi]
+        offsets = self.indptr[start:stop] - lo
+        # reduceat on an empty row would return the next row's first value
+        nonempty = np.diff(self.indptr[start:stop + 1]) > 0
+        result[:, nonempty] = np.add.reduceat(products, offsets[nonempty], axis=1)
+        return result
+
+    def similar_pairs(
+        self, threshold: float, first: int = 0, last: int | None = None
+    ) -> list[tuple[int, int, float]]:
+        """Return (i, j, cosine) for every pair i < j with cosine >= threshold.
+
+        first and last restrict i to rows first..last, so disjoint row
+        ranges can be searched independently.
+        """
+        n = len(self)
+        last = n if last is None else min(n, last)
+        vocabulary = max(1, len(self.vocabulary))
+        block_rows = max(1, min(n, BLOCK_ELEMENTS // vocabulary))
+        row_nnz = max(1, int(np.diff(self.indptr).max(initial=1)))
+        pairs: list[tuple[int, int, float]] = []
+
+        for start in range(first, last, block_rows):
+            stop = min(last, start + block_rows)
+            block = self._dense(start, stop)
+            # Chunks of sparse rows sized so block x chunk nonzeros stays bounded
+            chunk_rows = max(1, BLOCK_ELEMENTS // ((stop - start) * row_nnz))
+            for chunk in range(start, n, chunk_rows):
+                chunk_stop = min(n, chunk + chunk_rows)
+                sims = self._dot(block, chunk, chunk_stop)
+                for r, c in zip(*np.nonzero(sims >= threshold), strict=True):
+                    i, j = start + int(r), chunk + int(c)
+                    if i < j:
+                        pairs.append((i, j, float(sims[r, c])))
+        return sorted(pairs)
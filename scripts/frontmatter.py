@@ -0,0 +1,105 @@
+"""frontmatter.py - Bounded YAML frontmatter reader shared by the Python tools.
+
+Matching r"^---\\s*\\n(.*?)\\n---" against a whole file reads every byte
+of it, and scans the entire body when the closing delimiter is missing,
+though only the first few hundred bytes are frontmatter. These helpers
+walk a file or string line by line from the opening ``---`` and stop
+at the closing ``---`` line, or give up once MAX_FRONTMATTER_BYTES have
+been consumed. read_frontmatter() reads through one small buffered file
+object, so metadata-only callers do a single short read per file.
+
+Both readers return the frontmatter text (None when there is none) and
+the offset where the body starts, in bytes for files and characters
+for strings (0 when there is no frontmatter).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import AnyStr
+
+# Frontmatter longer than this is treated as missing
+MAX_FRONTMATTER_BYTES = 64 * 1024
+# Buffer for file reads: one read covers typical frontmatter
+HEAD_BYTES = 4096
+
+
+def is_delimiter(line: str | bytes) -> bool:
+    """True for a ``---`` line (trailing whitespace and line ending allowed)."""
+    stripped = line.rstrip()
+    return stripped == "---" or stripped == b"---"
+
+
+def _delimited(lines: Iterable[AnyStr], max_bytes: int) -> tuple[list[AnyStr], int] | None:
+    """Consume lines through the closing delimiter.
+
+    Returns (frontmatter lines, length consumed including both
+    delimiters), or None if lines do not open with a delimiter or no
+    closing one comes within max_bytes.
+    """
+    it = iter(lines)
+    first = next(it, None)
+    if first is None or not is_delimiter(first):
+        return None
+    consumed = len(first)
+    inner: list[AnyStr] = []
+    for line in it:
+        consumed += len(line)
+        if is_delimiter(line):
+            return inner, consumed
+        if consumed > max_bytes:
+            return None
+        inner.append(line)
+    return None
+
+
+def _text_lines(text: str) -> Iterator[str]:
+    """Lines of text with their newlines, produced lazily."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start) + 1 or len(text)
+        yield text[start:end]
+        start = end
+
+
+def split_frontmatter(
+    text: str, max_bytes: int = MAX_FRONTMATTER_BYTES
+) -> tuple[str | None, int]:
+    """Return (frontmatter, body offset) of text already in memory."""
+    found = _delimited(_text_lines(text), max_bytes)
+    if found is None:
+        return None, 0
+    inner, offset = found
+    return "".join(inner).rstrip("\r\n"), offset
+
+
+def read_frontmatter(
+    path: Path, max_bytes: int = MAX_FRONTMATTER_BYTES
+) -> tuple[str | None, int]:
+    """Return (frontmatter, body byte offset) of a file, reading only its head.
+
+    Raises OSError if the file cannot be read.
+    """
+    with path.open("rb", buffering=HEAD_BYTES) as f:
+        # Bounded reads: a huge first line cannot be pulled in whole
+        found = _delimited(iter(lambda: f.readline(max_bytes + 1), b""), max_bytes)
+    if found is None:
+        return None, 0
+    inner, offset = found
+    return b"".join(inner).decode(errors="replace").replace("\r\n", "\n").rstrip("\n"), offset
+
+
+def frontmatter_fields(frontmatter: str) -> dict[str, str]:
+    """Top-level ``key: value`` pairs of frontmatter (the last of repeated keys wins, as in YAML).
+
+    Values are stripped strings; nested and multi-line YAML values are
+    not interpreted.
+    """
+    fields: dict[str, str] = {}
+    for line in frontmatter.splitlines():
+        if not line or line[0].isspace() or ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        fields[key.strip()] = value.strip()
+    return fields
@@ -0,0 +1,132 @@
+"""linear_pattern.py - Rule patterns matched without backtracking over ``.*``.
+
+Rules such as ``curl.*\\| *bash`` read as "curl, then later on the line
+a pipe into bash". Python's re matches them by backtracking: at every
+``curl`` the ``.*`` runs to the end of the line and gives characters
+back one at a time looking for the pipe, so a long line full of
+``curl`` and no pipe costs time quadratic in its length, and a
+minified file can stall a validator for minutes.
+
+LinearPattern splits a pattern at its top-level ``|`` into
+alternatives, and each alternative at its top-level ``.*`` into
+segments. An alternative matches a line when its segments occur in
+order without overlapping, which is checked with one forward search
+per segment, each starting where the previous one ended. The earliest
+occurrence of a segment is always the best place to continue from, so
+no position is tried twice and the cost is linear in the line for the
+bounded segments rules use. The match starts where the first segment
+of the leftmost matching alternative does, the same column re.search()
+reports.
+
+A line too long to hold at once can be searched in consecutive pieces
+with search_piece(): each alternative's progress (segments matched so
+far, where the match started, where the next segment may begin) is
+carried from piece to piece, so the ``.*`` between two segments may
+span any number of pieces. Pieces must overlap by at least the longest
+single segment match for a segment crossing a boundary to be found.
+
+``.*`` inside a group or character class is left to re; no shipped
+rule has one.
+"""
+
+from __future__ import annotations
+
+import re
+
+_WILDCARD = ".*"
+
+
+def split_top_level(pattern: str, separator: str) -> list[str]:
+    """Split pattern at separator outside groups, classes and escapes."""
+    parts: list[str] = []
+    depth = 0
+    in_class = False
+    start = i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            # A ] right after [ or [^ is a literal member
+            if pattern.startswith("]", i + 1):
+                i += 1
+            elif pattern.startswith("^]", i + 1):
+                i += 2
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and pattern.startswith(separator, i):
+            parts.append(pattern[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+class LinearPattern:
+    """A regex evaluated as ordered segments, one forward search each."""
+
+    def __init__(self, pattern: str, flags: int = 0) -> None:
+        self.pattern = pattern
+        self.alternatives = [
+            [re.compile(segment, flags) for segment in split_top_level(alternative, _WILDCARD)]
+            for alternative in split_top_level(pattern, "|")
+        ]
+
+    def anchors(self) -> list[re.Pattern[str]]:
+        """First segment of each alternative: no match is possible without one."""
+        return [segments[0] for segments in self.alternatives]
+
+    def search(self, line: str) -> int:
+        """Column (0-based) of the leftmost match in a single line, or -1."""
+        best = -1
+        for segments in self.alternatives:
+            first = segments[0].search(line)
+            if first is None or (best >= 0 and first.start() >= best):
+                continue
+            end = first.end()
+            for segment in segments[1:]:
+                match = segment.search(line, end)
+                if match is None:
+                    break
+                end = match.end()
+            else:
+                best = first.start()
+        return best
+
+    def start_progress(self) -> list[list[int]]:
+        """Fresh progress for search_piece(): [segments matched, start, resume] per alternative."""
+        return [[0, -1, 0] for _ in self.alternatives]
+
+    def search_piece(self, piece: str, offset: int, progress: list[list[int]]) -> int:
+        """Continue a search over the next piece of a line, which starts at column offset.
+
+        Returns the column (0-based, in the whole line) of the leftmost
+        alternative completed by this piece, or -1. An alternative is
+        reported once; progress is updated in place.
+        """
+        best = -1
+        for segments, state in zip(self.alternatives, progress, strict=True):
+            matched, start, resume = state
+            if matched == len(segments):
+                continue
+            position = max(resume - offset, 0)
+            while matched < len(segments):
+                match = segments[matched].search(piece, position)
+                if match is None:
+                    break
+                if matched == 0:
+                    start = offset + match.start()
+                position = match.end()
+                matched += 1
+            state[:] = [matched, start, offset + position]
+            if matched == len(segments) and (best < 0 or start < best):
+                best = start
+        return best
@@ -0,0 +1,130 @@
+"""name_index.py - Exact candidate index for fuzzy command-name matching.
+
+check-duplicates.py flags two names as similar when the SequenceMatcher
+ratio of their normalized forms, 2*M / (len(a) + len(b)) with M the
+number of matched characters, reaches a threshold (0.85). NameIndex
+stores each normalized name once, bucketed by length and in a padded
+trigram inverted index, and returns only names that can still reach the
+threshold. Two upper bounds prune before any SequenceMatcher call:
+
+- Length: M <= min(len(a), len(b)), so lengths too far apart can never
+  reach the threshold; those buckets are never visited.
+- Trigrams: the matched characters form a common subsequence of length
+  at least m = ceil(t * (len(a) + len(b)) / 2). Deleting a character
+  from a padded string creates at most 2 trigrams the original lacks,
+  so the subsequence's m + 2 trigrams include at least
+  m + 2 - 2 * (len(a) + len(b) - 2m) present in both a and b (counted
+  with multiplicity). Names sharing fewer are skipped. Only the rarest
+  trigrams of the target are looked up (prefix filtering): enough that
+  a name missing all of them cannot reach the needed overlap.
+
+Both bounds only ever discard pairs whose ratio is provably below the
+threshold, so results are identical to comparing every pair.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+
+Q = 3
+# Padding characters that cannot occur in a command name
+_PAD_START = "\x02" * (Q - 1)
+_PAD_END = "\x03" * (Q - 1)
+
+
+def trigrams(normalized: str) -> Counter[str]:
+    """Padded trigram multiset of a normalized name (len + 2 trigrams)."""
+    padded = f"{_PAD_START}{normalized}{_PAD_END}"
+    return Counter(padded[i:i + Q] for i in range(len(padded) - Q + 1))
+
+
+def min_matches(total: int, threshold: float) -> int:
+    """Fewest matched characters M with 2*M / total >= threshold."""
+    # Rounded down slightly so float error can only keep a candidate
+    return max(0, math.ceil(threshold * total / 2 - 1e-9))
+
+
+def length_bounds(length: int, threshold: float) -> tuple[int, int]:
+    """(shortest, longest) name that can reach threshold against length."""
+    if threshold <= 0:
+        return 0, sys.maxsize
+    low = math.ceil(length * threshold / (2 - threshold) - 1e-9)
+    high = math.floor(length * (2 - threshold) / threshold + 1e-9)
+    return max(0, low), high
+
+
+class NameIndex:
+    """Length buckets and trigram postings over pre-normalized names.
+
+    Ids are positions in the iterable passed to the constructor, so the
+    index lines up with the (name, description, path) list it was built
+    from.
+    """
+
+    def __init__(self, normalized: Iterable[str]) -> None:
+        self.normalized = list(normalized)
+        self._grams = [trigrams(name) for name in self.normalized]
+        self._keys = [frozenset(grams) for grams in self._grams]
+        self._by_length: dict[int, list[int]] = defaultdict(list)
+        # length -> trigram -> ids of names of that length containing it
+        self._postings: dict[int, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+        self._frequency: Counter[str] = Counter()
+        for i, (name, grams) in enumerate(zip(self.normalized, self._grams, strict=True)):
+            self._by_length[len(name)].append(i)
+            postings = self._postings[len(name)]
+            for gram in grams:
+                postings[gram].append(i)
+            self._frequency.update(grams.keys())
+
+    def __len__(self) -> int:
+        return len(self.normalized)
+
+    def lookup(self, normalized: str, threshold: float) -> list[int]:
+        """Return ids of names that can reach threshold, in id order."""
+        length = len(normalized)
+        low, high = length_bounds(length, threshold)
+        grams = trigrams(normalized)
+        size = sum(grams.values())
+        # Without repeated trigrams in the target, the multiset overlap is
+        # the size of the key intersection, computed in C
+        repeated = len(grams) != size
+        keys = frozenset(grams)
+        # Rarest trigrams first, so the probed postings are short
+        order = sorted(keys, key=lambda g: self._frequency.get(g, 0))
+
+        found: list[int] = []
+        for other, ids in self._by_length.items():
+            if not low <= other <= high:
+                continue
+            total = length + other
+            m = min_matches(total, threshold)
+            need = m + Q - 1 - (Q - 1) * (total - 2 * m)
+            if need <= 0:
+                # Nothing to prune on trigrams: every name of this length qualifies
+                found.extend(ids)
+                continue
+
+            # Prefix filter: probe the rarest trigrams until the unprobed
+            # ones alone cannot reach need, so every qualifying name shares
+            # at least one probed trigram.
+            postings = self._postings[other]
+            unprobed = size
+            candidates: set[int] = set()
+            for gram in order:
+                if unprobed < need:
+                    break
+                candidates.update(postings.get(gram, ()))
+                unprobed -= grams[gram]
+
+            if repeated:
+                found.extend(
+                    i
+                    for i in candidates
+                    if sum(min(count, self._grams[i][g]) for g, count in grams.items()) >= need
+                )
+            else:
+                found.extend(i for i in candidates if len(keys & self._keys[i]) >= need)
+        return sorted(found)
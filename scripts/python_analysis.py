@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""python_analysis.py - One ast pass per Python script: syntax and dangerous calls.
+
+Usage: python_analysis.py <script-or-directory>... [--jobs N]
+                          [--no-cache] [--cache-dir DIR] [--cache-max-entries N]
+
+validate-all.sh used to start one ``python3 -m py_compile`` per script,
+and security-check.sh then matched the same files against regexes that
+also fire on comments, strings and longer names ending in a flagged
+call's name. Here each script is parsed once with ast and compiled
+from the tree (so the errors py_compile reports, including those found
+after parsing, are caught), and the tree is walked for calls:
+
+- PY001 os.system, PY004 eval, PY005 exec, PY006 __import__,
+  PY007 pickle.load/loads
+- PY002 subprocess.call, PY003 subprocess.Popen and PY012 the other
+  subprocess runners, when passed shell= anything but a literal False
+- PY008 yaml.load without a safe Loader
+- PY009 os.remove/unlink, PY010 shutil.rmtree with a literal path
+  containing ``/``, PY011 open of a literal path under /etc/
+
+Call names are resolved through the script's imports, so ``import
+subprocess as sp`` and ``from os import system`` are followed. The rule
+IDs are those of security-rules.tsv; security_scan.py uses this
+analysis for AST_RULES and its regexes for every other rule, and for
+the AST rules too when a script does not parse.
+
+Analyses are cached (content_cache.py, namespace "python") by content
+hash, interpreter version and ANALYSIS_VERSION, and security_scan.py
+reads and fills the same entries, so a script scanned for security is
+not parsed again for the syntax check. As a CLI, this script checks
+every *.py under the given paths over --jobs worker processes, prints
+syntax errors as path:line:column and exits 1 if there are any.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import sys
+import warnings
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TypedDict
+
+from content_cache import ContentCache, content_hash
+
+# Part of every cache key; bump when a change here alters the analysis
+ANALYSIS_VERSION = 1
+CACHE_NAMESPACE = "python"
+# Default bound on cached analyses (LRU-evicted beyond this)
+DEFAULT_CACHE_ENTRIES = 20000
+
+# Calls flagged wherever they appear
+_CALLS = {
+    "os.system": "PY001",
+    "eval": "PY004",
+    "exec": "PY005",
+    "__import__": "PY006",
+    "pickle.load": "PY007",
+    "pickle.loads": "PY007",
+}
+# Calls flagged when shell= is not a literal False
+_SHELL_CALLS = {
+    "subprocess.call": "PY002",
+    "subprocess.Popen": "PY003",
+    "subprocess.run": "PY012",
+    "subprocess.check_call": "PY012",
+    "subprocess.check_output": "PY012",
+}
+# Calls flagged when a literal string argument contains the marker
+_PATH_CALLS = {
+    "os.remove": ("PY009", "/"),
+    "os.unlink": ("PY009", "/"),
+    "shutil.rmtree": ("PY010", "/"),
+    "open": ("PY011", "/etc/"),
+}
+_SAFE_YAML_LOADERS = frozenset({"SafeLoader", "CSafeLoader", "BaseLoader", "CBaseLoader"})
+
+# Rules decided by this analysis when a script parses
+AST_RULES = frozenset(
+    {*_CALLS.values(), *_SHELL_CALLS.values(), *(rule for rule, _ in _PATH_CALLS.values())}
+    | {"PY008"}
+)
+
+
+class SyntaxProblem(TypedDict):
+    """Where and why a script failed to compile."""
+
+    line: int
+    column: int
+    message: str
+
+
+class PythonAnalysis(TypedDict):
+    """Result of one script's pass: a syntax problem, or the calls found."""
+
+    syntax_error: SyntaxProblem | None
+    # (line, column, rule ID), 1-based, in source order
+    calls: list[tuple[int, int, str]]
+
+
+def analysis_key(digest: str) -> str:
+    """Cache key for the analysis of content with the given content hash."""
+    return f"{digest}:py{sys.version_info[0]}.{sys.version_info[1]}:v{ANALYSIS_VERSION}"
+
+
+class _CallFinder(ast.NodeVisitor):
+    """Collects flagged calls, resolving names through the module's imports."""
+
+    def __init__(self, lines: list[bytes]) -> None:
+        self.lines = lines
+        self.aliases: dict[str, str] = {}
+        self.calls: list[tuple[int, int, str]] = []
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module and not node.level:
+            for alias in node.names:
+                self.aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+    def qualified_name(self, func: ast.expr) -> str | None:
+        """Dotted name a call target refers to, or None if it is not a plain name."""
+        parts: list[str] = []
+        while isinstance(func, ast.Attribute):
+            parts.append(func.attr)
+            func = func.value
+        if not isinstance(func, ast.Name):
+            return None
+        parts.append(self.aliases.get(func.id, func.id))
+        name = ".".join(reversed(parts))
+        return name.removeprefix("builtins.")
+
+    def rule(self, node: ast.Call, name: str) -> str | None:
+        if name in _CALLS:
+            return _CALLS[name]
+        if name in _SHELL_CALLS:
+            for keyword in node.keywords:
+                if keyword.arg == "shell" and not (
+                    isinstance(keyword.value, ast.Constant) and keyword.value.value is False
+                ):
+                    return _SHELL_CALLS[name]
+            return None
+        if name in _PATH_CALLS:
+            rule, marker = _PATH_CALLS[name]
+            literals = (
+                sub.value
+                for arg in [*node.args, *(k.value for k in node.keywords)]
+                for sub in ast.walk(arg)
+                if isinstance(sub, ast.Constant) and isinstance(sub.value, str)
+            )
+            return rule if any(marker in literal for literal in literals) else None
+        if name == "yaml.load":
+            loader = node.args[1] if len(node.args) > 1 else None
+            for keyword in node.keywords:
+                if keyword.arg == "Loader":
+                    loader = keyword.value
+            loader_name = self.qualified_name(loader) if loader is not None else None
+            if loader_name is None or loader_name.rsplit(".", 1)[-1] not in _SAFE_YAML_LOADERS:
+                return "PY008"
+        return None
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = self.qualified_name(node.func)
+        rule = self.rule(node, name) if name is not None else None
+        if rule is not None:
+            # col_offset counts UTF-8 bytes; report characters like the other rules
+            prefix = self.lines[node.lineno - 1][: node.col_offset]
+            column = len(prefix.decode(errors="replace")) + 1
+            self.calls.append((node.lineno, column, rule))
+        self.generic_visit(node)
+
+
+def analyze_source(source: bytes, filename: str = "<script>") -> PythonAnalysis:
+    """Parse and compile source once; report a syntax problem or the flagged calls."""
+    try:
+        # SyntaxWarnings would go to stderr once per process; they do not fail a script
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tree = ast.parse(source, filename)
+            compile(tree, filename, "exec", dont_inherit=True)
+    except SyntaxError as exc:
+        problem = SyntaxProblem(line=exc.lineno or 1, column=exc.offset or 1, message=exc.msg)
+        return PythonAnalysis(syntax_error=problem, calls=[])
+    except (ValueError, RecursionError) as exc:
+        # Null bytes, or nesting too deep for the parser
+        problem = SyntaxProblem(line=1, column=1, message=str(exc) or type(exc).__name__)
+        return PythonAnalysis(syntax_error=problem, calls=[])
+
+    finder = _CallFinder(source.splitlines())
+    # Imports anywhere in the module apply to every call
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            finder.visit(node)
+    finder.visit(tree)
+    return PythonAnalysis(syntax_error=None, calls=sorted(finder.calls))
+
+
+def analyze_file(path: Path) -> PythonAnalysis:
+    """Read and analyze one script."""
+    return analyze_source(path.read_bytes(), str(path))
+
+
+def dump_analysis(analysis: PythonAnalysis) -> str:
+    """Serialize an analysis for the cache."""
+    return json.dumps(analysis)
+
+
+def load_analysis(value: str) -> PythonAnalysis:
+    """Inverse of dump_analysis()."""
+    data = json.loads(value)
+    return PythonAnalysis(
+        syntax_error=data["syntax_error"],
+        calls=[(line, column, rule) for line, column, rule in data["calls"]],
+    )
+
+
+def iter_scripts(paths: list[Path]) -> list[Path]:
+    """Every *.py file given or under the given directories, in sorted order."""
+    found: list[Path] = []
+    for root in paths:
+        if not root.is_dir():
+            found.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            found.extend(Path(dirpath) / name for name in sorted(filenames) if name.endswith(".py"))
+    return found
+
+
+def analyze_files(
+    paths: list[Path], jobs: int = 1, cache: ContentCache | None = None
+) -> Iterator[PythonAnalysis]:
+    """Analyze scripts, yielding results in path order.
+
+    Cached analyses are reused; the rest are parsed over jobs
+    processes, one interpreter for the whole run, and stored.
+    """
+    results: list[PythonAnalysis | None] = [None] * len(paths)
+    keys: list[str | None] = [None] * len(paths)
+    if cache is not None and cache.enabled:
+        for index, path in enumerate(paths):
+            key = analysis_key(content_hash(path.read_bytes()))
+            keys[index] = key
+            cached = cache.get(key)
+            if cached is not None:
+                results[index] = load_analysis(cached)
+
+    misses = [path for path, done in zip(paths, results, strict=True) if done is None]
+    jobs = min(jobs, len(misses))
+    if jobs <= 1:
+        fresh: Iterator[PythonAnalysis] = map(analyze_file, misses)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(jobs)
+        fresh = pool.imap(analyze_file, misses, max(1, len(misses) // (jobs * 4)))
+    try:
+        for result, key in zip(results, keys, strict=True):
+            if result is None:
+                result = next(fresh)
+                if cache is not None and key is not None:
+                    cache.put(key, dump_analysis(result))
+            yield result
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check Python scripts in one ast pass")
+    parser.add_argument("paths", nargs="+", type=Path, help="Scripts or directories")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the on-disk analysis cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Analysis cache directory (default: $PLATXA_CACHE_DIR or .cache/)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Maximum cached analyses kept, LRU-evicted (default: {DEFAULT_CACHE_ENTRIES})",
+    )
+    args = parser.parse_args()
+
+    scripts = iter_scripts(args.paths)
+    cache = None
+    if not args.no_cache:
+        cache = ContentCache(CACHE_NAMESPACE, args.cache_dir, args.cache_max_entries)
+    errors = 0
+    try:
+        for path, analysis in zip(scripts, analyze_files(scripts, args.jobs, cache), strict=True):
+            problem = analysis["syntax_error"]
+            if problem is not None:
+                print(
+                    f"{path}:{problem['line']}:{problem['column']}: "
+                    f"SyntaxError: {problem['message']}",
+                    file=sys.stderr,
+                )
+                errors += 1
+    finally:
+        if cache is not None:
+            cache.close()
+
+    print(f"Checked {len(scripts)} Python script(s): {errors} syntax error(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""ratio_cascade.py - Threshold tests on SequenceMatcher.ratio() with cheap bounds first.
+
+check-duplicates.py only needs to know whether ratio() reaches a
+threshold, and ratio() is the most expensive of difflib's three ratio
+methods. difflib guarantees
+
+    ratio() <= quick_ratio() <= real_quick_ratio()
+
+so a pair whose cheaper bound is already below the threshold can be
+rejected without computing ratio(). RatioCascade tries, in order:
+
+1. length: real_quick_ratio(), 2 * min(len(a), len(b)) / (len(a) + len(b))
+2. quick: quick_ratio(), from the character multisets of both strings
+3. ratio: the full SequenceMatcher(None, a, b).ratio()
+
+The bounds are computed directly (building a SequenceMatcher indexes
+its second string, which is the cost being avoided), with the same
+2.0 * matches / total arithmetic difflib uses. Because division by the
+same total is monotonic in floating point too, a pair is rejected only
+if ratio() would have been below the threshold: results are identical
+to calling ratio() on every pair. Each tier counts the pairs it
+rejected, so the saving can be measured.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+TIERS = ("length", "quick", "ratio")
+
+
+@lru_cache(maxsize=1 << 16)
+def char_counts(text: str) -> Counter[str]:
+    """Character multiset of text (strings recur across many pairs)."""
+    return Counter(text)
+
+
+def _ratio(matches: int, total: int) -> float:
+    # Same formula as difflib._calculate_ratio
+    return 2.0 * matches / total if total else 1.0
+
+
+class RatioCascade:
+    """Decide ratio() >= threshold, computing ratio() only when the bounds allow it."""
+
+    def __init__(self) -> None:
+        self.pairs = 0
+        self.rejected = dict.fromkeys(TIERS, 0)
+
+    def ratio(self, a: str, b: str, threshold: float) -> float | None:
+        """Return SequenceMatcher(None, a, b).ratio() if it reaches threshold, else None."""
+        self.pairs += 1
+        total = len(a) + len(b)
+        if _ratio(min(len(a), len(b)), total) < threshold:
+            self.rejected["length"] += 1
+            return None
+
+        counts_a, counts_b = char_counts(a), char_counts(b)
+        if len(counts_a) > len(counts_b):
+            counts_a, counts_b = counts_b, counts_a
+        common = sum(min(count, counts_b[char]) for char, count in counts_a.items())
+        if _ratio(common, total) < threshold:
+            self.rejected["quick"] += 1
+            return None
+
+        ratio = SequenceMatcher(None, a, b).ratio()
+        if ratio < threshold:
+            self.rejected["ratio"] += 1
+            return None
+        return ratio
+
+    def counts(self) -> tuple[int, dict[str, int]]:
+        """(pairs, rejected per tier), for merging counts from worker processes."""
+        return self.pairs, dict(self.rejected)
+
+    def add(self, pairs: int, rejected: dict[str, int]) -> None:
+        """Add counts reported by another cascade."""
+        self.pairs += pairs
+        for tier, count in rejected.items():
+            self.rejected[tier] += count
+
+    def summary(self) -> str:
+        """One-line report of pairs compared and rejected per tier."""
+        computed = self.pairs - self.rejected["length"] - self.rejected["quick"]
+        return (
+            f"Comparisons: {self.pairs} pairs; rejected by length bound "
+            f"{self.rejected['length']}, by quick_ratio bound {self.rejected['quick']}; "
+            f"ratio() computed {computed}, {self.rejected['ratio']} below threshold"
+        )
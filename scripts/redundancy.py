@@ -0,0 +1,123 @@
+"""redundancy.py - Find text repeated across a tree of markdown files.
+
+Every file is split into whitespace-separated words and shingled into
+overlapping windows of SHINGLE_WORDS words. Each window is hashed with
+a polynomial rolling hash, so moving the window one word costs O(1)
+and the whole corpus is hashed in a single linear pass. A dict from
+shingle hash to its first occurrence then marks every later window that
+repeats earlier text; overlapping marked windows merge into blocks.
+
+The first occurrence (in sorted path order) is treated as the original
+and every later copy as redundant, so the reported blocks are exactly
+the text that could be removed or replaced by a reference. Whitespace
+and line wrapping are ignored; case and punctuation are not.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TypedDict
+
+# Words per shingle: long enough that shared phrasing is not reported,
+# short enough to catch a repeated table row pair or a boilerplate list.
+SHINGLE_WORDS = 12
+
+_WORD = re.compile(r"\S+")
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+
+
+class RedundantBlock(TypedDict):
+    """A run of text that repeats text seen earlier in the tree."""
+
+    path: str
+    start_line: int
+    end_line: int
+    words: int
+    text: str
+    duplicate_of: str
+
+
+def _word_hash(word: str, memo: dict[str, int]) -> int:
+    value = memo.get(word)
+    if value is None:
+        value = memo[word] = hash(word) % _MOD
+    return value
+
+
+def find_redundant_blocks(
+    files: Sequence[tuple[str, str]], shingle_words: int = SHINGLE_WORDS
+) -> list[RedundantBlock]:
+    """Return blocks that repeat earlier text, for (label, text) pairs.
+
+    Runs in time linear in total corpus size: one rolling-hash pass over
+    all words and one pass over the marked windows.
+    """
+    # Shingle hash -> (file index, window start, line) of its first occurrence
+    first_seen: dict[int, tuple[int, int, int]] = {}
+    word_memo: dict[str, int] = {}
+    top = pow(_BASE, shingle_words - 1, _MOD)
+    blocks: list[RedundantBlock] = []
+
+    for file_index, (label, text) in enumerate(files):
+        spans = [m.span() for m in _WORD.finditer(text)]
+        words = [text[start:end] for start, end in spans]
+        if len(words) < shingle_words:
+            continue
+
+        lines: list[int] = []
+        line, previous = 1, 0
+        for start, _ in spans:
+            line += text.count("\n", previous, start)
+            previous = start
+            lines.append(line)
+
+        # (window start, original file, original line) for repeated windows
+        repeats: list[tuple[int, int, int]] = []
+        h = 0
+        for i, word in enumerate(words):
+            if i >= shingle_words:
+                h = (h - _word_hash(words[i - shingle_words], word_memo) * top) % _MOD
+            h = (h * _BASE + _word_hash(word, word_memo)) % _MOD
+            if i < shingle_words - 1:
+                continue
+            start = i - shingle_words + 1
+            origin = first_seen.setdefault(h, (file_index, start, lines[start]))
+            # Ignore overlap with the same run (e.g. a repeated word)
+            if origin[0] != file_index or origin[1] + shingle_words <= start:
+                repeats.append((start, origin[0], origin[2]))
+
+        # Merge overlapping repeated windows into blocks
+        index = 0
+        while index < len(repeats):
+            start, origin_file, origin_line = repeats[index]
+            end = start + shingle_words
+            index += 1
+            while index < len(repeats) and repeats[index][0] <= end:
+                end = repeats[index][0] + shingle_words
+                index += 1
+
+            char_start, char_end = spans[start][0], spans[end - 1][1]
+            blocks.append(
+                RedundantBlock(
+                    path=label,
+                    start_line=lines[start],
+                    end_line=lines[end - 1],
+                    words=end - start,
+                    text=text[char_start:char_end],
+                    duplicate_of=f"{files[origin_file][0]}:{origin_line}",
+                )
+            )
+
+    return blocks
+
+
+def read_tree(root: Path, pattern: str = "*.md") -> list[tuple[str, str]]:
+    """Return (relative path, text) for every matching file, in sorted order."""
+    return [
+        (str(path.relative_to(root)), path.read_text(errors="replace"))
+        for path in sorted(root.rglob(pattern))
+        if path.is_file()
+    ]
@@ -0,0 +1,24 @@
+#!/usr/bin/env bash
+# scan-budget.sh - Scan time budget shared by the shell validators
+#
+# Sourced by security-check.sh and validate-structure.sh. Sets
+# SCAN_BUDGET to $PLATXA_SCAN_BUDGET (default 10) in whole seconds,
+# 0 for no limit, and exits 1 if it is not a number of seconds.
+
+# Seconds in $1 rounded up to a whole number, so 0.5 gives 1 rather than
+# 0 (no limit); fails on anything but a non-negative decimal number
+whole_seconds() {
+    local value="$1" whole
+    [[ "$value" =~ [0-9] ]] || return 1
+    [[ "$value" =~ ^([0-9]*)(\.([0-9]*))?$ ]] || return 1
+    whole=$((10#${BASH_REMATCH[1]:-0}))
+    if [[ "${BASH_REMATCH[3]}" =~ [1-9] ]]; then
+        whole=$((whole + 1))
+    fi
+    echo "$whole"
+}
+
+if ! SCAN_BUDGET=$(whole_seconds "${PLATXA_SCAN_BUDGET:-10}"); then
+    echo -e "${RED:-}Error:${NC:-} PLATXA_SCAN_BUDGET must be seconds: $PLATXA_SCAN_BUDGET" >&2
+    exit 1
+fi
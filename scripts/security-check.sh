@@ -1,11 +1,21 @@
 #!/usr/bin/env bash
 # security-check.sh - Scan command content for security issues
 #
-# Usage: security-check.sh <command-file-or-directory>
+# Usage: security-check.sh <command-file-or-directory> [--jobs N] [--no-cache]
 #
 # Scans markdown files for dangerous patterns that could be executed
 # by the AI agent, including credential leaks, destructive commands,
-# and data exfiltration patterns.
+# and data exfiltration patterns. Rules are read from
+# security-rules.tsv; findings report rule ID, line and column.
+#
+# Runs security_scan.py when python3 is available; it streams files in
+# chunks, with --jobs N spreads a directory scan over N processes, and
+# reuses cached results for files and rules that have not changed
+# (--no-cache to turn that off).
+# Set PLATXA_SECURITY_SHELL=1 to force the grep-based scan below (serial,
+# --jobs is ignored). Both give each file $PLATXA_SCAN_BUDGET seconds
+# (default 10, 0 for no limit) and report a "Scan truncated" warning
+# when it runs out.
 
 set -euo pipefail
 
@@ -29,14 +39,39 @@ warn() {
 }
 
 usage() {
-    echo "Usage: $0 <command-file-or-directory>"
+    echo "Usage: $0 <command-file-or-directory> [--jobs N] [--no-cache]"
     echo ""
     echo "Scan command content for security issues."
+    echo ""
+    echo "Options (with python3; ignored by the shell fallback):"
+    echo "  --jobs N    Scan a directory over N worker processes"
+    echo "  --no-cache  Do not reuse or store cached scan results"
     exit 1
 }
 
-# Argument parsing
-TARGET="${1:-}"
+# Argument parsing: options may come before or after the target, and are
+# all passed on to security_scan.py
+SCAN_ARGS=("$@")
+TARGET=""
+
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        -h|--help)
+            usage
+            ;;
+        --jobs|--budget|--cache-dir|--cache-max-entries)
+            [[ $# -ge 2 ]] || usage
+            shift 2
+            ;;
+        --jobs=*|--budget=*|--cache-dir=*|--cache-max-entries=*|--no-cache)
+            shift
+            ;;
+        *)
+            TARGET="$1"
+            shift
+            ;;
+    esac
+done
 
 if [[ -z "$TARGET" ]]; then
     echo -e "${RED}Error:${NC} Command file or directory required" >&2
@@ -53,109 +88,131 @@ else
 fi
 
 SELF_PATH=$(realpath "${BASH_SOURCE[0]}" 2>/dev/null || echo "")
+SCRIPT_DIR=$(dirname "$SELF_PATH")
+RULES_FILE="$SCRIPT_DIR/security-rules.tsv"
+
+# SCAN_BUDGET: whole seconds per file ($PLATXA_SCAN_BUDGET rounded up, 0
+# for no limit); MAX_LINE_CHARS: characters per line given to bash regexes
+# shellcheck source=scan-budget.sh
+source "$SCRIPT_DIR/scan-budget.sh"
+MAX_LINE_CHARS=4096
+
+# The Python engine scans each file in one pass; this script's own loop
+# below (one grep per rule and file) is the fallback without python3.
+if [[ -z "${PLATXA_SECURITY_SHELL:-}" ]] && command -v python3 >/dev/null 2>&1; then
+    exec python3 "$SCRIPT_DIR/security_scan.py" "${SCAN_ARGS[@]}"
+fi
 
 echo "Security Check: $SCAN_NAME"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 
-# Pattern definitions
-
-CREDENTIAL_PATTERNS=(
-    'password\s*='
-    'passwd\s*='
-    'api_key\s*='
-    'apikey\s*='
-    'secret\s*='
-    'token\s*='
-    'AWS_ACCESS_KEY'
-    'AWS_SECRET'
-    'GITHUB_TOKEN'
-    'ANTHROPIC_API_KEY'
-    'OPENAI_API_KEY'
-)
-
-MARKDOWN_DANGEROUS=(
-    'curl.*\| *sh'
-    'curl.*\| *bash'
-    'wget.*\| *sh'
-    'wget.*\| *bash'
-    'eval\s*"?\$\('
-    'rm -rf /'
-    'rm -rf /\*'
-    ':(){:|:&};:'
-    'mkfs\.'
-    'dd if=/dev/'
-    '> /dev/sd'
-    'chmod -R 777 /'
-    'base64\s+-d.*\|\s*bash'
-    'base64\s+--decode.*\|\s*bash'
-    'python[23]?\s+-c.*__import__'
-    'nc\s+-[el]'
-    'bash\s+-i\s+>&\s*/dev/tcp'
-    '/dev/tcp/'
-    'nohup.*&'
-)
-
-EXFIL_PATTERNS=(
-    'curl.*-d\s*@'
-    'curl.*--data.*@'
-    'curl.*--upload-file'
-    'wget.*--post-file'
-    'cat.*/etc/(passwd|shadow|hosts)'
-    '\$\(cat\s+/etc/'
-    '\$\(cat\s+(~|\$HOME)/\.'
-    'base64.*</etc/'
-)
+# Rules: one tab-separated line per rule, shared with security_scan.py
+RULE_IDS=()
+RULE_KINDS=()
+RULE_LEVELS=()
+RULE_FLAGS=()
+RULE_MESSAGES=()
+RULE_PATTERNS=()
+
+while IFS=$'\t' read -r rule_id kinds level flags message pattern; do
+    [[ -z "$rule_id" || "$rule_id" == \#* ]] && continue
+    RULE_IDS+=("$rule_id")
+    RULE_KINDS+=("$kinds")
+    RULE_LEVELS+=("$level")
+    RULE_FLAGS+=("$flags")
+    RULE_MESSAGES+=("$message")
+    RULE_PATTERNS+=("$pattern")
+done < "$RULES_FILE"
+
+# True if the allow: rules for KIND exempt RULE_ID on LINE
+allowed() {
+    local kind="$1" rule_id="$2" line="$3" j
+    for j in "${!RULE_IDS[@]}"; do
+        [[ "${RULE_LEVELS[$j]}" == allow:* ]] || continue
+        [[ ",${RULE_KINDS[$j]}," == *",$kind,"* ]] || continue
+        [[ "$rule_id" == "${RULE_LEVELS[$j]#allow:}"* ]] || continue
+        if [[ "$line" =~ ${RULE_PATTERNS[$j]} ]]; then
+            return 0
+        fi
+    done
+    return 1
+}
 
-# Phase 1: Scan markdown files
-echo ""
-echo "Phase 1: Scanning markdown files for malicious patterns..."
-echo ""
+# Run a command for at most $1 seconds where timeout(1) exists (exit 124 if cut off)
+bounded() {
+    local seconds="$1"
+    shift
+    if command -v timeout >/dev/null 2>&1; then
+        timeout "$seconds" "$@"
+    else
+        "$@"
+    fi
+}
 
-scan_markdown_file() {
-    local mdfile="$1"
-    local md_rel="$2"
-    local content
-    content=$(<"$mdfile")
+# Scan FILE (shown as DISPLAY) with every rule for KIND: one grep per rule,
+# within SCAN_BUDGET seconds; bash regexes only see MAX_LINE_CHARS per line
+scan_file() {
+    local file="$1" display="$2" kind="$3" nosec='# nosec' i hit number line prefix grep_flags
+    local location finding hits status deadline=$((SECONDS + SCAN_BUDGET))
 
-    # Skip files with nosec directive
-    if echo "$content" | grep -q '<!-- nosec -->'; then
-        echo "Skipping: $md_rel (nosec directive)"
+    [[ "$kind" == md ]] && nosec='<!-- nosec -->'
+    if grep -qF -- "$nosec" "$file"; then
+        echo "Skipping: $display (nosec directive)"
         return
     fi
 
-    for pattern in "${MARKDOWN_DANGEROUS[@]}"; do
-        if echo "$content" | grep -qE "$pattern"; then
-            error "$md_rel: Dangerous agent instruction: $pattern"
+    for i in "${!RULE_IDS[@]}"; do
+        [[ "${RULE_LEVELS[$i]}" == allow:* ]] && continue
+        [[ ",${RULE_KINDS[$i]}," == *",$kind,"* ]] || continue
+        grep_flags=-nE
+        [[ "${RULE_FLAGS[$i]}" == *i* ]] && grep_flags=-niE
+        status=0
+        if ((SCAN_BUDGET <= 0)); then
+            hits=$(grep "$grep_flags" -- "${RULE_PATTERNS[$i]}" "$file" 2>/dev/null) || status=$?
+        elif ((SECONDS < deadline)); then
+            hits=$(bounded "$((deadline - SECONDS))" \
+                grep "$grep_flags" -- "${RULE_PATTERNS[$i]}" "$file" 2>/dev/null) || status=$?
+        else
+            status=124
         fi
-    done
-
-    for pattern in "${EXFIL_PATTERNS[@]}"; do
-        if echo "$content" | grep -qE "$pattern"; then
-            error "$md_rel: Possible data exfiltration pattern: $pattern"
+        if [[ $status -eq 124 ]]; then
+            warn "$display:1:1: [SCAN] Scan truncated: time budget of ${SCAN_BUDGET}s exceeded"
+            return
         fi
-    done
-
-    for pattern in "${CREDENTIAL_PATTERNS[@]}"; do
-        if echo "$content" | grep -qiE "$pattern"; then
-            match_line=$(echo "$content" | grep -iE "$pattern" | head -1)
-            if [[ ! "$match_line" =~ \<.*\> ]] && \
-               [[ ! "$match_line" =~ \{.*\} ]] && \
-               [[ ! "$match_line" =~ your_ ]] && \
-               [[ ! "$match_line" =~ YOUR_ ]] && \
-               [[ ! "$match_line" =~ os\.environ ]] && \
-               [[ ! "$match_line" =~ \$\{ ]] && \
-               [[ ! "$match_line" =~ getenv ]]; then
-                warn "$md_rel: Possible hardcoded credential: $pattern"
+        [[ $status -eq 0 ]] || continue
+        while IFS= read -r hit; do
+            number="${hit%%:*}"
+            line="${hit#*:}"
+            line="${line:0:MAX_LINE_CHARS}"
+            allowed "$kind" "${RULE_IDS[$i]}" "$line" && continue
+            # Column of the first match, when it lies within the capped line
+            location="$number"
+            [[ "${RULE_FLAGS[$i]}" == *i* ]] && shopt -s nocasematch
+            if [[ "$line" =~ ${RULE_PATTERNS[$i]} ]]; then
+                prefix="${line%%"${BASH_REMATCH[0]}"*}"
+                location="$number:$((${#prefix} + 1))"
             fi
-        fi
+            shopt -u nocasematch
+            finding="$display:$location: [${RULE_IDS[$i]}] ${RULE_MESSAGES[$i]}: ${RULE_PATTERNS[$i]}"
+            if [[ "${RULE_LEVELS[$i]}" == error ]]; then
+                error "$finding"
+            else
+                warn "$finding"
+            fi
+        done <<< "$hits"
     done
 }
 
+# Phase 1: Scan markdown files
+echo ""
+echo "Phase 1: Scanning markdown files for malicious patterns..."
+echo ""
+
 if $IS_DIR; then
     while IFS= read -r -d '' mdfile; do
         md_rel="${mdfile#"$TARGET"/}"
-        scan_markdown_file "$mdfile" "$md_rel"
-    done < <(find "$TARGET" -name "*.md" -type f -print0 2>/dev/null)
+        scan_file "$mdfile" "$md_rel" md
+    done < <(find "$TARGET" -name "*.md" -type f -print0 2>/dev/null | sort -z)
 
     # Phase 2: Scan scripts if directory mode
     SCRIPTS_DIR="$TARGET/scripts"
@@ -166,95 +223,24 @@ if $IS_DIR; then
             echo "Phase 2: Scanning $SCRIPT_COUNT script(s)..."
             echo ""
 
-            BASH_DANGEROUS=(
-                'rm -rf /'
-                'rm -rf /\*'
-                'rm -rf ~'
-                'rm -rf $HOME'
-                ':(){:|:&};:'
-                'mkfs\.'
-                'dd if=/dev/zero'
-                'dd if=/dev/random'
-                '> /dev/sda'
-                'chmod -R 777 /'
-                'chmod 777 /'
-                'wget.*\| *sh'
-                'curl.*\| *sh'
-                'curl.*\| *bash'
-                'wget.*\| *bash'
-                '\$\(.*\)\s*>\s*/etc/'
-                'eval "\$\('
-                'sudo\s+rm'
-                'sudo\s+chmod'
-            )
-
-            PYTHON_DANGEROUS=(
-                'os\.system\('
-                'subprocess\.call\(.*shell=True'
-                'subprocess\.Popen\(.*shell=True'
-                'eval\('
-                'exec\('
-                '__import__\('
-                'pickle\.loads?\('
-                'yaml\.load\([^,]*\)'
-                'os\.remove\(.*/'
-                'shutil\.rmtree\(.*/'
-                'open\(.*/etc/'
-            )
-
             while IFS= read -r -d '' script; do
                 script_name=$(basename "$script")
 
-                # Skip self
-                if [[ -n "$SELF_PATH" ]] && [[ "$(realpath "$script" 2>/dev/null)" == "$SELF_PATH" ]]; then
+                # Skip the scanner itself
+                if [[ "$(realpath "$script" 2>/dev/null)" == "$SELF_PATH" ]] || \
+                   [[ "$(realpath "$script" 2>/dev/null)" == "$SCRIPT_DIR/security_scan.py" ]]; then
                     echo "Skipping: $script_name (security scanner)"
                     continue
                 fi
 
                 echo "Checking: $script_name"
-                content=$(<"$script")
-
-                if echo "$content" | grep -q '# nosec'; then
-                    echo "Skipping: $script_name (nosec directive)"
-                    continue
-                fi
-
-                if [[ "$script" == *.sh ]]; then
-                    for pattern in "${BASH_DANGEROUS[@]}"; do
-                        if echo "$content" | grep -qE "$pattern"; then
-                            error "$script_name: Dangerous pattern found: $pattern"
-                        fi
-                    done
-                fi
-
-                if [[ "$script" == *.py ]]; then
-                    for pattern in "${PYTHON_DANGEROUS[@]}"; do
-                        if echo "$content" | grep -qE "$pattern"; then
-                            match_line=$(echo "$content" | grep -E "$pattern" | head -1)
-                            if [[ ! "$match_line" =~ ^[[:space:]]*# ]]; then
-                                error "$script_name: Dangerous pattern found: $pattern"
-                            fi
-                        fi
-                    done
-                fi
-
-                for pattern in "${CREDENTIAL_PATTERNS[@]}"; do
-                    if echo "$content" | grep -qiE "$pattern"; then
-                        match_line=$(echo "$content" | grep -iE "$pattern" | head -1)
-                        if [[ ! "$match_line" =~ os\.environ ]] && \
-                           [[ ! "$match_line" =~ \$\{ ]] && \
-                           [[ ! "$match_line" =~ getenv ]]; then
-                            warn "$script_name: Possible hardcoded credential: $pattern"
-                        fi
-                    fi
-                done
-
-            done < <(find "$SCRIPTS_DIR" \( -name "*.sh" -o -name "*.py" \) -type f -print0 2>/dev/null)
+                scan_file "$script" "${script#"$TARGET"/}" "${script##*.}"
+            done < <(find "$SCRIPTS_DIR" \( -name "*.sh" -o -name "*.py" \) -type f -print0 2>/dev/null | sort -z)
         fi
     fi
 else
     # Single file mode
-    scan_markdown_file "$TARGET" "$SCAN_NAME"
+    scan_file "$TARGET" "$SCAN_NAME" md
 fi
 
 # Summary
@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+"""security_scan.py - Single-pass security scanner for commands, skills and scripts.
+
+Usage: security_scan.py <command-file-or-directory> [--jobs N] [--budget SECONDS]
+                        [--no-cache] [--cache-dir DIR] [--cache-max-entries N]
+
+The patterns live in security-rules.tsv, shared with security-check.sh
+(which runs this scanner when python3 is available). Each rule is
+matched with a LinearPattern (linear_pattern.py), which handles the
+``.*`` in rules like ``curl.*\\| *bash`` with forward searches instead
+of backtracking, so matching time grows linearly with line length.
+For each file kind (md, sh, py) a prefilter, the alternation of every
+rule's leading segment, is searched once over each block of text;
+most files have no hit and are done after this pass, and only lines
+it flags are matched against the rules.
+
+Findings carry rule ID, line and column. allow:PREFIX rules drop hits
+of matching rules on lines they match (placeholders and environment
+lookups for credentials, comment lines in Python). A file containing
+``<!-- nosec -->`` (markdown) or ``# nosec`` (scripts) is skipped.
+
+Python scripts that parse get the call rules in AST_RULES from
+python_analysis.py instead, so comments, strings and names that merely
+contain a call do not match and imported aliases do. The analysis is
+cached in the "python" namespace, where the syntax check in
+validate-all.sh finds it; a script that does not parse is matched
+against every regex rule.
+
+Files are streamed in CHUNK_BYTES reads rather than loaded whole.
+Complete lines are scanned as each chunk arrives. A line longer than a
+chunk is scanned in pieces, each re-reading the last OVERLAP_CHARS of
+the one before, so a match crossing a chunk boundary is still found
+(hits in the overlap are reported once). Files with a NUL byte in
+their first chunk are skipped as binary.
+
+Each file gets a time budget (--budget, $PLATXA_SCAN_BUDGET), and
+only the first MAX_FILE_BYTES of a file and MAX_LINE_CHARS of a line
+are scanned. Where any limit stops a scan, a "Scan truncated" warning
+(rule SCAN) names the line and the limit, so a hostile or minified
+file cannot hang CI or pass unnoticed.
+
+Results are cached on disk (content_cache.py) per file, keyed by the
+content hash, file kind, a hash of security-rules.tsv, SCANNER_VERSION
+and the size limits, so unchanged files cost one hash and one lookup and
+any rule edit invalidates every entry. Scans cut short by the time
+budget are not cached. --no-cache turns the cache off;
+--cache-max-entries bounds it with least-recently-used eviction.
+
+Scanning mirrors security-check.sh: a single file is scanned as
+markdown; a directory has every *.md file scanned and, if it has a
+scripts/ directory, every *.sh and *.py file under it. In directory
+mode the files are spread over --jobs worker processes; results are
+collected in sorted file order, so the output does not depend on the
+number of jobs. Exit codes: 0 = no errors (warnings allowed),
+1 = security issues found.
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections.abc import Iterator
+from functools import cache, partial
+from pathlib import Path
+from typing import BinaryIO, TypedDict
+
+from content_cache import ContentCache, content_hash, content_hasher
+from linear_pattern import LinearPattern
+from python_analysis import (
+    ANALYSIS_VERSION,
+    AST_RULES,
+    PythonAnalysis,
+    analysis_key,
+    analyze_source,
+    dump_analysis,
+    load_analysis,
+)
+from python_analysis import CACHE_NAMESPACE as ANALYSIS_NAMESPACE
+
+RULES_FILE = Path(__file__).with_name("security-rules.tsv")
+KINDS = {".md": "md", ".sh": "sh", ".py": "py"}
+NOSEC = {"md": "<!-- nosec -->", "sh": "# nosec", "py": "# nosec"}
+# The scanner itself spells out every pattern it looks for
+SCANNER_FILES = frozenset({"security-check.sh", "security_scan.py"})
+
+# Bytes read per chunk; a line longer than this is scanned in pieces
+CHUNK_BYTES = 64 * 1024
+# Characters of a long line re-scanned with the next piece
+OVERLAP_CHARS = 4096
+# Bytes scanned per file; the rest of a larger file is reported as not scanned
+MAX_FILE_BYTES = 8 * 1024 * 1024
+# Characters scanned per line; the rest of a longer line is reported as not scanned
+MAX_LINE_CHARS = 1024 * 1024
+# Seconds of matching per file before the rest is reported as not scanned
+SCAN_BUDGET = 10.0
+SCAN_BUDGET_ENV = "PLATXA_SCAN_BUDGET"
+# Rule ID of the finding recorded where a scan stopped early
+TRUNCATED = "SCAN"
+
+# Part of every cache key; bump when a change to this scanner alters the
+# findings for the same content and rules
+SCANNER_VERSION = 2
+CACHE_NAMESPACE = "security"
+# Default bound on cached scan results (LRU-evicted beyond this)
+DEFAULT_CACHE_ENTRIES = 20000
+
+RED = "\033[0;31m"
+GREEN = "\033[0;32m"
+YELLOW = "\033[1;33m"
+NC = "\033[0m"
+RULE = "━" * 40
+
+
+class Rule(TypedDict):
+    """One line of security-rules.tsv."""
+
+    id: str
+    kinds: tuple[str, ...]
+    level: str
+    flags: str
+    message: str
+    pattern: str
+
+
+class Finding(TypedDict):
+    """One rule hit."""
+
+    path: str
+    line: int
+    column: int
+    rule: str
+    level: str
+    message: str
+    pattern: str
+
+
+class FileResult(TypedDict):
+    """Outcome of scanning one file."""
+
+    path: str
+    skipped: str | None  # reason the file was not scanned
+    size: int
+    scanned: int  # bytes scanned; less than size when truncated
+    findings: list[Finding]
+    analysis: PythonAnalysis | None  # Python scripts only
+
+
+# (file to read, file kind, path shown in findings)
+ScanTask = tuple[Path, str, str]
+# A task and, for a Python script, its analysis if already known
+ScanJob = tuple[ScanTask, PythonAnalysis | None]
+
+
+def load_rules(path: Path = RULES_FILE) -> list[Rule]:
+    """Parse the rules file, skipping comments and blank lines."""
+    rules: list[Rule] = []
+    for number, line in enumerate(path.read_text().splitlines(), 1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != 6:
+            raise ValueError(f"{path}:{number}: expected 6 tab-separated fields")
+        rule_id, kinds, level, flags, message, pattern = fields
+        rules.append(
+            Rule(
+                id=rule_id,
+                kinds=tuple(kinds.split(",")),
+                level=level,
+                flags=flags,
+                message=message,
+                pattern=pattern,
+            )
+        )
+    return rules
+
+
+def _pattern(rule: Rule) -> LinearPattern:
+    return LinearPattern(rule["pattern"], re.IGNORECASE if "i" in rule["flags"] else 0)
+
+
+class ScanTruncated(Exception):
+    """The time budget ran out while scanning; line is the first not scanned."""
+
+    def __init__(self, line: int) -> None:
+        super().__init__(f"time budget exceeded at line {line}")
+        self.line = line
+
+
+class CompiledRules:
+    """Every rule for one file kind, with a prefilter over their anchors."""
+
+    def __init__(self, rules: list[Rule], kind: str, exclude: frozenset[str] = frozenset()) -> None:
+        applicable = [
+            rule for rule in rules if kind in rule["kinds"] and rule["id"] not in exclude
+        ]
+        self.rules = [rule for rule in applicable if not rule["level"].startswith("allow:")]
+        self.matchers = [_pattern(rule) for rule in self.rules]
+        self.allow = [
+            (rule["level"].removeprefix("allow:"), _pattern(rule))
+            for rule in applicable
+            if rule["level"].startswith("allow:")
+        ]
+        # Every match starts with an anchor, so a line without one is clean
+        anchors = [
+            f"(?{'i' if anchor.flags & re.IGNORECASE else ''}:{anchor.pattern})"
+            for matcher in self.matchers
+            for anchor in matcher.anchors()
+        ]
+        self.prefilter = re.compile("|".join(anchors) or "(?!)", re.MULTILINE)
+
+    def scan(
+        self, text: str, first_line: int = 1, deadline: float | None = None
+    ) -> Iterator[tuple[int, int, Rule]]:
+        """Yield (line, column, rule) for every rule hit, both 1-based.
+
+        Raises ScanTruncated once time.monotonic() passes deadline.
+        """
+        if self.prefilter.search(text) is None:
+            return
+        for number, line in enumerate(text.split("\n"), first_line):
+            if self.prefilter.search(line) is None:
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                raise ScanTruncated(number)
+            for rule, matcher in zip(self.rules, self.matchers, strict=True):
+                start = matcher.search(line)
+                if start < 0:
+                    continue
+                if any(
+                    rule["id"].startswith(prefix) and allow.search(line) >= 0
+                    for prefix, allow in self.allow
+                ):
+                    continue
+                yield number, start + 1, rule
+
+    def start_line(self) -> list[list[list[int]]]:
+        """Fresh per-matcher progress for scan_piece() over one long line."""
+        return [matcher.start_progress() for matcher in self.matchers]
+
+    def scan_piece(
+        self,
+        piece: str,
+        number: int,
+        offset: int,
+        progress: list[list[list[int]]],
+        deadline: float | None = None,
+    ) -> Iterator[tuple[int, Rule]]:
+        """Yield (column, rule) for rules a piece of line number completes, 1-based.
+
+        Pieces of one line are fed in order, overlapping; offset is the
+        piece's column in the line. Partial matches carry over in
+        progress, so a rule whose parts lie pieces apart is still found.
+        """
+        if deadline is not None and time.monotonic() > deadline:
+            raise ScanTruncated(number)
+        # Without an anchor in the piece, only matches already under way can complete
+        anchored = self.prefilter.search(piece) is not None
+        for rule, matcher, state in zip(self.rules, self.matchers, progress, strict=True):
+            if not anchored and not any(matched for matched, _, _ in state):
+                continue
+            start = matcher.search_piece(piece, offset, state)
+            if start < 0:
+                continue
+            if any(
+                rule["id"].startswith(prefix) and allow.search(piece) >= 0
+                for prefix, allow in self.allow
+            ):
+                continue
+            yield start + 1, rule
+
+
+@cache
+def compiled_rules(
+    kind: str, exclude: frozenset[str] = frozenset(), rules_file: Path = RULES_FILE
+) -> CompiledRules:
+    """Compiled rules for a file kind, less any excluded IDs, built once per process."""
+    return CompiledRules(load_rules(rules_file), kind, exclude)
+
+
+def sort_findings(findings: list[Finding], kind: str) -> list[Finding]:
+    """Order findings by line, then rules-file order, truncation notes last."""
+    order = {rule["id"]: i for i, rule in enumerate(compiled_rules(kind).rules)}
+    return sorted(
+        findings,
+        key=lambda f: (f["line"], f["rule"] == TRUNCATED, order.get(f["rule"], len(order))),
+    )
+
+
+def _finding(rule: Rule, display: str, line: int, column: int) -> Finding:
+    return Finding(
+        path=display,
+        line=line,
+        column=column,
+        rule=rule["id"],
+        level=rule["level"],
+        message=rule["message"],
+        pattern=rule["pattern"],
+    )
+
+
+def scan_text(text: str, kind: str, display: str) -> list[Finding] | None:
+    """Findings for one file's text, or None if it carries a nosec directive."""
+    if NOSEC[kind] in text:
+        return None
+    return [
+        _finding(rule, display, line, column)
+        for line, column, rule in compiled_rules(kind).scan(text)
+    ]
+
+
+def _truncated(display: str, line: int, reason: str) -> Finding:
+    return Finding(
+        path=display,
+        line=line,
+        column=1,
+        rule=TRUNCATED,
+        level="warn",
+        message="Scan truncated",
+        pattern=reason,
+    )
+
+
+def scan_stream(
+    stream: BinaryIO,
+    kind: str,
+    display: str,
+    limit: int = MAX_FILE_BYTES,
+    budget: float | None = SCAN_BUDGET,
+    chunk_bytes: int = CHUNK_BYTES,
+    overlap: int = OVERLAP_CHARS,
+    max_line: int = MAX_LINE_CHARS,
+    exclude: frozenset[str] = frozenset(),
+) -> FileResult:
+    """Scan up to limit bytes of a binary stream, chunk_bytes at a time.
+
+    Undecodable bytes are replaced. Only complete lines, or pieces of
+    a long line plus the overlap before them, are held in memory; rule
+    progress is carried across the pieces of a long line, so a match
+    spanning several pieces is still found. Past
+    limit bytes, max_line characters of a line, or budget seconds
+    (None for no limit), the rest of the file or line is not scanned
+    and a TRUNCATED finding says so. Rules in exclude are not applied.
+    """
+    rules = compiled_rules(kind, exclude)
+    marker = NOSEC[kind]
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    deadline = None if budget is None else time.monotonic() + budget
+    # (line, rule ID) -> first column and rule; overlap re-scans add nothing
+    hits: dict[tuple[int, str], tuple[int, Rule]] = {}
+    truncations: list[Finding] = []
+    result = FileResult(
+        path=display, skipped=None, size=0, scanned=0, findings=[], analysis=None
+    )
+
+    line = 1  # line that pending starts in
+    column = 0  # characters of that line already dropped from pending
+    pending = ""
+    tail = ""  # end of the previous chunk, for a marker split across reads
+    skip_line = False  # past max_line: discard up to the next newline
+    progress = None  # rule progress while line is scanned in pieces
+
+    def keep(number: int, col: int, rule: Rule) -> None:
+        key = (number, rule["id"])
+        if key not in hits or col < hits[key][0]:
+            hits[key] = (col, rule)
+
+    def record(text: str) -> None:
+        for number, col, rule in rules.scan(text, line, deadline):
+            keep(number, col + (column if number == line else 0), rule)
+
+    def record_piece(text: str) -> None:
+        for col, rule in rules.scan_piece(text, line, column, progress, deadline):
+            keep(line, col, rule)
+
+    try:
+        while result["scanned"] < limit:
+            data = stream.read(min(chunk_bytes, limit - result["scanned"]))
+            if not data:
+                break
+            if result["scanned"] == 0 and b"\0" in data:
+                result["skipped"] = "binary file"
+                return result
+            result["scanned"] += len(data)
+            text = decoder.decode(data)
+            if marker in tail + text:
+                result["skipped"] = "nosec directive"
+                return result
+            tail = (tail + text)[-len(marker):]
+
+            pending += text
+            if skip_line:
+                end = pending.find("\n")
+                if end < 0:
+                    pending = ""
+                    continue
+                pending = pending[end + 1:]
+                line += 1
+                column = 0
+                skip_line = False
+            cut = pending.rfind("\n") + 1
+            if cut:
+                start = 0
+                if progress is not None:
+                    # The last piece of a long line ends here
+                    start = pending.find("\n") + 1
+                    record_piece(pending[:start - 1])
+                    progress = None
+                    line += 1
+                    column = 0
+                record(pending[start:cut])
+                line += pending.count("\n", start, cut)
+                column = 0
+                pending = pending[cut:]
+            elif len(pending) > chunk_bytes + overlap:
+                if progress is None:
+                    progress = rules.start_line()
+                record_piece(pending)
+                drop = len(pending) - overlap
+                column += drop
+                pending = pending[drop:]
+                if column + overlap >= max_line:
+                    truncations.append(
+                        _truncated(display, line, f"line longer than {max_line} characters")
+                    )
+                    pending = ""
+                    skip_line = True
+                    progress = None
+        else:
+            if stream.read(1):
+                truncations.append(
+                    _truncated(display, line, f"file larger than {limit} bytes")
+                )
+
+        pending += decoder.decode(b"", final=True)
+        if pending and not skip_line:
+            if progress is not None:
+                record_piece(pending)
+            else:
+                record(pending)
+    except ScanTruncated as stop:
+        truncations.append(
+            _truncated(display, stop.line, f"time budget of {budget:g}s exceeded")
+        )
+
+    findings = [_finding(rule, display, number, col) for (number, _), (col, rule) in hits.items()]
+    result["findings"] = sort_findings(findings + truncations, kind)
+    return result
+
+
+def scan_file(
+    path: Path,
+    kind: str,
+    display: str,
+    limit: int = MAX_FILE_BYTES,
+    budget: float | None = SCAN_BUDGET,
+    analysis: PythonAnalysis | None = None,
+) -> FileResult:
+    """Stream one file through the rules for its kind.
+
+    A Python script is also analyzed with ast (unless its analysis is
+    given) and, if it parses, AST_RULES come from the analysis instead
+    of the regexes.
+    """
+    with path.open("rb") as stream:
+        size = os.fstat(stream.fileno()).st_size
+        exclude: frozenset[str] = frozenset()
+        if kind == "py":
+            if analysis is None and size <= limit:
+                analysis = analyze_source(stream.read(), str(path))
+                stream.seek(0)
+            if analysis is not None and analysis["syntax_error"] is None:
+                exclude = AST_RULES
+        result = scan_stream(stream, kind, display, limit, budget, exclude=exclude)
+    result["size"] = max(size, result["scanned"])
+    result["analysis"] = analysis
+    if exclude and analysis is not None and result["skipped"] is None:
+        rules = {rule["id"]: rule for rule in compiled_rules(kind).rules}
+        calls = [
+            _finding(rules[rule_id], display, line, column)
+            for line, column, rule_id in analysis["calls"]
+            if rule_id in rules
+        ]
+        result["findings"] = sort_findings(result["findings"] + calls, kind)
+    return result
+
+
+def _scan_job(job: ScanJob, budget: float | None = SCAN_BUDGET) -> FileResult:
+    task, analysis = job
+    return scan_file(*task, budget=budget, analysis=analysis)
+
+
+def _scan_all(jobs_list: list[ScanJob], jobs: int, budget: float | None) -> Iterator[FileResult]:
+    """Scan files over a pool of jobs processes, yielding results in order."""
+    scan = partial(_scan_job, budget=budget)
+    jobs = min(jobs, len(jobs_list))
+    if jobs <= 1:
+        yield from map(scan, jobs_list)
+        return
+    # Several files per dispatch, but enough batches to balance uneven sizes
+    chunksize = max(1, min(64, len(jobs_list) // (jobs * 4)))
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(scan, jobs_list, chunksize)
+
+
+@cache
+def rules_digest(rules_file: Path = RULES_FILE) -> str:
+    """Hash of the rules file, so any rule edit gives cached results new keys."""
+    return content_hash(rules_file.read_bytes())
+
+
+def file_digest(path: Path) -> str:
+    """Content hash of a file, read in chunks."""
+    hasher = content_hasher()
+    with path.open("rb") as stream:
+        for data in iter(lambda: stream.read(CHUNK_BYTES), b""):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def cache_key(digest: str, kind: str) -> str:
+    """Key of a file's scan result: content, kind, rule set, scanner and limits.
+
+    Python results also depend on the ast analysis, and on whether the
+    interpreter parses the script at all, so their keys name both.
+    """
+    parts = [
+        digest,
+        kind,
+        rules_digest(),
+        f"v{SCANNER_VERSION}",
+        str(MAX_FILE_BYTES),
+        str(MAX_LINE_CHARS),
+    ]
+    if kind == "py":
+        parts += [f"py{sys.version_info[0]}.{sys.version_info[1]}", f"a{ANALYSIS_VERSION}"]
+    return ":".join(parts)
+
+
+def _cacheable(result: FileResult) -> bool:
+    """False if the time budget cut the scan short, which a rerun may not repeat."""
+    return not any(
+        f["rule"] == TRUNCATED and f["pattern"].startswith("time budget")
+        for f in result["findings"]
+    )
+
+
+def _dump_result(result: FileResult) -> str:
+    findings = [{k: v for k, v in f.items() if k != "path"} for f in result["findings"]]
+    return json.dumps({**result, "path": None, "findings": findings, "analysis": None})
+
+
+def _load_result(value: str, display: str) -> FileResult:
+    data = json.loads(value)
+    data["path"] = display
+    data["findings"] = [Finding(path=display, **f) for f in data["findings"]]
+    return FileResult(**data)
+
+
+def scan_files(
+    tasks: list[ScanTask],
+    jobs: int = 1,
+    budget: float | None = SCAN_BUDGET,
+    cache: ContentCache | None = None,
+    analysis_cache: ContentCache | None = None,
+) -> Iterator[FileResult]:
+    """Scan files, yielding results in task order.
+
+    With a cache, each file is hashed first and a stored result for the
+    same content, kind, rules and scanner is reused; only the remaining
+    files are scanned, over jobs processes, and their results stored.
+    Python scripts among them take their ast analysis from, and add it
+    to, analysis_cache (shared with python_analysis.py).
+    """
+    results: list[FileResult | None] = [None] * len(tasks)
+    analyses: list[PythonAnalysis | None] = [None] * len(tasks)
+    keys: list[str | None] = [None] * len(tasks)
+    analysis_keys: list[str | None] = [None] * len(tasks)
+    if cache is not None and cache.enabled:
+        for index, (path, kind, display) in enumerate(tasks):
+            digest = file_digest(path)
+            keys[index] = key = cache_key(digest, kind)
+            cached = cache.get(key)
+            if cached is not None:
+                results[index] = _load_result(cached, display)
+            elif kind == "py" and analysis_cache is not None and analysis_cache.enabled:
+                analysis_keys[index] = key = analysis_key(digest)
+                cached = analysis_cache.get(key)
+                if cached is not None:
+                    analyses[index] = load_analysis(cached)
+
+    misses = [
+        (task, analysis)
+        for task, analysis, done in zip(tasks, analyses, results, strict=True)
+        if done is None
+    ]
+    fresh = _scan_all(misses, jobs, budget)
+    for index, result in enumerate(results):
+        if result is None:
+            result = next(fresh)
+            key = keys[index]
+            if cache is not None and key is not None and _cacheable(result):
+                cache.put(key, _dump_result(result))
+            key = analysis_keys[index]
+            analysis = result["analysis"]
+            fresh_analysis = analysis is not None and analyses[index] is None
+            if analysis_cache is not None and key is not None and fresh_analysis:
+                analysis_cache.put(key, dump_analysis(analysis))
+        yield result
+
+
+def iter_files(root: Path, suffixes: tuple[str, ...]) -> list[Path]:
+    """Every file under root with one of the suffixes, in sorted order."""
+    found: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        found.extend(Path(dirpath) / name for name in sorted(filenames) if name.endswith(suffixes))
+    return found
+
+
+def is_scanner(path: Path) -> bool:
+    """True for this scanner's own files."""
+    return path.name in SCANNER_FILES and path.resolve().parent == RULES_FILE.resolve().parent
+
+
+def report(findings: list[Finding]) -> tuple[int, int]:
+    """Print findings to stderr; return (errors, warnings)."""
+    errors = warnings = 0
+    for f in findings:
+        where = f"{f['path']}:{f['line']}:{f['column']}"
+        text = f"{where}: [{f['rule']}] {f['message']}: {f['pattern']}"
+        if f["level"] == "error":
+            print(f"{RED}SECURITY:{NC} {text}", file=sys.stderr)
+            errors += 1
+        else:
+            print(f"{YELLOW}WARN:{NC} {text}", file=sys.stderr)
+            warnings += 1
+    return errors, warnings
+
+
+def report_file(result: FileResult) -> tuple[int, int]:
+    """Print one file's skip note or findings; return (errors, warnings)."""
+    if result["skipped"] is not None:
+        print(f"Skipping: {result['path']} ({result['skipped']})")
+        return 0, 0
+    return report(result["findings"])
+
+
+def scan_target(
+    target: Path,
+    jobs: int = 1,
+    budget: float | None = SCAN_BUDGET,
+    cache: ContentCache | None = None,
+    analysis_cache: ContentCache | None = None,
+) -> tuple[int, int]:
+    """Scan a file or directory, printing progress and findings; return (errors, warnings)."""
+    print()
+    print("Phase 1: Scanning markdown files for malicious patterns...")
+    print()
+    if not target.is_dir():
+        return report_file(next(scan_files([(target, "md", target.name)], 1, budget, cache)))
+
+    markdown = iter_files(target, (".md",))
+    scripts = iter_files(target / "scripts", (".sh", ".py"))
+    tasks: list[ScanTask] = [
+        (path, KINDS[path.suffix], path.relative_to(target).as_posix())
+        for path in markdown + scripts
+        if not is_scanner(path)
+    ]
+
+    errors = warnings = 0
+    results = scan_files(tasks, jobs, budget, cache, analysis_cache)
+    for _ in markdown:
+        e, w = report_file(next(results))
+        errors += e
+        warnings += w
+
+    if scripts:
+        print()
+        print(f"Phase 2: Scanning {len(scripts)} script(s)...")
+        print()
+        for path in scripts:
+            if is_scanner(path):
+                print(f"Skipping: {path.name} (security scanner)")
+                continue
+            print(f"Checking: {path.name}")
+            e, w = report_file(next(results))
+            errors += e
+            warnings += w
+    return errors, warnings
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Scan command content for security issues")
+    parser.add_argument("target", type=Path, help="Command file or directory")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for directory scans (default: CPU count)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        # A string default goes through type=float, so a bad value is a usage error
+        default=os.environ.get(SCAN_BUDGET_ENV, str(SCAN_BUDGET)),
+        help=f"Seconds of matching per file, 0 for no limit "
+        f"(default: ${SCAN_BUDGET_ENV} or {SCAN_BUDGET:g})",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the on-disk scan result cache"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Scan cache directory (default: $PLATXA_CACHE_DIR or .cache/)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Maximum cached results kept, LRU-evicted (default: {DEFAULT_CACHE_ENTRIES})",
+    )
+    args = parser.parse_args()
+    if not args.target.exists():
+        print(f"{RED}Error:{NC} Not found: {args.target}", file=sys.stderr)
+        return 1
+
+    print(f"Security Check: {os.path.basename(os.path.normpath(args.target))}")
+    print(RULE)
+    cache = analysis_cache = None
+    if not args.no_cache:
+        cache = ContentCache(CACHE_NAMESPACE, args.cache_dir, args.cache_max_entries)
+        analysis_cache = ContentCache(
+            ANALYSIS_NAMESPACE, max_entries=args.cache_max_entries, shared=cache
+        )
+    try:
+        errors, warnings = scan_target(
+            args.target, args.jobs, args.budget or None, cache, analysis_cache
+        )
+    finally:
+        if analysis_cache is not None:
+            analysis_cache.close()
+        if cache is not None:
+            cache.close()
+    if cache is not None and cache.hits + cache.misses:
+        print()
+        print(f"Scan cache: {cache.hits} file(s) reused, {cache.misses} scanned")
+
+    print()
+    print(RULE)
+    print("Security Check Summary")
+    print(RULE)
+    if errors == 0 and warnings == 0:
+        print(f"{GREEN}✓ PASSED{NC} - No security issues found")
+        return 0
+    if errors == 0:
+        print(f"{YELLOW}⚠ PASSED WITH WARNINGS{NC} - {warnings} warning(s)")
+        print("Review warnings before deployment.")
+        return 0
+    print(f"{RED}✗ FAILED{NC} - {errors} security issue(s), {warnings} warning(s)")
+    print("Fix security issues before installation.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
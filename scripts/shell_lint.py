@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""shell_lint.py - Batched, parallel, cached shellcheck over shell scripts.
+
+Usage: shell_lint.py <script-or-directory>... [--jobs N]
+                     [--no-cache] [--cache-dir DIR] [--cache-max-entries N]
+
+validate-all.sh used to pipe every *.sh file into its own
+``shellcheck -s bash -`` process, so a plugin with hundreds of scripts
+paid one shellcheck start-up per file, serially, and diagnostics named
+``-`` instead of the file. Here the scripts are split into at most
+BATCH_FILES per shellcheck invocation, the batches run over --jobs
+worker processes, and every diagnostic carries the real path, in the
+``path:line:column: level: message [SCnnnn]`` form of ``shellcheck -f
+gcc``.
+
+Per-file results are cached (content_cache.py, namespace "shellcheck")
+by content hash, shellcheck version, LINT_VERSION and the options in
+SHELLCHECK_ARGS, so only new or edited scripts reach shellcheck again.
+The options include --norc: a .shellcheckrc near a script would
+otherwise change its diagnostics without changing its content. Scripts
+are checked as bash with warnings and errors reported, as before.
+
+Exit codes: 0 = no diagnostics (or shellcheck not installed),
+1 = diagnostics or a shellcheck failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import TypedDict
+
+from content_cache import ContentCache, content_hash
+
+# Part of every cache key; bump when a change here alters the results
+LINT_VERSION = 1
+CACHE_NAMESPACE = "shellcheck"
+# Default bound on cached results (LRU-evicted beyond this)
+DEFAULT_CACHE_ENTRIES = 20000
+# Files per shellcheck invocation: amortizes start-up, bounds the argv
+BATCH_FILES = 64
+SHELLCHECK_ARGS = ("--norc", "--severity=warning", "--shell=bash", "--format=json1")
+
+
+class Diagnostic(TypedDict):
+    """One shellcheck comment on a script."""
+
+    line: int
+    column: int
+    level: str
+    code: int
+    message: str
+
+
+def shellcheck_version(binary: str) -> str | None:
+    """Version reported by ``shellcheck --version``, or None if it cannot run."""
+    try:
+        result = subprocess.run([binary, "--version"], capture_output=True, text=True)
+    except OSError:
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith("version:"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+def lint_key(digest: str, version: str) -> str:
+    """Cache key for a script's results under one shellcheck version."""
+    return f"{digest}:sc{version}:{','.join(SHELLCHECK_ARGS)}:v{LINT_VERSION}"
+
+
+def iter_shell_scripts(paths: list[Path]) -> list[Path]:
+    """Every *.sh file given or under the given directories, in sorted order."""
+    found: list[Path] = []
+    for root in paths:
+        if not root.is_dir():
+            found.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            found.extend(Path(dirpath) / name for name in sorted(filenames) if name.endswith(".sh"))
+    return found
+
+
+def make_batches(paths: list[Path], jobs: int, batch_files: int = BATCH_FILES) -> list[list[Path]]:
+    """Split paths into consecutive batches: enough to keep jobs busy, none over batch_files."""
+    if not paths:
+        return []
+    size = max(1, min(batch_files, -(-len(paths) // max(1, jobs))))
+    return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+
+def parse_json1(output: str, paths: list[Path]) -> dict[Path, list[Diagnostic]]:
+    """Map ``--format=json1`` output back to the paths given on the command line."""
+    by_name = {str(path): path for path in paths}
+    results: dict[Path, list[Diagnostic]] = {path: [] for path in paths}
+    for comment in json.loads(output or "{}").get("comments", []):
+        path = by_name.get(comment["file"])
+        if path is None:
+            continue
+        results[path].append(
+            Diagnostic(
+                line=comment["line"],
+                column=comment["column"],
+                level=comment["level"],
+                code=comment["code"],
+                message=comment["message"],
+            )
+        )
+    for diagnostics in results.values():
+        diagnostics.sort(key=lambda d: (d["line"], d["column"], d["code"]))
+    return results
+
+
+def format_diagnostic(path: Path, diagnostic: Diagnostic) -> str:
+    """One diagnostic in shellcheck's gcc format."""
+    return (
+        f"{path}:{diagnostic['line']}:{diagnostic['column']}: "
+        f"{diagnostic['level']}: {diagnostic['message']} [SC{diagnostic['code']}]"
+    )
+
+
+def _lint_batch(
+    job: tuple[str, list[Path]],
+) -> tuple[dict[Path, list[Diagnostic]] | None, str]:
+    """Run shellcheck once over a batch: (results, "") or (None, failure message)."""
+    binary, batch = job
+    result = subprocess.run(
+        [binary, *SHELLCHECK_ARGS, "--", *map(str, batch)],
+        capture_output=True,
+        text=True,
+    )
+    # 0: clean, 1: comments; anything else means files or options it could not handle
+    if result.returncode not in (0, 1):
+        message = result.stderr.strip() or f"exit status {result.returncode}"
+        return None, f"shellcheck failed on {len(batch)} file(s): {message}"
+    try:
+        return parse_json1(result.stdout, batch), ""
+    except (ValueError, KeyError) as exc:
+        return None, f"unreadable shellcheck output: {exc}"
+
+
+def lint_files(
+    paths: list[Path],
+    jobs: int = 1,
+    cache: ContentCache | None = None,
+    binary: str = "shellcheck",
+    version: str | None = None,
+) -> tuple[dict[Path, list[Diagnostic]], list[str]]:
+    """Lint scripts; return (diagnostics per path, failure messages).
+
+    Cached results are reused when the shellcheck version is known; the
+    rest go to shellcheck in batches over jobs processes and are
+    stored. A path missing from the result was in a failed batch.
+    """
+    results: dict[Path, list[Diagnostic]] = {}
+    keys: dict[Path, str] = {}
+    if cache is not None and cache.enabled and version is not None:
+        for path in paths:
+            key = lint_key(content_hash(path.read_bytes()), version)
+            keys[path] = key
+            cached = cache.get(key)
+            if cached is not None:
+                results[path] = json.loads(cached)
+
+    misses = [path for path in paths if path not in results]
+    batches = make_batches(misses, jobs)
+    work = [(binary, batch) for batch in batches]
+    failures: list[str] = []
+    if min(jobs, len(batches)) <= 1:
+        done = list(map(_lint_batch, work))
+    else:
+        with multiprocessing.Pool(min(jobs, len(batches))) as pool:
+            done = pool.map(_lint_batch, work, 1)
+    for fresh, failure in done:
+        if fresh is None:
+            failures.append(failure)
+            continue
+        results.update(fresh)
+        if cache is not None:
+            cache.put_many(
+                (keys[path], json.dumps(diagnostics))
+                for path, diagnostics in fresh.items()
+                if path in keys
+            )
+    return results, failures
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Run shellcheck over scripts in parallel batches")
+    parser.add_argument("paths", nargs="+", type=Path, help="Scripts or directories")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel shellcheck processes (default: CPU count)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk result cache")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Result cache directory (default: $PLATXA_CACHE_DIR or .cache/)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Maximum cached results kept, LRU-evicted (default: {DEFAULT_CACHE_ENTRIES})",
+    )
+    args = parser.parse_args()
+
+    binary = shutil.which("shellcheck")
+    if binary is None:
+        print("shellcheck not found; shell scripts not linted")
+        return 0
+
+    scripts = iter_shell_scripts(args.paths)
+    version = shellcheck_version(binary)
+    cache = None
+    if not args.no_cache and version is not None:
+        cache = ContentCache(CACHE_NAMESPACE, args.cache_dir, args.cache_max_entries)
+    try:
+        results, failures = lint_files(scripts, args.jobs, cache, binary, version)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    count = 0
+    for path in scripts:
+        for diagnostic in results.get(path, []):
+            print(format_diagnostic(path, diagnostic), file=sys.stderr)
+            count += 1
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    reused = cache.hits if cache is not None else 0
+    print(f"Checked {len(scripts)} shell script(s) ({reused} cached): {count} diagnostic(s)")
+    return 1 if count or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
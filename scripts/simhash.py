@@ -0,0 +1,163 @@
+"""simhash.py - Near-duplicate command bodies via 64-bit SimHash.
+
+Two commands can differ in name and description while their bodies are
+the same copy-pasted template. Each body (frontmatter stripped,
+lowercased, whitespace collapsed) is reduced to:
+
+- a content hash, so identical bodies group exactly;
+- a 64-bit SimHash over count-weighted words. Similar bodies get
+  hashes that differ in few bits, so near-duplicates are pairs within
+  a small Hamming distance. Single words separate best on command-sized
+  bodies: 5% of words replaced moves a hash by 6 bits or fewer in nine
+  cases of ten, while unrelated files in references/ and commands/
+  stay 11 or more bits apart. Longer shingles spread the two apart
+  less than they widen the near-duplicate distance.
+
+near_duplicate_pairs() finds all pairs within distance k without
+comparing every pair. The 64 bits are split into k + m blocks; by
+pigeonhole, two hashes within distance k agree exactly on at least m
+of them. One table per choice of m blocks buckets hashes by those
+blocks (m is picked so keys have about 16 bits), and only bucket mates
+are checked with a popcount, which is roughly linear for catalog-sized
+inputs. clusters() groups the resulting pairs with union-find.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Sequence
+
+from content_cache import content_hash
+from frontmatter import split_frontmatter
+
+BITS = 64
+# Hamming distance reported as near-duplicate (about 95% similar bodies)
+MAX_DISTANCE = 6
+# Largest distance searched: band_layout needs C(d + ceil(d/3), ceil(d/3))
+# bucket tables, 1,820 at 12 but 74,613 at 16
+DISTANCE_LIMIT = 12
+SHINGLE_WORDS = 1
+# Bodies with fewer features get unstable hashes; they group by exact hash only
+MIN_FEATURES = 8
+
+_WORD = re.compile(r"\w+")
+_MASK = (1 << BITS) - 1
+
+# Bit counters are packed into 32-bit lanes of one int: _SPREAD[v] has a 1
+# in lane b for every set bit b of the byte v, so adding spread hashes
+# counts every bit position at once.
+_LANE = 32
+_SPREAD = [sum(1 << (_LANE * b) for b in range(8) if v >> b & 1) for v in range(256)]
+
+
+def strip_frontmatter(text: str) -> str:
+    """Return text without a leading YAML frontmatter block."""
+    return text[split_frontmatter(text)[1]:]
+
+
+def body_words(text: str) -> list[str]:
+    """Lowercased words of a command body, frontmatter stripped."""
+    return _WORD.findall(strip_frontmatter(text).lower())
+
+
+def body_hash(words: Sequence[str]) -> str:
+    """Content hash of a body, insensitive to whitespace and case."""
+    return content_hash(" ".join(words).encode())
+
+
+def simhash(words: Sequence[str], shingle_words: int = SHINGLE_WORDS) -> int | None:
+    """64-bit SimHash of count-weighted word shingles, or None if too short."""
+    shingles = Counter(
+        " ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)
+    )
+    if sum(shingles.values()) < MIN_FEATURES:
+        return None
+    lanes = 0
+    total = 0
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+        spread = 0
+        for byte in range(8):
+            spread |= _SPREAD[h >> (8 * byte) & 0xFF] << (_LANE * 8 * byte)
+        lanes += count * spread
+        total += count
+    # Bit set where shingles with the bit outweigh those without it
+    lane_mask = (1 << _LANE) - 1
+    return sum(
+        1 << bit for bit in range(BITS) if 2 * (lanes >> (_LANE * bit) & lane_mask) > total
+    )
+
+
+def band_layout(max_distance: int) -> tuple[int, int]:
+    """Return (blocks, keyed) so each table keys on about 16 or more bits.
+
+    Hashes within max_distance differ in at most max_distance of the
+    blocks, so with max_distance + keyed blocks at least keyed of them
+    agree exactly: one table per choice of keyed blocks finds every pair.
+    Raises ValueError outside 0..DISTANCE_LIMIT.
+    """
+    if not 0 <= max_distance <= DISTANCE_LIMIT:
+        raise ValueError(f"distance must be 0 to {DISTANCE_LIMIT}, got {max_distance}")
+    keyed = max(1, math.ceil(max_distance / 3))
+    return max_distance + keyed, keyed
+
+
+def near_duplicate_pairs(
+    hashes: Sequence[int | None], max_distance: int = MAX_DISTANCE
+) -> list[tuple[int, int, int]]:
+    """Return (i, j, distance) for i < j whose hashes differ in <= max_distance bits."""
+    blocks, keyed = band_layout(max_distance)
+    # Block b covers bits [edges[b], edges[b + 1])
+    edges = [BITS * b // blocks for b in range(blocks + 1)]
+    masks = [((1 << (edges[b + 1] - edges[b])) - 1) << edges[b] for b in range(blocks)]
+    present = [(i, h) for i, h in enumerate(hashes) if h is not None]
+
+    found: dict[tuple[int, int], int] = {}
+    for chosen in itertools.combinations(masks, keyed):
+        key_mask = sum(chosen)
+        buckets: dict[int, list[tuple[int, int]]] = defaultdict(list)
+        for i, h in present:
+            buckets[h & key_mask].append((i, h))
+        for members in buckets.values():
+            for a, (i, h_i) in enumerate(members):
+                for j, h_j in members[a + 1:]:
+                    distance = (h_i ^ h_j).bit_count()
+                    if distance <= max_distance:
+                        found[i, j] = distance
+    return [(i, j, distance) for (i, j), distance in sorted(found.items())]
+
+
+def clusters(pairs: Iterable[tuple[int, int]]) -> list[list[int]]:
+    """Group linked ids with union-find; each cluster sorted, clusters by first id."""
+    parent: dict[int, int] = {}
+
+    def find(x: int) -> int:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: dict[int, list[int]] = defaultdict(list)
+    for x in parent:
+        groups[find(x)].append(x)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def to_signed(value: int) -> int:
+    """Map an unsigned 64-bit hash to SQLite's signed INTEGER range."""
+    return value - (1 << BITS) if value >> (BITS - 1) else value
+
+
+def from_signed(value: int) -> int:
+    """Inverse of to_signed()."""
+    return value & _MASK
@@ -1,14 +1,18 @@
 #!/usr/bin/env bash
 # validate-all.sh - Run all command validators
 #
-# Usage: validate-all.sh <command-file-or-directory> [--verbose] [--json]
+# Usage: validate-all.sh <command-file-or-directory> [--verbose] [--json] [--jobs N]
 #
 # Runs:
 # - validate-structure.sh
 # - validate-frontmatter.sh
 # - count-tokens.py
 # - security-check.sh
+# - shell_lint.py (batched shellcheck) and python_analysis.py on <directory>/scripts
 # - check-duplicates.py
+#
+# --jobs N is passed to the security scan and the script checks, which
+# default to one worker process per CPU.
 
 set -euo pipefail
 
@@ -26,13 +30,14 @@ declare -A RESULTS
 TOTAL_ERRORS=0
 
 usage() {
-    echo "Usage: $0 <command-file-or-directory> [--verbose] [--json]"
+    echo "Usage: $0 <command-file-or-directory> [--verbose] [--json] [--jobs N]"
     echo ""
     echo "Run all validators on a command file or directory."
     echo ""
     echo "Options:"
     echo "  -v, --verbose  Show detailed output from each validator"
     echo "  --json         Output results as JSON"
+    echo "  -j, --jobs N   Worker processes for security and script checks"
     echo "  -h, --help     Show this help message"
     exit 1
 }
@@ -41,6 +46,7 @@ usage() {
 VERBOSE=false
 JSON_OUTPUT=false
 TARGET=""
+JOBS_ARGS=()
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -55,6 +61,11 @@ while [[ $# -gt 0 ]]; do
             JSON_OUTPUT=true
             shift
             ;;
+        -j|--jobs)
+            [[ $# -ge 2 ]] || usage
+            JOBS_ARGS=(--jobs "$2")
+            shift 2
+            ;;
         *)
             TARGET="$1"
             shift
@@ -161,7 +172,8 @@ fi
 
 # 4. Security check
 if [[ -x "$SCRIPT_DIR/security-check.sh" ]]; then
-    run_validator "Security" "$SCRIPT_DIR/security-check.sh" "$TARGET" || OVERALL_PASS=false
+    run_validator "Security" "$SCRIPT_DIR/security-check.sh" "$TARGET" "${JOBS_ARGS[@]}" \
+        || OVERALL_PASS=false
 else
     if ! $JSON_OUTPUT; then
         echo -e "\n${YELLOW}[Security]${NC} Skipped - validator not found"
@@ -173,36 +185,34 @@ fi
 if [[ -d "$TARGET" ]]; then
     SCRIPTS_DIR="$TARGET/scripts"
     if [[ -d "$SCRIPTS_DIR" ]]; then
-        run_shellcheck_stdin() {
-            local rc=0
-            while IFS= read -r -d '' script; do
-                if ! shellcheck -S warning -s bash - < "$script" 2>&1; then
-                    rc=1
-                fi
-            done < <(find "$1" -name "*.sh" -type f -print0 2>/dev/null)
-            return $rc
+        # Batches of scripts per shellcheck run over parallel workers, with
+        # results cached per file content (shell_lint.py); without python3,
+        # one serial batched run. Either way diagnostics name the real path.
+        run_shellcheck_batched() {
+            find "$1" -name "*.sh" -type f -print0 2>/dev/null \
+                | sort -z \
+                | xargs -0 -r shellcheck --norc -S warning -s bash -f gcc
         }
 
         if command -v shellcheck &>/dev/null; then
             SHELL_SCRIPT_COUNT=$(find "$SCRIPTS_DIR" -name "*.sh" -type f 2>/dev/null | wc -l)
             if [[ "$SHELL_SCRIPT_COUNT" -gt 0 ]]; then
-                run_validator "Shellcheck" run_shellcheck_stdin "$SCRIPTS_DIR" || OVERALL_PASS=false
+                if command -v python3 &>/dev/null; then
+                    run_validator "Shellcheck" python3 "$SCRIPT_DIR/shell_lint.py" \
+                        "$SCRIPTS_DIR" "${JOBS_ARGS[@]}" || OVERALL_PASS=false
+                else
+                    run_validator "Shellcheck" run_shellcheck_batched "$SCRIPTS_DIR" \
+                        || OVERALL_PASS=false
+                fi
             fi
         fi
 
-        py_syntax_check() {
-            local rc=0
-            while IFS= read -r -d '' pyfile; do
-                if ! python3 -m py_compile "$pyfile" 2>&1; then
-                    rc=1
-                fi
-            done < <(find "$1" -name "*.py" -type f -print0 2>/dev/null)
-            return $rc
-        }
-
+        # One interpreter parses every script (python_analysis.py), reusing
+        # analyses the security scan cached for unchanged files
         PY_COUNT=$(find "$SCRIPTS_DIR" -name "*.py" -type f 2>/dev/null | wc -l)
-        if [[ "$PY_COUNT" -gt 0 ]]; then
-            run_validator "Python Syntax" py_syntax_check "$SCRIPTS_DIR" || OVERALL_PASS=false
+        if [[ "$PY_COUNT" -gt 0 ]] && command -v python3 &>/dev/null; then
+            run_validator "Python Syntax" python3 "$SCRIPT_DIR/python_analysis.py" \
+                "$SCRIPTS_DIR" "${JOBS_ARGS[@]}" || OVERALL_PASS=false
         fi
     fi
 fi
@@ -31,6 +31,34 @@ info() {
     echo -e "${GREEN}OK:${NC} $1"
 }
 
+# Body checks see each line up to MAX_LINE_CHARS characters and share a
+# budget of SCAN_BUDGET whole seconds ($PLATXA_SCAN_BUDGET rounded up, 0
+# for no limit). grep -E runs their patterns as automata, in time linear in the
+# body; the limits cover hostile or minified input, and a check cut off
+# by one reports "Scan truncated" instead of holding up CI.
+MAX_LINE_CHARS=4096
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=scan-budget.sh
+source "$SCRIPT_DIR/scan-budget.sh"
+SCAN_DEADLINE=$((SECONDS + SCAN_BUDGET))
+
+# grep the body within what is left of the budget; exit 124 once it is spent
+body_grep() {
+    if ((SCAN_BUDGET <= 0)); then
+        grep "$@" <<< "$BODY"
+    elif ((SECONDS >= SCAN_DEADLINE)); then
+        return 124
+    elif command -v timeout >/dev/null 2>&1; then
+        timeout "$((SCAN_DEADLINE - SECONDS))" grep "$@" <<< "$BODY"
+    else
+        grep "$@" <<< "$BODY"
+    fi
+}
+
+truncated() {
+    warn "Scan truncated: $1 check exceeded the ${SCAN_BUDGET}s budget"
+}
+
 usage() {
     echo "Usage: $0 <command-file-or-directory>"
     echo ""
@@ -128,6 +156,14 @@ if [[ -f "$COMMAND_FILE" ]] && [[ -s "$COMMAND_FILE" ]]; then
     fi
 fi
 
+if [[ -n "$BODY" ]]; then
+    LONG_LINE=$(awk -v max="$MAX_LINE_CHARS" 'length > max { print NR; exit }' <<< "$BODY")
+    if [[ -n "$LONG_LINE" ]]; then
+        warn "Scan truncated: body line $LONG_LINE is longer than $MAX_LINE_CHARS characters; long lines are checked up to that length"
+        BODY=$(awk -v max="$MAX_LINE_CHARS" '{ print substr($0, 1, max) }' <<< "$BODY")
+    fi
+fi
+
 # Check 4: Scan for placeholder content in command body
 if [[ -n "$BODY" ]]; then
     echo ""
@@ -135,9 +171,12 @@ if [[ -n "$BODY" ]]; then
 
     PLACEHOLDER_PATTERNS='(TODO|TBD|FIXME|HACK|XXX|PLACEHOLDER|COMING SOON|NOT YET|IMPLEMENT ME)'
 
-    if echo "$BODY" | grep -qwiE "$PLACEHOLDER_PATTERNS"; then
-        MATCH=$(echo "$BODY" | grep -wiE "$PLACEHOLDER_PATTERNS" | head -1 | sed 's/^[[:space:]]*//')
-        error "Placeholder content found: $MATCH"
+    STATUS=0
+    MATCH=$(body_grep -m1 -wiE "$PLACEHOLDER_PATTERNS") || STATUS=$?
+    if [[ $STATUS -eq 0 ]]; then
+        error "Placeholder content found: $(sed 's/^[[:space:]]*//' <<< "$MATCH")"
+    elif [[ $STATUS -eq 124 ]]; then
+        truncated "placeholder"
     else
         info "No placeholder content detected"
     fi
@@ -148,9 +187,12 @@ if [[ -n "$BODY" ]]; then
     echo ""
     echo "Checking for H1 heading..."
 
-    if echo "$BODY" | grep -qE '^# '; then
-        H1_LINE=$(echo "$BODY" | grep -E '^# ' | head -1)
+    STATUS=0
+    H1_LINE=$(body_grep -m1 -E '^# ') || STATUS=$?
+    if [[ $STATUS -eq 0 ]]; then
         info "H1 heading found: $H1_LINE"
+    elif [[ $STATUS -eq 124 ]]; then
+        truncated "H1 heading"
     else
         error "Missing H1 heading — every command must start with '# Title'"
     fi
@@ -184,9 +226,13 @@ if [[ -n "$BODY" ]]; then
     # Patterns like "improve the code" or "fix issues" without specific targets
     VAGUE_PATTERNS='(^|\s)(improve|fix|update|enhance|optimize|refactor|clean up|make better)\s+(the\s+)?(code|it|things|stuff|everything|issues|problems)'
 
-    VAGUE_MATCH=$(echo "$BODY" | grep -iE "$VAGUE_PATTERNS" | head -1 | sed 's/^[[:space:]]*//' || true)
-    if [[ -n "$VAGUE_MATCH" ]]; then
+    STATUS=0
+    VAGUE_MATCH=$(body_grep -m1 -iE "$VAGUE_PATTERNS") || STATUS=$?
+    if [[ $STATUS -eq 0 ]]; then
+        VAGUE_MATCH=$(sed 's/^[[:space:]]*//' <<< "$VAGUE_MATCH")
         warn "Vague instruction detected: '$VAGUE_MATCH' — be specific about what to change and how"
+    elif [[ $STATUS -eq 124 ]]; then
+        truncated "vague instruction"
     else
         info "No vague instructions detected"
     fi
@@ -199,13 +245,24 @@ if [[ -n "$BODY" ]]; then
 
     # Look for concrete references: file paths, backtick code, tool names, variables
     HAS_CONCRETE=false
-    if echo "$BODY" | grep -qE '`[^`]+`'; then HAS_CONCRETE=true; fi
-    if echo "$BODY" | grep -qE '\$1|\$2|\$ARGUMENTS'; then HAS_CONCRETE=true; fi
-    if echo "$BODY" | grep -qE '\.(py|ts|js|md|sh|json|yaml|yml|toml)'; then HAS_CONCRETE=true; fi
-    if echo "$BODY" | grep -qwE '(Read|Write|Edit|Bash|Glob|Grep|Task|AskUserQuestion)'; then HAS_CONCRETE=true; fi
+    CONCRETE_TRUNCATED=false
+    concrete() {
+        local status=0
+        $HAS_CONCRETE && return 0
+        body_grep -q "$@" || status=$?
+        [[ $status -eq 0 ]] && HAS_CONCRETE=true
+        [[ $status -eq 124 ]] && CONCRETE_TRUNCATED=true
+        return 0
+    }
+    concrete -E '`[^`]+`'
+    concrete -E '\$1|\$2|\$ARGUMENTS'
+    concrete -E '\.(py|ts|js|md|sh|json|yaml|yml|toml)'
+    concrete -wE '(Read|Write|Edit|Bash|Glob|Grep|Task|AskUserQuestion)'
 
     if $HAS_CONCRETE; then
         info "Concrete references found (file paths, code, or tool names)"
+    elif $CONCRETE_TRUNCATED; then
+        truncated "prompt specificity"
     else
         warn "No concrete references found — commands should reference specific files, tools, or code patterns"
     fi
@@ -20,6 +20,20 @@ import pytest
 COMMAND_GENERATOR_ROOT = Path(__file__).parent.parent
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Point the scripts' shared cache at a fresh directory for each test.
+
+    Without --cache-dir the scripts cache under the generator's .cache/;
+    tests must neither write there nor see results left by earlier runs.
+    """
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("PLATXA_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
 @pytest.fixture
 def temp_command_dir() -> Generator[Path, None, None]:
     """Create a temporary directory for test command files.
@@ -80,13 +94,18 @@ def run_count_tokens(scripts_dir: Path) -> Callable[..., subprocess.CompletedPro
     script_path = scripts_dir / "count-tokens.py"
 
     def _run(
-        target: Path, json_output: bool = False, warn_threshold: int = 80
+        target: Path,
+        json_output: bool = False,
+        warn_threshold: int = 80,
+        extra_args: list[str] | None = None,
     ) -> subprocess.CompletedProcess:
         cmd = ["python3", str(script_path)]
         if json_output:
             cmd.append("--json")
         if warn_threshold != 80:
             cmd.extend(["--warn-threshold", str(warn_threshold)])
+        if extra_args:
+            cmd.extend(extra_args)
         cmd.append(str(target))
 
         return subprocess.run(
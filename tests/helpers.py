@@ -8,7 +8,36 @@ All operations use REAL file system - NO mocks or simulations.
 
 from __future__ import annotations
 
+import importlib.util
+import sys
 from pathlib import Path
+from types import ModuleType
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+
+
+def load_script(filename: str) -> ModuleType:
+    """Import a script from scripts/ by filename (hyphenated names allowed).
+
+    The scripts directory is put on sys.path first so that the script's
+    own sibling imports (e.g. content_cache) resolve as they do when the
+    script is executed directly.
+
+    Args:
+        filename: Script filename, e.g. "count-tokens.py"
+
+    Returns:
+        The loaded module
+    """
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    module_name = filename.removesuffix(".py").replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
 
 
 def create_command_md(
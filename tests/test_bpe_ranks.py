@@ -0,0 +1,126 @@
+"""Tests for bpe_ranks.py offline rank tables.
+
+All tests use REAL file system operations and execute the actual script.
+NO mocks or simulations.
+
+Tests cover:
+- .tiktoken to binary .bpe conversion round-trip
+- Binary table detection by magic header
+- count-tokens.py --encoding-file validation, $PLATXA_ENCODING_FILE fallback
+- Token cache keys identify the rank file
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+from helpers import load_script
+
+BPE_SCRIPT = Path(__file__).parent.parent / "scripts" / "bpe_ranks.py"
+
+SAMPLE_RANKS = {
+    b"a": 0,
+    b"b": 1,
+    b" ": 2,
+    b"ab": 3,
+    b" ab": 4,
+    "é".encode(): 5,
+    b"\x00\xff": 6,
+}
+
+
+def _write_tiktoken_file(path: Path, ranks: dict[bytes, int]) -> Path:
+    """Write ranks in the upstream base64 .tiktoken format."""
+    lines = [f"{base64.b64encode(token).decode()} {rank}" for token, rank in ranks.items()]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestConvert:
+    """Tests for the convert subcommand."""
+
+    @pytest.mark.tokens
+    def test_convert_round_trip(self, tmp_path: Path) -> None:
+        """A converted binary table loads to the same ranks as the source."""
+        source = _write_tiktoken_file(tmp_path / "tiny.tiktoken", SAMPLE_RANKS)
+        dest = tmp_path / "out" / "tiny.bpe"
+
+        result = subprocess.run(
+            ["python3", str(BPE_SCRIPT), "convert", str(source), str(dest)],
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0, result.stderr
+        bpe_ranks = load_script("bpe_ranks.py")
+        assert bpe_ranks.load_ranks(dest) == SAMPLE_RANKS
+        assert bpe_ranks.load_ranks(source) == SAMPLE_RANKS
+        assert dest.read_bytes().startswith(bpe_ranks.MAGIC)
+
+    @pytest.mark.tokens
+    def test_convert_missing_source_fails(self, tmp_path: Path) -> None:
+        """Converting a missing file exits 1."""
+        result = subprocess.run(
+            ["python3", str(BPE_SCRIPT), "convert", str(tmp_path / "nope"), str(tmp_path / "x")],
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 1
+        assert "not found" in result.stderr
+
+
+class TestEncodingFileOption:
+    """Tests for count-tokens.py --encoding-file."""
+
+    @pytest.mark.tokens
+    def test_missing_encoding_file_fails(
+        self, temp_command_dir: Path, run_count_tokens
+    ) -> None:
+        """A nonexistent --encoding-file is reported instead of downloading."""
+        cmd = temp_command_dir / "cmd.md"
+        cmd.write_text("# Cmd\n\nBody.\n")
+
+        result = run_count_tokens(
+            cmd, extra_args=["--encoding-file", str(temp_command_dir / "missing.bpe")]
+        )
+
+        assert result.returncode == 1
+        assert "Encoding file not found" in result.stderr
+
+    @pytest.mark.tokens
+    def test_missing_env_encoding_file_falls_back(
+        self, temp_command_dir: Path, run_count_tokens, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A mistyped $PLATXA_ENCODING_FILE is warned about, and counting still works."""
+        cmd = temp_command_dir / "cmd.md"
+        cmd.write_text("# Cmd\n\nBody.\n")
+        monkeypatch.setenv("PLATXA_ENCODING_FILE", str(temp_command_dir / "missing.bpe"))
+
+        result = run_count_tokens(cmd, json_output=True)
+
+        assert result.returncode == 0
+        assert "PLATXA_ENCODING_FILE is not a file" in result.stderr
+        assert json.loads(result.stdout)["command_tokens"] > 0
+
+    @pytest.mark.tokens
+    def test_cache_key_names_rank_file(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Counts from different rank files are cached under different keys."""
+        count_tokens = load_script("count-tokens.py")
+        monkeypatch.setattr(count_tokens, "TIKTOKEN_AVAILABLE", True)
+        first = _write_tiktoken_file(tmp_path / "first.tiktoken", SAMPLE_RANKS)
+        second = _write_tiktoken_file(tmp_path / "second.tiktoken", {**SAMPLE_RANKS, b"c": 7})
+
+        names = []
+        for path in (first, second, first):
+            monkeypatch.setenv("PLATXA_ENCODING_FILE", str(path))
+            names.append(count_tokens.encoding_name())
+
+        assert names[0] == names[2] != names[1]
+        assert names[0].startswith("cl100k_base@")
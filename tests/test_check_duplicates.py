@@ -10,15 +10,32 @@ Tests cover:
 - Self-comparison excluded
 - Audit mode for directory-wide scanning
 - Different commands with different names pass
+- LSH audit of a large catalog still finds near-duplicates; checks keep full recall
+- Persistent index updates incrementally, evicts stale catalogs; --query and batch checks
+- Name index never prunes a name that reaches the threshold
+- Ratio bound cascade gives the same results as ratio() and reports tier counts
+- TF-IDF cosine engine (NumPy) finds reworded descriptions; blocked pairs are exact
+- --bodies clusters identical and SimHash near-duplicate command bodies; --body-distance
+  outside its supported range is rejected
+- --scopes registry: project/user/plugin shadowing and cross-scope checks
+- Sharded audit links match pairwise checks; --json cluster report is deterministic
+- Frontmatter reader: fields (last repeated key wins), body offset, byte cap on unclosed
+  frontmatter
 """
 
 from __future__ import annotations
 
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
 import subprocess
 from pathlib import Path
 
 import pytest
-from helpers import create_command_md
+from helpers import create_command_md, load_script
 
 
 @pytest.fixture
@@ -31,10 +48,13 @@ def run_check_duplicates(scripts_dir: Path):
         *,
         audit: bool = False,
         catalog: Path | None = None,
+        extra_args: list[str] | None = None,
     ) -> subprocess.CompletedProcess:
         cmd = ["python3", str(script_path)]
         if audit:
             cmd.append("--audit")
+        if extra_args:
+            cmd.extend(extra_args)
         if catalog:
             cmd.extend(["--catalog", str(catalog)])
         cmd.append(str(target))
@@ -177,3 +197,666 @@ class TestDescriptionSimilarity:
         result = run_check_duplicates(cmd, catalog=commands_dir)
         assert result.returncode == 0
         assert "Similar description" in result.stderr
+
+
+class TestLshAudit:
+    """Tests for LSH candidate generation in large audits."""
+
+    @staticmethod
+    def _pairs(stderr: str) -> set[tuple[str, ...]]:
+        return {tuple(sorted(re.findall(r"'([^']+)'", line)[:2])) for line in stderr.splitlines()}
+
+    @pytest.mark.duplicates
+    @pytest.mark.slow
+    def test_lsh_finds_near_duplicates(self, tmp_path: Path, run_check_duplicates) -> None:
+        """Above LSH_MIN_COMMANDS, near-duplicates are still found and nothing new is reported."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        rng = random.Random(7)
+        syllables = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+
+        def word() -> str:
+            return "".join(rng.sample(syllables, 3))
+
+        for _ in range(220):
+            description = " ".join(word() for _ in range(8))
+            create_command_md(commands_dir, f"{word()}-{word()}", description=description)
+
+        create_command_md(commands_dir, "deploy-preview-site", description="Deploy a preview")
+        create_command_md(commands_dir, "deploy-preview-sites", description="Ship it now")
+        create_command_md(
+            commands_dir,
+            "lint-fix",
+            description="Run linters on changed files and apply safe autofixes",
+        )
+        create_command_md(
+            commands_dir,
+            "style-repair",
+            description="Run linters on changed files and apply safe auto-fixes",
+        )
+
+        lsh = run_check_duplicates(commands_dir, audit=True, extra_args=["--engine", "difflib"])
+        exhaustive = run_check_duplicates(
+            commands_dir, audit=True, extra_args=["--engine", "difflib", "--exhaustive"]
+        )
+
+        assert lsh.returncode == exhaustive.returncode == 0
+        assert "Similar names 'deploy-preview-site' <-> 'deploy-preview-sites'" in lsh.stderr
+        assert "Similar descriptions 'lint-fix' <-> 'style-repair'" in lsh.stderr
+        assert self._pairs(lsh.stderr) <= self._pairs(exhaustive.stderr)
+
+    @pytest.mark.duplicates
+    @pytest.mark.slow
+    def test_check_keeps_full_recall(self, tmp_path: Path) -> None:
+        """Above LSH_MIN_COMMANDS, a check still finds every name within the threshold.
+
+        LSH buckets miss a few one-character variants of these names; the
+        check must not depend on them.
+        """
+        check_duplicates = load_script("check-duplicates.py")
+        rng = random.Random(11)
+        syllables = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+        names: set[str] = set()
+        while len(names) < 300:
+            names.add("".join(rng.sample(syllables, 3)) + "-" + "".join(rng.sample(syllables, 2)))
+        for name in sorted(names):
+            create_command_md(tmp_path, name, description=f"Run the {name} task")
+
+        index = check_duplicates.open_index(tmp_path, use_index=False)
+        try:
+            items = check_duplicates.indexed_items(index)
+            name_index = check_duplicates.build_name_index(items)
+            missed = []
+            for name in sorted(names):
+                for i in range(len(name)):
+                    # ratio (n - 1) / n >= 0.9 for these 11-character names
+                    variant = name[:i] + ("x" if name[i] != "x" else "y") + name[i + 1:]
+                    found = check_duplicates.check_fuzzy_name(variant, items, index=name_index)
+                    if name not in {match for match, _, _ in found}:
+                        missed.append(variant)
+        finally:
+            index.close()
+
+        assert len(items) == len(names) >= check_duplicates.LSH_MIN_COMMANDS
+        assert missed == []
+
+class TestCatalogIndex:
+    """Tests for the persistent catalog index, --query, and batch checks."""
+
+    @pytest.mark.duplicates
+    def test_index_updates_incrementally(self, tmp_path: Path, run_check_duplicates) -> None:
+        """A second audit re-reads only changed files and drops deleted ones."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        cache = ["--cache-dir", str(tmp_path / "cache")]
+        for name in ("alpha", "beta", "gamma"):
+            create_command_md(commands_dir, name, description=f"Description for {name}")
+
+        first = run_check_duplicates(commands_dir, audit=True, extra_args=cache)
+        assert "Index: 3 added, 0 updated, 0 removed, 0 unchanged" in first.stdout
+
+        create_command_md(commands_dir, "beta", description="Rewritten beta description text")
+        (commands_dir / "gamma.md").unlink()
+        second = run_check_duplicates(commands_dir, audit=True, extra_args=cache)
+        assert "Index: 0 added, 1 updated, 1 removed, 1 unchanged" in second.stdout
+        assert "2 commands checked" in second.stdout
+
+        query = run_check_duplicates(
+            commands_dir, extra_args=[*cache, "--query", "rewritten beta description"]
+        )
+        assert query.stdout.splitlines()[0].split()[1] == "beta"
+
+    @pytest.mark.duplicates
+    def test_query_ranks_closest_first(self, tmp_path: Path, run_check_duplicates) -> None:
+        """--query lists at most --top-k commands, closest description first."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(commands_dir, "deploy", description="Deploy the app to production")
+        create_command_md(commands_dir, "lint", description="Run linters on changed files")
+        create_command_md(commands_dir, "test", description="Run the unit test suite")
+
+        result = run_check_duplicates(
+            commands_dir,
+            extra_args=[
+                "--no-index", "--query", "Run linters on the changed files", "--top-k", "2"
+            ],
+        )
+        assert result.returncode == 0
+        lines = result.stdout.splitlines()
+        assert len(lines) == 2
+        assert lines[0].split()[1] == "lint"
+
+    @pytest.mark.duplicates
+    def test_batch_check(self, tmp_path: Path, run_check_duplicates) -> None:
+        """Several new commands are checked in one run; the worst result wins."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(commands_dir, "deploy", description="Deploy app")
+
+        new_dir = tmp_path / "new"
+        new_dir.mkdir()
+        unique = create_command_md(new_dir, "lint", description="Run linter")
+        duplicate = create_command_md(new_dir, "deploy", description="Ship it")
+
+        result = run_check_duplicates(
+            duplicate, catalog=commands_dir, extra_args=["--no-index", str(unique)]
+        )
+        assert result.returncode == 1
+        assert "No duplicates found for 'lint'" in result.stdout
+        assert "Exact duplicate name 'deploy'" in result.stderr
+
+    @pytest.mark.duplicates
+    def test_stale_catalogs_evicted(self, tmp_path: Path) -> None:
+        """A refresh drops catalogs that are gone or past the size bound, LRU first."""
+        check_duplicates = load_script("check-duplicates.py")
+        catalog_index = load_script("catalog_index.py")
+        cache_dir = tmp_path / "cache"
+        catalogs = {}
+        for label in ("old", "gone", "recent", "current"):
+            catalogs[label] = tmp_path / label
+            catalogs[label].mkdir()
+            for i in range(2):
+                create_command_md(catalogs[label], f"{label}-{i}", description=f"{label} {i}")
+
+        def refresh(label: str, **limits: int) -> dict[str, int]:
+            index = catalog_index.CatalogIndex(
+                catalogs[label], check_duplicates.parse_command_frontmatter, cache_dir, **limits
+            )
+            index.refresh()
+            index.close()
+            return index.stats
+
+        for label in ("old", "gone", "recent"):
+            refresh(label)
+        shutil.rmtree(catalogs["gone"])
+        stats = refresh("current", max_files=4)
+
+        with sqlite3.connect(cache_dir / "platxa-cache.sqlite3") as conn:
+            kept = {Path(c).name for (c,) in conn.execute("SELECT catalog FROM catalog_use")}
+            indexed = {
+                Path(c).name for (c,) in conn.execute("SELECT DISTINCT catalog FROM catalog_bands")
+            }
+        assert stats["evicted"] == 2
+        assert kept == indexed == {"recent", "current"}
+
+
+class TestNameIndex:
+    """Tests for the trigram/length name index used by fuzzy name checks."""
+
+    @pytest.mark.duplicates
+    def test_lookup_keeps_every_match(self) -> None:
+        """Every name at or above the threshold survives pruning, and most others do not."""
+        from difflib import SequenceMatcher
+
+        name_index = load_script("name_index.py")
+        rng = random.Random(13)
+        alphabet = "abcdeklmnorst"
+        names: list[str] = []
+        for _ in range(600):
+            if names and rng.random() < 0.4:
+                chars = list(rng.choice(names))
+                for _ in range(rng.randint(1, 3)):
+                    position = rng.randrange(len(chars) + 1)
+                    if rng.random() < 0.5 and chars:
+                        del chars[min(position, len(chars) - 1)]
+                    else:
+                        chars.insert(position, rng.choice(alphabet))
+                names.append("".join(chars))
+            else:
+                names.append("".join(rng.choices(alphabet, k=rng.randint(0, 14))))
+
+        index = name_index.NameIndex(names)
+        scored = 0
+        for threshold in (0.85, 0.6, 1.0):
+            for target in names[:150]:
+                candidates = index.lookup(target, threshold)
+                scored += len(candidates)
+                matches = {
+                    i
+                    for i, name in enumerate(names)
+                    if SequenceMatcher(None, target, name).ratio() >= threshold
+                }
+                assert matches <= set(candidates), target
+        assert scored < 3 * 150 * len(names) / 4
+
+
+class TestRatioCascade:
+    """Tests for the cheap-bounds-first ratio threshold check."""
+
+    @pytest.mark.duplicates
+    def test_cascade_matches_ratio(self) -> None:
+        """The cascade accepts exactly the pairs whose ratio() reaches the threshold."""
+        from difflib import SequenceMatcher
+
+        ratio_cascade = load_script("ratio_cascade.py")
+        cascade = ratio_cascade.RatioCascade()
+        rng = random.Random(14)
+        words = ["run", "tests", "deploy", "the", "app", "lint", "files", "changed", "a"]
+        texts = [" ".join(rng.choices(words, k=rng.randint(0, 8))) for _ in range(120)]
+
+        for threshold in (0.8, 0.85, 0.5):
+            for a in texts[:40]:
+                for b in texts:
+                    expected = SequenceMatcher(None, a, b).ratio()
+                    result = cascade.ratio(a, b, threshold)
+                    if expected >= threshold:
+                        assert result == expected
+                    else:
+                        assert result is None
+
+        assert cascade.pairs == 3 * 40 * len(texts)
+        assert cascade.rejected["length"] > 0
+        assert cascade.rejected["quick"] > 0
+
+    @pytest.mark.duplicates
+    def test_stats_reports_tiers(self, tmp_path: Path, run_check_duplicates) -> None:
+        """--stats prints comparisons and per-tier rejections."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(commands_dir, "deploy", description="Deploy app")
+        create_command_md(commands_dir, "deploy-all-environments", description="Deploy")
+        create_command_md(commands_dir, "lint", description="Run linters on changed files")
+
+        result = run_check_duplicates(
+            commands_dir, audit=True, extra_args=["--no-index", "--stats"]
+        )
+        assert result.returncode == 0
+        assert re.search(r"Comparisons: \d+ pairs; rejected by length bound \d+", result.stdout)
+
+
+class TestTfidfDescriptions:
+    """Tests for the optional NumPy TF-IDF description engine."""
+
+    @pytest.mark.duplicates
+    def test_reworded_description_found(self, tmp_path: Path, run_check_duplicates) -> None:
+        """TF-IDF reports a reworded description that difflib misses."""
+        pytest.importorskip("numpy")
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(
+            commands_dir,
+            "ship-preview",
+            description="Deploy preview builds of the frontend to staging",
+        )
+        create_command_md(
+            commands_dir,
+            "stage-frontend",
+            description="To staging, deploy the frontend preview builds",
+        )
+        create_command_md(commands_dir, "lint", description="Run linters on changed files")
+        create_command_md(commands_dir, "test", description="Run the unit test suite")
+
+        tfidf = run_check_duplicates(
+            commands_dir, audit=True, extra_args=["--no-index", "--engine", "tfidf"]
+        )
+        difflib = run_check_duplicates(
+            commands_dir, audit=True, extra_args=["--no-index", "--engine", "difflib"]
+        )
+
+        assert tfidf.returncode == difflib.returncode == 0
+        assert "Similar descriptions 'ship-preview' <-> 'stage-frontend' (cosine=" in tfidf.stderr
+        assert "Similar descriptions" not in difflib.stderr
+
+    @pytest.mark.duplicates
+    def test_blocked_pairs_match_full_matrix(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Small memory blocks report exactly the pairs of the full cosine matrix."""
+        np = pytest.importorskip("numpy")
+        description_vectors = load_script("description_vectors.py")
+        rng = random.Random(15)
+        words = [f"term{i}" for i in range(200)]
+        descriptions = [" ".join(rng.choices(words, k=rng.randint(0, 10))) for _ in range(300)]
+        descriptions.append(descriptions[3])
+
+        vectors = description_vectors.DescriptionVectors(descriptions)
+        dense = vectors._dense(0, len(vectors))
+        full = dense @ dense.T
+        expected = [
+            (int(i), int(j)) for i, j in zip(*np.nonzero(np.triu(full >= 0.4, k=1)), strict=True)
+        ]
+
+        monkeypatch.setattr(description_vectors, "BLOCK_ELEMENTS", 4096)
+        pairs = [(i, j) for i, j, _ in vectors.similar_pairs(0.4)]
+
+        assert pairs == sorted(expected)
+        assert (3, len(descriptions) - 1) in pairs
+
+
+class TestBodyDuplicates:
+    """Tests for body-level identical and near-duplicate detection."""
+
+    @pytest.mark.duplicates
+    def test_bodies_clustered(
+        self, tmp_path: Path, scripts_dir: Path, run_check_duplicates
+    ) -> None:
+        """Copied and lightly edited bodies are reported; unrelated bodies are not."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        repo_commands = scripts_dir.parent / "commands"
+        page = (repo_commands / "platxa-frontend-page.md").read_text()
+        body = page.split("\n---\n", 1)[1]
+        words = body.split(" ")
+        edited = " ".join("widget" if i % 60 == 7 else w for i, w in enumerate(words))
+
+        create_command_md(commands_dir, "make-page", description="Make a page", content=body)
+        create_command_md(commands_dir, "new-screen", description="New screen", content=body)
+        create_command_md(commands_dir, "add-view", description="Add a view", content=edited)
+        create_command_md(
+            commands_dir,
+            "form",
+            description="Build a form",
+            content=(repo_commands / "platxa-frontend-form.md").read_text(),
+        )
+
+        result = run_check_duplicates(
+            commands_dir, audit=True, extra_args=["--no-index", "--bodies"]
+        )
+        assert result.returncode == 0
+        identical = [line for line in result.stderr.splitlines() if "Identical bodies" in line]
+        near = [line for line in result.stderr.splitlines() if "Near-duplicate bodies" in line]
+        assert len(identical) == 1
+        assert "make-page.md" in identical[0] and "new-screen.md" in identical[0]
+        assert len(near) == 1
+        assert "(3 commands" in near[0] and "add-view.md" in near[0]
+        assert "form.md" not in result.stderr
+
+    @pytest.mark.duplicates
+    def test_banded_pairs_match_brute_force(self) -> None:
+        """Band tables find exactly the pairs within the Hamming distance."""
+        simhash = load_script("simhash.py")
+        rng = random.Random(16)
+        hashes: list[int | None] = []
+        for _ in range(400):
+            if hashes and rng.random() < 0.3 and hashes[-1] is not None:
+                h = hashes[-1]
+                for bit in rng.sample(range(64), rng.randint(0, 8)):
+                    h ^= 1 << bit
+                hashes.append(h)
+            else:
+                hashes.append(rng.getrandbits(64) if rng.random() < 0.95 else None)
+
+        for distance in (3, 6):
+            expected = [
+                (i, j, (a ^ b).bit_count())
+                for i, a in enumerate(hashes)
+                for j, b in enumerate(hashes)
+                if i < j and a is not None and b is not None and (a ^ b).bit_count() <= distance
+            ]
+            assert simhash.near_duplicate_pairs(hashes, distance) == expected
+
+        assert simhash.clusters([(5, 9), (1, 5), (7, 8)]) == [[1, 5, 9], [7, 8]]
+
+    @pytest.mark.duplicates
+    def test_body_distance_out_of_range_rejected(
+        self, tmp_path: Path, run_check_duplicates
+    ) -> None:
+        """Negative distances and ones needing too many band tables are refused."""
+        simhash = load_script("simhash.py")
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(commands_dir, "solo", description="Only command")
+
+        for distance in (-1, simhash.DISTANCE_LIMIT + 1, 40):
+            result = run_check_duplicates(
+                commands_dir,
+                audit=True,
+                extra_args=["--no-index", "--bodies", "--body-distance", str(distance)],
+            )
+            assert result.returncode == 2
+            assert f"--body-distance must be 0 to {simhash.DISTANCE_LIMIT}" in result.stderr
+            with pytest.raises(ValueError):
+                simhash.band_layout(distance)
+
+        result = run_check_duplicates(
+            commands_dir,
+            audit=True,
+            extra_args=["--no-index", "--bodies", "--body-distance", "0"],
+        )
+        assert result.returncode == 0
+
+
+class TestScopedRegistry:
+    """Tests for duplicate checks across project, user and plugin scopes."""
+
+    @staticmethod
+    def _scopes(tmp_path: Path) -> tuple[Path, Path]:
+        project = tmp_path / "project"
+        home = tmp_path / "home"
+        for directory in (
+            project / ".claude" / "commands" / "frontend",
+            project / ".claude" / "plugins" / "ops" / "commands",
+            project / ".claude" / "plugins" / "market" / "plugins" / "lint" / "commands",
+            home / ".claude" / "commands",
+            home / ".claude" / "projects" / "session",
+        ):
+            directory.mkdir(parents=True)
+        create_command_md(project / ".claude" / "commands", "deploy", description="Deploy app")
+        create_command_md(project / ".claude" / "commands" / "frontend", "page", description="Page")
+        create_command_md(home / ".claude" / "commands", "deploy", description="Deploy it")
+        create_command_md(home / ".claude" / "projects" / "session", "notes", description="Not one")
+        ops = project / ".claude" / "plugins" / "ops" / "commands"
+        create_command_md(ops, "deploy", description="Ops deploy")
+        create_command_md(ops, "rollback", description="Roll back")
+        create_command_md(
+            project / ".claude" / "plugins" / "market" / "plugins" / "lint" / "commands",
+            "lint-all",
+            description="Run linters",
+        )
+        return project, home
+
+    @staticmethod
+    def _run(scripts_dir: Path, home: Path, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["python3", str(scripts_dir / "check-duplicates.py"), "--no-index", *args],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "HOME": str(home)},
+        )
+
+    @pytest.mark.duplicates
+    def test_registry_resolves_shadowing(self, tmp_path: Path) -> None:
+        """Project wins over user, user over plugin; plugins keep /ns:name."""
+        command_registry = load_script("command_registry.py")
+        project, home = self._scopes(tmp_path)
+
+        registry = command_registry.CommandRegistry(project, home)
+
+        summary = [
+            (e["scope"], e["namespace"], e["name"], e["invocations"], e["shadowed"])
+            for e in registry.entries
+        ]
+        assert summary == [
+            ("project", "", "deploy", ["deploy"], []),
+            ("project", "", "frontend:page", ["frontend:page"], []),
+            ("user", "", "deploy", [], ["deploy"]),
+            ("plugin", "lint", "lint-all", ["lint:lint-all", "lint-all"], []),
+            ("plugin", "ops", "deploy", ["ops:deploy"], ["deploy"]),
+            ("plugin", "ops", "rollback", ["ops:rollback", "rollback"], []),
+        ]
+        assert registry.resolve("/deploy")["scope"] == "project"
+        assert registry.resolve("ops:deploy")["namespace"] == "ops"
+        assert registry.resolve("notes") is None
+
+    @pytest.mark.duplicates
+    def test_scoped_audit(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """One audit reports shadowing and similar names across every scope."""
+        project, home = self._scopes(tmp_path)
+        create_command_md(project / ".claude" / "commands", "lint-al", description="Lint")
+
+        result = self._run(scripts_dir, home, "--audit", "--scopes", str(project))
+
+        assert result.returncode == 1
+        assert "Scopes: project, user, plugin (7 commands)" in result.stdout
+        errors = [line for line in result.stderr.splitlines() if line.startswith("ERROR")]
+        assert len(errors) == 1
+        assert "'/deploy'" in errors[0] and "(user scope)" in errors[0]
+        assert "only reachable as '/ops:deploy'" in result.stderr
+        assert "'lint-al' <-> 'lint-all'" in result.stderr
+
+    @pytest.mark.duplicates
+    def test_scoped_file_check(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """A new command is checked against every scope, not just its directory."""
+        project, home = self._scopes(tmp_path)
+        new_dir = tmp_path / "new"
+        new_dir.mkdir()
+        rollback = create_command_md(new_dir, "rollback", description="Undo")
+        deploy = create_command_md(new_dir, "deploy", description="Undo")
+
+        result = self._run(
+            scripts_dir, home, "--scopes", "--project-dir", str(project), str(rollback)
+        )
+        assert result.returncode == 0
+        assert "shadows plugin command '/ops:rollback'" in result.stderr
+
+        result = self._run(
+            scripts_dir, home, "--scopes", "--project-dir", str(project), str(deploy)
+        )
+        assert result.returncode == 1
+        assert "(project scope)" in result.stderr and "(user scope)" in result.stderr
+
+
+class TestShardedAudit:
+    """Tests for the sharded, clustered audit (--jobs/--json)."""
+
+    @pytest.mark.duplicates
+    def test_shards_find_every_pair(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Links are exactly the pairwise matches, for any shard size and job count."""
+        from difflib import SequenceMatcher
+
+        audit_shards = load_script("audit_shards.py")
+        catalog_index = load_script("catalog_index.py")
+        rng = random.Random(18)
+        words = ["deploy", "build", "lint", "test", "page", "form", "api", "docs"]
+        names: list[str] = []
+        descriptions: list[str] = []
+        for _ in range(120):
+            if names and rng.random() < 0.3:
+                names.append(rng.choice(names) + rng.choice(["", "s", "x"]))
+                descriptions.append(rng.choice(descriptions) + rng.choice(["", " now"]))
+            else:
+                names.append("-".join(rng.sample(words, 2)))
+                descriptions.append(" ".join(rng.sample(words, 5)))
+        options = audit_shards.ShardOptions(
+            engine="difflib",
+            name_threshold=0.85,
+            description_threshold=0.8,
+            exhaustive=True,
+            lsh=None,
+            exact_names=True,
+        )
+
+        expected = set()
+        normalized = [catalog_index.normalize_name(name) for name in names]
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                if names[i] == names[j]:
+                    expected.add((i, j, "exact"))
+                elif SequenceMatcher(None, normalized[i], normalized[j]).ratio() >= 0.85:
+                    expected.add((i, j, "name"))
+                a, b = descriptions[i].lower(), descriptions[j].lower()
+                if SequenceMatcher(None, a, b).ratio() >= 0.8:
+                    expected.add((i, j, "description"))
+
+        monkeypatch.setattr(audit_shards, "SHARD_ROWS", 16)
+        single = audit_shards.sharded_links(names, descriptions, [[]] * len(names), options)
+        pooled = audit_shards.sharded_links(
+            names, descriptions, [[]] * len(names), options, jobs=2
+        )
+
+        assert pooled == single
+        assert {(i, j, kind) for i, j, kind, _ in single} == expected
+        assert any(kind == "exact" for _, _, kind in expected)
+
+    @pytest.mark.duplicates
+    def test_json_cluster_report(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """Linked commands are merged into one cluster; the report is deterministic."""
+        commands_dir = tmp_path / "commands"
+        commands_dir.mkdir()
+        create_command_md(commands_dir, "deploy-app", description="Deploy the web application")
+        create_command_md(commands_dir, "deploy-apps", description="Ship a release")
+        create_command_md(commands_dir, "ship", description="Deploy the web applications")
+        create_command_md(commands_dir, "lint", description="Run linters on changed files")
+
+        def run(*args: str) -> subprocess.CompletedProcess:
+            return subprocess.run(
+                [
+                    "python3",
+                    str(scripts_dir / "check-duplicates.py"),
+                    "--audit",
+                    "--no-index",
+                    "--engine",
+                    "difflib",
+                    *args,
+                    str(commands_dir),
+                ],
+                capture_output=True,
+                text=True,
+            )
+
+        first = run("--json", "--jobs", "2")
+        second = run("--json", "--jobs", "1")
+
+        assert first.returncode == 0, first.stderr
+        assert first.stdout == second.stdout
+        report = json.loads(first.stdout)
+        assert report["commands"] == 4
+        assert report["links"] == {"description": 1, "name": 1}
+        [cluster] = report["clusters"]
+        assert [m["name"] for m in cluster["members"]] == ["deploy-app", "deploy-apps", "ship"]
+
+        text = run("--jobs", "2")
+        assert "Duplicate cluster (3 commands; description, name)" in text.stderr
+        assert "1 duplicate clusters" in text.stdout
+
+
+class TestFrontmatterReader:
+    """Tests for the bounded head-only frontmatter reader."""
+
+    @pytest.mark.duplicates
+    def test_reads_frontmatter_and_body_offset(self, tmp_path: Path) -> None:
+        """Frontmatter text, fields and the body's byte offset; CRLF files too."""
+        frontmatter = load_script("frontmatter.py")
+        for newline in ("\n", "\r\n"):
+            path = tmp_path / "cmd.md"
+            head = newline.join(["---", "name: demo", "description: Démo: run it", "---", ""])
+            path.write_bytes((head + "# Body" + newline).encode())
+
+            text, offset = frontmatter.read_frontmatter(path)
+
+            assert text == "name: demo\ndescription: Démo: run it"
+            assert path.read_bytes()[offset:].startswith(b"# Body")
+            assert frontmatter.frontmatter_fields(text) == {
+                "name": "demo",
+                "description": "Démo: run it",
+            }
+
+    @pytest.mark.duplicates
+    def test_repeated_keys_last_wins(self, tmp_path: Path) -> None:
+        """A repeated name or description takes its last value, as the YAML validators read it."""
+        check_duplicates = load_script("check-duplicates.py")
+        skill_md = tmp_path / "SKILL.md"
+        skill_md.write_text(
+            "---\nname: draft\ndescription: Old text\nname: final\ndescription: New text\n---\n"
+        )
+        command = tmp_path / "cmd.md"
+        command.write_text("---\ndescription: Old text\ndescription: New text\n---\n# Cmd\n")
+
+        assert check_duplicates.parse_skill_frontmatter(skill_md) == ("final", "New text")
+        assert check_duplicates.parse_command_frontmatter(command) == ("cmd", "New text")
+
+    @pytest.mark.duplicates
+    def test_unclosed_frontmatter_is_bounded(self, tmp_path: Path, run_check_duplicates) -> None:
+        """A missing closing delimiter gives up at the byte cap instead of scanning on."""
+        frontmatter = load_script("frontmatter.py")
+        path = tmp_path / "huge.md"
+        path.write_text("---\ndescription: never closed\n" + "x" * 100 + "\n" * 200_000)
+
+        assert frontmatter.read_frontmatter(path, max_bytes=1024) == (None, 0)
+        assert frontmatter.split_frontmatter(path.read_text(), max_bytes=1024) == (None, 0)
+        assert frontmatter.read_frontmatter(tmp_path / "huge.md", max_bytes=1 << 20)[0] is None
+        one_line = tmp_path / "one-line.md"
+        one_line.write_text("---" + "-" * 500_000)
+        assert frontmatter.read_frontmatter(one_line) == (None, 0)
+
+        result = run_check_duplicates(path, extra_args=["--no-index"])
+        assert result.returncode == 0
+        assert "No duplicates found for 'huge'" in result.stdout
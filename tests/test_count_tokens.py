@@ -10,11 +10,24 @@ Tests cover:
 - JSON output format
 - Missing file handling
 - Directory mode (self-validation with skill-level limits)
+- On-disk token count cache (--cache-dir, --no-cache), parallel writers not locked out
+- Batched reference tokenization in directory mode
+- Catalog mode (--catalog) NDJSON streaming and summary
+- Bounded-memory streaming counts for large files
+- Calibrated fallback estimator accuracy and error band
+- Per-section token heat map (--sections)
+- Transitive @file / command-chain invocation cost (--resolve), absolute @ globs
+- Command vs skill cumulative cost simulation (--simulate)
+- Cross-file redundancy in references/ (--redundancy)
 """
 
 from __future__ import annotations
 
 import json
+import os
+import re
+import subprocess
+import time
 from pathlib import Path
 
 import pytest
@@ -23,8 +36,31 @@ from helpers import (
     create_skill_md,
     generate_long_lines,
     generate_long_text,
+    load_script,
 )
 
+# Markdown with a table, code block and URLs; tiktoken cl100k_base counts
+# 108 tokens, the old words * 1.3 heuristic gave 58.
+ESTIMATE_SAMPLE = (
+    "# Deploy\n\n"
+    "| Flag | Default | Description |\n"
+    "|------|---------|-------------|\n"
+    "| `--env` | `staging` | Target environment |\n"
+    "| `--dry-run` | `false` | Print the plan only |\n\n"
+    "```bash\n"
+    "kubectl apply -f k8s/deployment.yaml --namespace=\"${NAMESPACE:-default}\"\n"
+    "curl -sSf https://api.example.com/v2/health?verbose=1 | jq '.status'\n"
+    "```\n\n"
+    "See https://docs.example.com/deploy/rollbacks#automatic for details.\n"
+)
+ESTIMATE_SAMPLE_TIKTOKEN = 108
+
+
+def _mkdir(path: Path) -> Path:
+    """Create a directory (and parents) and return it."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
 
 class TestSmallCommandPasses:
     """Tests for small command acceptance."""
@@ -230,3 +266,585 @@ class TestDirectoryMode:
 
         data = json.loads(result.stdout)
         assert data["passed"] is False
+
+
+class TestTokenCache:
+    """Tests for the on-disk token count cache."""
+
+    @pytest.mark.tokens
+    def test_cached_counts_match_uncached(
+        self,
+        temp_command_dir: Path,
+        tmp_path: Path,
+        run_count_tokens,
+    ) -> None:
+        """Second run is served from the cache with identical counts."""
+        cmd = create_command_md(
+            temp_command_dir,
+            name="cached-cmd",
+            description="Cache test",
+            content="# Cached\n\nSome content to count.\n",
+        )
+        cache_dir = tmp_path / "cache"
+        args = ["--cache-dir", str(cache_dir)]
+
+        first = json.loads(run_count_tokens(cmd, json_output=True, extra_args=args).stdout)
+        assert (cache_dir / "platxa-cache.sqlite3").exists()
+        second = json.loads(run_count_tokens(cmd, json_output=True, extra_args=args).stdout)
+        uncached = json.loads(
+            run_count_tokens(cmd, json_output=True, extra_args=["--no-cache"]).stdout
+        )
+
+        assert first == second == uncached
+
+    @pytest.mark.tokens
+    def test_edit_invalidates_cache(
+        self,
+        temp_command_dir: Path,
+        tmp_path: Path,
+        run_count_tokens,
+    ) -> None:
+        """Changing file content produces a fresh count."""
+        cmd = create_command_md(temp_command_dir, name="edit-cmd", content="# Short\n")
+        args = ["--cache-dir", str(tmp_path / "cache")]
+
+        before = json.loads(run_count_tokens(cmd, json_output=True, extra_args=args).stdout)
+        cmd.write_text("# Longer\n\n" + "word " * 200)
+        after = json.loads(run_count_tokens(cmd, json_output=True, extra_args=args).stdout)
+
+        assert after["command_tokens"] > before["command_tokens"]
+
+    @pytest.mark.tokens
+    def test_no_cache_writes_nothing(
+        self,
+        temp_command_dir: Path,
+        tmp_path: Path,
+        run_count_tokens,
+    ) -> None:
+        """--no-cache leaves the cache directory untouched."""
+        cmd = create_command_md(temp_command_dir, name="nocache-cmd")
+        cache_dir = tmp_path / "cache"
+
+        result = run_count_tokens(
+            cmd, json_output=True, extra_args=["--no-cache", "--cache-dir", str(cache_dir)]
+        )
+
+        assert result.returncode == 0
+        assert not cache_dir.exists()
+
+    @pytest.mark.tokens
+    def test_parallel_caches_do_not_lock_each_other(self, tmp_path: Path) -> None:
+        """Hits and stores are held until close, so another writer never waits on them."""
+        content_cache = load_script("content_cache.py")
+        cache_dir = tmp_path / "cache"
+        with content_cache.ContentCache("tokens", cache_dir) as seed:
+            seed.put("old", "1")
+
+        first = content_cache.ContentCache("tokens", cache_dir)
+        second = content_cache.ContentCache("tokens", cache_dir)
+        assert first.get("old") == "1"
+        first.put("a", "2")
+        assert first.get("a") == "2"
+        second.put("b", "3")
+        started = time.monotonic()
+        second.close()
+        first.close()
+
+        assert time.monotonic() - started < 5
+        with content_cache.ContentCache("tokens", cache_dir) as reopened:
+            assert [reopened.get(k) for k in ("old", "a", "b")] == ["1", "2", "3"]
+
+
+class TestBatchedDirectoryMode:
+    """Tests for batched reference tokenization in directory mode."""
+
+    @pytest.mark.tokens
+    def test_batched_refs_match_single_file_counts(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """Each reference counted in a batch matches its standalone count."""
+        create_skill_md(
+            temp_command_dir,
+            name="batch-skill",
+            description="Batch test skill.",
+        )
+        refs = temp_command_dir / "references" / "patterns"
+        refs.mkdir(parents=True)
+        for i in range(5):
+            (refs / f"ref-{i}.md").write_text(f"# Ref {i}\n\n" + "token text " * (i * 40 + 1))
+
+        result = run_count_tokens(temp_command_dir, json_output=True, extra_args=["--no-cache"])
+        data = json.loads(result.stdout)
+
+        assert len(data["ref_files"]) == 5
+        for ref in data["ref_files"]:
+            single = run_count_tokens(
+                temp_command_dir / ref["path"], json_output=True, extra_args=["--no-cache"]
+            )
+            assert json.loads(single.stdout)["command_tokens"] == ref["tokens"]
+        assert data["ref_total_tokens"] == sum(f["tokens"] for f in data["ref_files"])
+
+
+class TestCatalogMode:
+    """Tests for --catalog multi-scope analysis."""
+
+    @staticmethod
+    def _run_catalog(
+        scripts_dir: Path, project: Path, home: Path, *args: str
+    ) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["python3", str(scripts_dir / "count-tokens.py"), "--catalog", str(project), *args],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "HOME": str(home)},
+        )
+
+    @pytest.mark.tokens
+    def test_catalog_walks_all_scopes(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """Project, user and plugin command directories are all analyzed."""
+        project = tmp_path / "project"
+        home = tmp_path / "home"
+        create_command_md(_mkdir(project / "commands"), "build", description="Build")
+        create_command_md(_mkdir(project / ".claude" / "commands"), "lint", description="Lint")
+        create_command_md(_mkdir(home / ".claude" / "commands"), "deploy", description="Ship")
+        create_command_md(
+            _mkdir(project / ".claude" / "plugins" / "tools" / "commands" / "ns"),
+            "fmt",
+            description="Format",
+        )
+
+        result = self._run_catalog(scripts_dir, project, home, "--json", "--jobs", "2")
+
+        assert result.returncode == 0, result.stderr
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        names = sorted(r["command_name"] for r in records[:-1])
+        assert names == ["build", "deploy", "fmt", "lint"]
+        summary = records[-1]["summary"]
+        assert summary["commands"] == 4
+        assert summary["failed"] == 0
+        assert summary["total_tokens"] == sum(r["command_tokens"] for r in records[:-1])
+
+    @pytest.mark.tokens
+    def test_catalog_fails_when_any_command_over_budget(
+        self, tmp_path: Path, scripts_dir: Path
+    ) -> None:
+        """One oversized command fails the whole catalog run."""
+        project = tmp_path / "project"
+        commands = _mkdir(project / "commands")
+        create_command_md(commands, "small", description="Small")
+        create_command_md(commands, "huge", content=generate_long_lines(650))
+
+        result = self._run_catalog(scripts_dir, project, tmp_path / "home", "--jobs", "1")
+
+        assert result.returncode == 1
+        assert "✗" in result.stdout
+        assert "FAILED" in result.stdout
+
+
+class TestStreamingCounts:
+    """Tests for chunked counting of large files."""
+
+    @pytest.mark.tokens
+    def test_chunks_rejoin_to_whole_text(self, tmp_path: Path) -> None:
+        """Chunks split at safe boundaries reassemble the decoded file exactly."""
+        count_tokens = load_script("count-tokens.py")
+        big = tmp_path / "big.md"
+        body = "".join(
+            f"## Section {i}\r\n\nSome words here, and don't stop.  \n\tindented {i}\r\n"
+            for i in range(2000)
+        )
+        big.write_bytes(body.encode())
+
+        chunks = list(count_tokens.iter_text_chunks(big, chunk_bytes=997))
+        whole = count_tokens.decode_text(big.read_bytes())
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == whole
+
+    @pytest.mark.tokens
+    def test_streamed_counts_match_whole_file(self, tmp_path: Path) -> None:
+        """Streaming token and line counts equal the in-memory result."""
+        count_tokens = load_script("count-tokens.py")
+        big = tmp_path / "big.md"
+        big.write_bytes(("word " * 30 + "\r\n" + "x" * 120 + "\n\n").encode() * 40000)
+        whole = count_tokens.decode_text(big.read_bytes())
+
+        digest, lines = count_tokens.scan_file(big, chunk_bytes=4093)
+        tokens, _, _ = count_tokens.count_large_file(big)
+
+        assert lines == count_tokens.count_lines(whole)
+        assert tokens == count_tokens.count_tokens(whole)[0]
+        assert digest == count_tokens.content_hash(big.read_bytes())
+
+
+class TestFallbackEstimator:
+    """Tests for the calibrated character-class estimator."""
+
+    @pytest.mark.tokens
+    def test_estimate_within_reported_band(self) -> None:
+        """Code, tables and URLs are estimated within the reported error band."""
+        count_tokens = load_script("count-tokens.py")
+
+        estimate = count_tokens.count_tokens_estimate(ESTIMATE_SAMPLE)
+        band = count_tokens.ESTIMATE_ERROR_PCT / 100
+
+        assert abs(estimate - ESTIMATE_SAMPLE_TIKTOKEN) <= ESTIMATE_SAMPLE_TIKTOKEN * band
+
+    @pytest.mark.tokens
+    def test_cli_reports_method_and_band(self, tmp_path: Path, run_count_tokens) -> None:
+        """--json names the counting method; an estimate stays within the band it reports."""
+        count_tokens = load_script("count-tokens.py")
+        sample = tmp_path / "sample.md"
+        sample.write_text(ESTIMATE_SAMPLE)
+
+        result = run_count_tokens(sample, json_output=True)
+        data = json.loads(result.stdout)
+
+        if data["method"] == "tiktoken":
+            assert data["command_tokens"] == ESTIMATE_SAMPLE_TIKTOKEN
+        else:
+            band = re.fullmatch(r"estimate±(\d+)%", data["method"])
+            assert band is not None
+            assert int(band.group(1)) == count_tokens.ESTIMATE_ERROR_PCT
+            error = abs(data["command_tokens"] - ESTIMATE_SAMPLE_TIKTOKEN)
+            assert error <= ESTIMATE_SAMPLE_TIKTOKEN * int(band.group(1)) / 100
+
+    @pytest.mark.tokens
+    def test_features_accumulate_across_chunks(self) -> None:
+        """Summed per-chunk features give the whole-text estimate."""
+        count_tokens = load_script("count-tokens.py")
+        first, second = ESTIMATE_SAMPLE[:121], ESTIMATE_SAMPLE[121:]
+        assert first.endswith("\n") and not second[0].isspace()
+
+        summed = [
+            a + b
+            for a, b in zip(
+                count_tokens.estimate_features(first),
+                count_tokens.estimate_features(second),
+                strict=True,
+            )
+        ]
+
+        assert count_tokens.estimate_from_features(summed) == (
+            count_tokens.count_tokens_estimate(ESTIMATE_SAMPLE)
+        )
+
+
+class TestSectionsMode:
+    """Tests for the per-section token heat map (--sections)."""
+
+    SECTIONED_CONTENT = (
+        "# Review\n\n"
+        "Short intro.\n\n"
+        "## Steps\n\n"
+        + "Check every changed file for style and correctness issues.\n" * 30
+        + "\n```bash\n"
+        "git diff --stat\n"
+        "```\n\n"
+        "| Field | Meaning |\n"
+        "|-------|---------|\n"
+        "| name | Command name |\n"
+    )
+
+    @pytest.mark.tokens
+    def test_sections_cover_whole_file(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """Sections are ranked by tokens and their lines add up to the file."""
+        create_command_md(
+            temp_command_dir,
+            name="sectioned",
+            description="Review changes",
+            content=self.SECTIONED_CONTENT,
+        )
+
+        result = run_count_tokens(
+            temp_command_dir / "sectioned.md",
+            json_output=True,
+            extra_args=["--sections", "--no-cache"],
+        )
+
+        assert result.returncode == 0, f"stderr: {result.stderr}"
+        data = json.loads(result.stdout)
+        sections = data["sections"]
+
+        kinds = {s["kind"] for s in sections}
+        assert {"frontmatter", "heading", "code", "table"} <= kinds
+        assert sections[0]["title"] == "## Steps"
+        tokens = [s["tokens"] for s in sections]
+        assert tokens == sorted(tokens, reverse=True)
+        assert sum(s["lines"] for s in sections) == data["command_lines"]
+
+    @pytest.mark.tokens
+    def test_section_boundaries_are_token_safe(self) -> None:
+        """Section boundaries are token-safe, so counts sum to the whole file."""
+        count_tokens = load_script("count-tokens.py")
+        text = "---\nname: x\n---\n\n" + ESTIMATE_SAMPLE + "\n## Notes\n\n  indented\n"
+
+        sections = count_tokens.split_sections(text)
+        rejoined = "\n".join(body for *_, body in sections)
+
+        assert rejoined == text
+        assert all(body[:1] and not body[0].isspace() for *_, body in sections)
+
+    @pytest.mark.tokens
+    def test_human_output_shows_heat_map(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """Human output lists the most expensive sections, honoring --top."""
+        create_command_md(
+            temp_command_dir,
+            name="sectioned",
+            description="Review changes",
+            content=self.SECTIONED_CONTENT,
+        )
+
+        result = run_count_tokens(
+            temp_command_dir / "sectioned.md",
+            extra_args=["--sections", "--top", "2", "--no-cache"],
+        )
+
+        assert result.returncode == 0, f"stderr: {result.stderr}"
+        assert "Most expensive sections (top 2 of" in result.stdout
+        assert "heading: ## Steps" in result.stdout
+
+
+class TestResolveMode:
+    """Tests for transitive per-invocation context cost (--resolve)."""
+
+    def _project(self, tmp_path: Path) -> Path:
+        commands = _mkdir(tmp_path / ".claude" / "commands")
+        docs = _mkdir(tmp_path / "docs")
+        (docs / "guide.md").write_text("# Guide\n\nSee @docs/shared.md\n")
+        (docs / "shared.md").write_text("Shared conventions.\n" * 20)
+        create_command_md(
+            commands,
+            name="ship",
+            description="Ship a release",
+            content=(
+                "# Ship\n\nFollow @docs/guide.md, then run /verify.\n\n"
+                "```\n@docs/ignored.md /unknown\n```\n"
+            ),
+        )
+        create_command_md(
+            commands,
+            name="verify",
+            description="Verify a release",
+            content="# Verify\n\nRe-read @docs/shared.md and go back to /ship.\n",
+        )
+        return tmp_path
+
+    def _run(self, scripts_dir: Path, project: Path, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [
+                "python3",
+                str(scripts_dir / "count-tokens.py"),
+                "--no-cache",
+                "--resolve",
+                "--project-dir",
+                str(project),
+                *args,
+                str(project / ".claude" / "commands" / "ship.md"),
+            ],
+            capture_output=True,
+            text=True,
+        )
+
+    @pytest.mark.tokens
+    def test_includes_and_chains_resolved_once(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """Nested includes and chained commands are loaded once each; cycles are reported."""
+        project = self._project(tmp_path)
+
+        result = self._run(scripts_dir, project, "--json")
+
+        assert result.returncode == 0, f"stderr: {result.stderr}"
+        data = json.loads(result.stdout)
+        invocation = data["invocation"]
+        loaded = invocation["resolution"]["loaded"]
+        paths = [f["path"] for f in loaded]
+
+        assert paths == ["/ship", "docs/guide.md", "docs/shared.md", "/verify"]
+        assert invocation["invocation_tokens"] == sum(f["tokens"] for f in loaded)
+        assert invocation["invocation_tokens"] > data["command_tokens"]
+        assert invocation["resolution"]["cycles"] == [["/ship", "/verify", "/ship"]]
+        assert any("Reference cycle" in w for w in data["warnings"])
+
+    @pytest.mark.tokens
+    def test_absolute_glob_expanded(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """An @ glob with an absolute path loads its matches instead of crashing."""
+        project = self._project(_mkdir(tmp_path / "project"))
+        outside = _mkdir(tmp_path / "outside")
+        (outside / "a.txt").write_text("alpha\n")
+        (outside / "b.txt").write_text("beta\n")
+        (outside / "c.log").write_text("gamma\n")
+        ship = project / ".claude" / "commands" / "ship.md"
+        ship.write_text(ship.read_text() + f"\nAlso read @{outside}/*.txt and @{outside}/*.none\n")
+
+        result = self._run(scripts_dir, project, "--json")
+
+        assert result.returncode == 0, f"stderr: {result.stderr}"
+        resolution = json.loads(result.stdout)["invocation"]["resolution"]
+        paths = [f["path"] for f in resolution["loaded"]]
+        assert paths == [
+            "/ship",
+            "docs/guide.md",
+            "docs/shared.md",
+            str(outside / "a.txt"),
+            str(outside / "b.txt"),
+            "/verify",
+        ]
+        assert resolution["unresolved"] == [f"/ship: @{outside}/*.none"]
+
+    @pytest.mark.tokens
+    def test_over_hard_invocation_limit_fails(self, tmp_path: Path, scripts_dir: Path) -> None:
+        """A small command that drags in a huge include fails the invocation budget."""
+        project = self._project(tmp_path)
+        (project / "docs" / "shared.md").write_text(generate_long_text(20000))
+
+        result = self._run(scripts_dir, project)
+
+        assert result.returncode == 1
+        assert "Loaded per invocation:" in result.stdout
+        assert "Invocation loads more than recommended" in result.stdout
+
+
+class TestSimulateMode:
+    """Tests for the command vs skill cost simulator (--simulate)."""
+
+    @pytest.mark.tokens
+    def test_cumulative_costs_and_break_even(self) -> None:
+        """Command cost grows per message; skill cost is paid once per load."""
+        count_tokens = load_script("count-tokens.py")
+
+        simulation = count_tokens.simulate_cost(1000, 600, [300, 300], messages=10)
+
+        assert simulation["command_cumulative"] == 10 * 1000
+        assert simulation["skill_cumulative"] == 600 + 300 + 300
+        # Message 1 loads SKILL.md and the first reference (900 < 1000)
+        assert simulation["break_even"] == 1
+        assert simulation["series"][5] == (6, 6000, 1200)
+        assert simulation["savings"] == 10000 - 1200
+
+    @pytest.mark.tokens
+    def test_no_break_even_keeps_command(self) -> None:
+        """A skill heavier than the whole conversation's command cost is not advised."""
+        count_tokens = load_script("count-tokens.py")
+
+        simulation = count_tokens.simulate_cost(100, 100, [5000], messages=3)
+
+        assert simulation["break_even"] is None
+        assert simulation["recommendation"][0].startswith("Keep as a command")
+
+    @pytest.mark.tokens
+    @pytest.mark.slow
+    def test_oversized_command_advised_to_convert(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """An over-budget command gets a convert-to-skill recommendation with numbers."""
+        create_command_md(
+            temp_command_dir,
+            name="huge",
+            description="Huge command",
+            content=generate_long_text(3000),
+        )
+
+        result = run_count_tokens(
+            temp_command_dir / "huge.md",
+            json_output=True,
+            extra_args=["--no-cache", "--simulate", "20"],
+        )
+
+        data = json.loads(result.stdout)
+        simulation = data["simulation"]
+        assert simulation["messages"] == 20
+        assert simulation["command_cumulative"] == 20 * data["command_tokens"]
+        assert simulation["break_even"] == 2
+        assert simulation["recommendation"][0].startswith("Convert to a skill")
+
+    @pytest.mark.tokens
+    def test_skill_directory_inlines_references_for_command_form(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """For a skill directory the command form is SKILL.md plus every reference."""
+        create_skill_md(temp_command_dir, name="sim-skill", description="Simulated skill")
+        refs = _mkdir(temp_command_dir / "references")
+        (refs / "phase-one.md").write_text("# Phase one\n\n" + "Do the first thing.\n" * 40)
+        (refs / "phase-two.md").write_text("# Phase two\n\n" + "Do the second thing.\n" * 40)
+
+        result = run_count_tokens(
+            temp_command_dir, json_output=True, extra_args=["--no-cache", "--simulate", "5"]
+        )
+
+        data = json.loads(result.stdout)
+        simulation = data["simulation"]
+        assert simulation["command_tokens"] == data["total_tokens"]
+        assert simulation["skill_md_tokens"] == data["command_tokens"]
+        assert len(simulation["reference_tokens"]) == 2
+        assert simulation["skill_cumulative"] == data["total_tokens"]
+
+        result = run_count_tokens(temp_command_dir, extra_args=["--no-cache", "--simulate", "5"])
+
+        assert "Cost over 5 messages:" in result.stdout
+        assert "Recommendation:" in result.stdout
+
+
+class TestRedundancyMode:
+    """Tests for the references/ redundancy report (--redundancy)."""
+
+    BUDGET_TABLE = (
+        "| Metric | Recommended | Hard Limit |\n"
+        "|--------|-------------|------------|\n"
+        "| Tokens | 2,000 | 4,000 |\n"
+        "| Lines | 300 | 600 |\n"
+    )
+
+    @pytest.mark.tokens
+    def test_repeated_table_reported_once_with_origin(
+        self,
+        temp_command_dir: Path,
+        run_count_tokens,
+    ) -> None:
+        """A table copied into a second reference is attributed to its first copy."""
+        create_skill_md(temp_command_dir, name="dup-skill", description="Duplicated refs")
+        refs = _mkdir(temp_command_dir / "references")
+        (refs / "a-budget.md").write_text("# Budget\n\n" + self.BUDGET_TABLE)
+        (refs / "b-gate.md").write_text(
+            "# Gate\n\nUnique gate prose here.\n\n" + self.BUDGET_TABLE + "\nDone.\n"
+        )
+        (refs / "c-other.md").write_text("# Other\n\nNothing in common with the rest.\n")
+
+        result = run_count_tokens(
+            temp_command_dir, json_output=True, extra_args=["--no-cache", "--redundancy"]
+        )
+
+        data = json.loads(result.stdout)
+        redundancy = data["redundancy"]
+        assert redundancy["files"] == 3
+        assert [b["path"] for b in redundancy["blocks"]] == ["references/b-gate.md"]
+        block = redundancy["blocks"][0]
+        assert (block["start_line"], block["end_line"]) == (5, 8)
+        assert block["duplicate_of"] == "references/a-budget.md:3"
+        assert redundancy["duplicated_tokens"] == block["tokens"] > 0
+
+    @pytest.mark.tokens
+    def test_rewrapped_text_still_matches(self) -> None:
+        """Shingles ignore whitespace, so reflowed copies are still found."""
+        redundancy = load_script("redundancy.py")
+        words = " ".join(f"word{i}" for i in range(30))
+        reflowed = words.replace(" word10 ", "\n  word10\n")
+
+        blocks = redundancy.find_redundant_blocks([("a.md", words), ("b.md", "intro " + reflowed)])
+
+        assert len(blocks) == 1
+        assert blocks[0]["words"] == 30
+        assert blocks[0]["duplicate_of"] == "a.md:1"
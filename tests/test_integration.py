@@ -6,6 +6,7 @@ NO mocks or simulations.
 Tests cover:
 - validate-all.sh integration for command files
 - validate-all.sh integration for directory mode
+- Batched shellcheck stage: batching, real paths, per-file result cache
 - Self-validation of platxa-command-generator
 - install-command.sh copy functionality
 - Complete command creation workflow
@@ -13,11 +14,14 @@ Tests cover:
 
 from __future__ import annotations
 
+import json
+import shutil
+import subprocess
 import tempfile
 from pathlib import Path
 
 import pytest
-from helpers import create_command_md, create_skill_md
+from helpers import create_command_md, create_skill_md, load_script
 
 
 class TestValidateAllCommandFile:
@@ -156,6 +160,73 @@ echo "example"
         assert result.returncode == 1, "Expected exit 1 for invalid directory"
 
 
+class TestShellLint:
+    """Tests for the batched shellcheck stage (shell_lint.py)."""
+
+    def test_batches_fill_jobs_and_stay_bounded(self) -> None:
+        """Batches keep every worker busy without exceeding the per-run file cap."""
+        shell_lint = load_script("shell_lint.py")
+        paths = [Path(f"s{i}.sh") for i in range(150)]
+
+        assert [len(b) for b in shell_lint.make_batches(paths, 2)] == [64, 64, 22]
+        assert [len(b) for b in shell_lint.make_batches(paths[:10], 4)] == [3, 3, 3, 1]
+        assert [p for b in shell_lint.make_batches(paths, 3) for p in b] == paths
+        assert shell_lint.make_batches([], 4) == []
+
+    def test_diagnostics_keep_real_paths(self, tmp_path: Path) -> None:
+        """json1 comments map back to each file and print in gcc format."""
+        shell_lint = load_script("shell_lint.py")
+        first, second = tmp_path / "a.sh", tmp_path / "b.sh"
+        comments = [
+            (3, 6, "info", 2086, "Double quote to prevent globbing."),
+            (1, 1, "error", 2148, "Add a shebang."),
+        ]
+        output = json.dumps(
+            {
+                "comments": [
+                    {"file": str(second), "line": line, "column": column, "level": level,
+                     "code": code, "message": message}
+                    for line, column, level, code, message in comments
+                ]
+            }
+        )
+
+        results = shell_lint.parse_json1(output, [first, second])
+
+        assert results[first] == []
+        assert [shell_lint.format_diagnostic(second, d) for d in results[second]] == [
+            f"{second}:1:1: error: Add a shebang. [SC2148]",
+            f"{second}:3:6: info: Double quote to prevent globbing. [SC2086]",
+        ]
+
+    @pytest.mark.integration
+    @pytest.mark.skipif(shutil.which("shellcheck") is None, reason="shellcheck not installed")
+    def test_cli_reports_paths_and_reuses_results(self, tmp_path: Path) -> None:
+        """Diagnostics name each script; unchanged scripts are not checked again."""
+        scripts = tmp_path / "scripts"
+        scripts.mkdir()
+        (scripts / "clean.sh").write_text('#!/usr/bin/env bash\necho "$1"\n')
+        (scripts / "unquoted.sh").write_text("#!/usr/bin/env bash\nrm $1\n")
+        command = [
+            "python3",
+            str(Path(__file__).parent.parent / "scripts" / "shell_lint.py"),
+            str(scripts),
+            "--jobs",
+            "2",
+            "--cache-dir",
+            str(tmp_path / "cache"),
+        ]
+
+        first = subprocess.run(command, capture_output=True, text=True)
+        second = subprocess.run(command, capture_output=True, text=True)
+
+        assert first.returncode == second.returncode == 1
+        assert f"{scripts / 'unquoted.sh'}:2:4:" in first.stderr
+        assert "clean.sh" not in first.stderr
+        assert first.stderr == second.stderr
+        assert "Checked 2 shell script(s) (2 cached)" in second.stdout
+
+
 class TestSelfValidation:
     """Tests for validating platxa-command-generator itself."""
 
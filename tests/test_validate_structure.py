@@ -8,6 +8,7 @@ Tests cover:
 - Missing/empty file detection
 - Directory mode (self-validation) with SKILL.md
 - Script permissions in directory mode
+- Long-line cap with an explicit scan-truncated warning
 """
 
 from __future__ import annotations
@@ -153,6 +154,29 @@ Fix issues you find.
         assert "vague" in result.stderr.lower() or "WARN" in result.stderr
 
 
+class TestScanLimits:
+    """Tests for the per-line cap on body checks."""
+
+    @pytest.mark.structure
+    def test_long_line_truncated_with_warning(
+        self,
+        temp_command_dir: Path,
+        run_validate_structure,
+    ) -> None:
+        """A minified line is checked up to the cap and reported as truncated."""
+        command_md = temp_command_dir / "minified.md"
+        command_md.write_text(
+            "# Minified\n\nRun `make` then " + "improve things " * 1000 + "TODO\n"
+        )
+
+        result = run_validate_structure(command_md)
+
+        assert result.returncode == 0, f"Expected exit 0. stderr: {result.stderr}"
+        assert "Scan truncated: body line 3 is longer than 4096 characters" in result.stderr
+        assert "Vague instruction detected" in result.stderr
+        assert "Placeholder content" not in result.stderr
+
+
 class TestPromptSpecificity:
     """Tests for prompt specificity check."""
 